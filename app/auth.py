@@ -6,9 +6,10 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 import bcrypt
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .dependencies import get_db
+from .dependencies import get_db, get_async_db
 from .models.doctor import doctors
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -69,7 +70,7 @@ def authenticate_doctor(db: Session, email: str, password: str) -> Optional[doct
 
 async def get_current_doctor(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> doctors:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -85,7 +86,7 @@ async def get_current_doctor(
     except JWTError:
         raise credentials_exception
 
-    user = db.get(doctors, int(token_data.sub))
+    user = await db.get(doctors, int(token_data.sub))
     if user is None:
         raise credentials_exception
     return user
@@ -1,11 +1,195 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
+import time
+import threading
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./oros.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-)
+_IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+_IS_SQLITE_MEMORY = _IS_SQLITE and (":memory:" in SQLALCHEMY_DATABASE_URL or SQLALCHEMY_DATABASE_URL.rstrip("/") == "sqlite:")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+
+# Named engine profiles, picked with DB_PROFILE (defaults depend on the URL)
+#   dev-sqlite       single file, default journal; fine for one developer
+#   prod-sqlite-wal  WAL journal + busy timeout: readers never block the writer and
+#                    concurrent writers wait instead of failing with "database is locked"
+#   postgres-pooled  sized pool with overflow, pre-ping, recycling and a statement timeout
+ENGINE_PROFILES = {
+    "dev-sqlite": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pragmas": {"busy_timeout": 5000},
+    },
+    "prod-sqlite-wal": {
+        "pool_size": 8,
+        "max_overflow": 8,
+        "pool_timeout": 30,
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",   # durable at checkpoints; safe with WAL
+            "busy_timeout": 15000,
+            "cache_size": -64000,      # 64 MB page cache per connection
+            "temp_store": "MEMORY",
+        },
+    },
+    "postgres-pooled": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 30000,
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE") or ("dev-sqlite" if _IS_SQLITE else "postgres-pooled")
+if DB_PROFILE not in ENGINE_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE '{DB_PROFILE}'. Available: {', '.join(ENGINE_PROFILES)}")
+
+
+def _engine_options(profile: dict) -> dict:
+    options = {}
+    connect_args = {}
+
+    if _IS_SQLITE:
+        connect_args["check_same_thread"] = False
+    elif profile.get("statement_timeout_ms"):
+        timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", profile["statement_timeout_ms"]))
+        connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+
+    # In-memory SQLite keeps SQLAlchemy's own single-connection pool
+    if not _IS_SQLITE_MEMORY:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=int(os.getenv("DB_POOL_SIZE", profile["pool_size"])),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", profile["max_overflow"])),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", profile["pool_timeout"])),
+        )
+        if profile.get("pool_recycle"):
+            options["pool_recycle"] = profile["pool_recycle"]
+        options["pool_pre_ping"] = profile.get("pool_pre_ping", False)
+
+    options["connect_args"] = connect_args
+    return options
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(ENGINE_PROFILES[DB_PROFILE]))
+
+if _IS_SQLITE:
+    _pragmas = dict(ENGINE_PROFILES[DB_PROFILE].get("pragmas", {}))
+    if os.getenv("DB_BUSY_TIMEOUT_MS"):
+        _pragmas["busy_timeout"] = int(os.getenv("DB_BUSY_TIMEOUT_MS"))
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in _pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def _async_url(url: str) -> str:
+    """Same database through an asyncio driver (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+    return f"{driver.get(scheme.split('+')[0], scheme)}{sep}{rest}"
+
+
+def _async_engine_options(profile: dict) -> dict:
+    options = {}
+    if _IS_SQLITE_MEMORY:
+        return options
+
+    options.update(
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=int(os.getenv("DB_POOL_SIZE", profile["pool_size"])),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", profile["max_overflow"])),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", profile["pool_timeout"])),
+        pool_pre_ping=profile.get("pool_pre_ping", False),
+    )
+    if profile.get("pool_recycle"):
+        options["pool_recycle"] = profile["pool_recycle"]
+    if not _IS_SQLITE and profile.get("statement_timeout_ms"):
+        timeout_ms = os.getenv("DB_STATEMENT_TIMEOUT_MS", str(profile["statement_timeout_ms"]))
+        options["connect_args"] = {"server_settings": {"statement_timeout": timeout_ms}}
+    return options
+
+
+# Async engine over the same database, for routes running on the event loop
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_engine_options(ENGINE_PROFILES[DB_PROFILE]))
+
+if _IS_SQLITE:
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# Objects stay usable after commit: reloading expired attributes would need an await
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _queue_pool_metrics(pool) -> dict:
+    return {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": pool._max_overflow,
+    }
+
+
+def pool_metrics() -> dict:
+    """Current pool occupancy and checkout wait statistics."""
+    pool = engine.pool
+    metrics = {"profile": DB_PROFILE, "dialect": engine.dialect.name, "pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        metrics.update(_queue_pool_metrics(pool))
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            metrics.update(
+                checkouts=pool.checkouts,
+                timeouts=pool.timeouts,
+                avg_wait_ms=round(1000 * pool.total_wait / pool.checkouts, 3) if pool.checkouts else 0.0,
+                max_wait_ms=round(1000 * pool.max_wait, 3),
+            )
+
+    async_pool = async_engine.pool
+    if isinstance(async_pool, QueuePool):
+        metrics["async_pool"] = _queue_pool_metrics(async_pool)
+    else:
+        metrics["async_pool"] = {"pool_class": type(async_pool).__name__}
+    return metrics
@@ -1,5 +1,7 @@
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .database import SessionLocal
+from .database import SessionLocal, AsyncSessionLocal
 
 def get_db() -> Session:
     """Provide a transactional scope for each request."""
@@ -8,3 +10,9 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async session for routes that run on the event loop (no blocking DB I/O)."""
+    async with AsyncSessionLocal() as db:
+        yield db
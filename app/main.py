@@ -1,3 +1,4 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .database import engine
@@ -13,8 +14,16 @@ from .routes import (
     notifications,
     dashboard,
     websocket_transcription,  # Added
+    system,
+    analysis_jobs,
+    search,
 )
 from . import auth 
+from .services.model_registry import registry
+from .services.job_queue import analysis_queue
+from .services.search_service import search_service
+from .services import dashboard_rollup
+from .services.or_schedule import schedule_index
 
 
 # Create FastAPI app instance
@@ -30,9 +39,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # keyset pagination token (see app/pagination.py)
 )
 
 Base.metadata.create_all(bind=engine)
+search_service.install()
+dashboard_rollup.install(engine)
+schedule_index.install()
 
 app.include_router(doctors.router, prefix="/doctors", tags=["Doctors"])
 app.include_router(patients.router, prefix="/patients", tags=["Patients"])
@@ -44,6 +57,37 @@ app.include_router(notifications.router, prefix="/notifications", tags=["Notific
 app.include_router(auth.router)  
 app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 app.include_router(websocket_transcription.router, prefix="/api", tags=["Real-time Transcription"])
+app.include_router(system.router, prefix="/system", tags=["System"])
+app.include_router(analysis_jobs.router, prefix="/analysis-jobs", tags=["Analysis Jobs"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
+
+
+# PRELOAD_MODELS=1 loads the fork-safe services at import, i.e. before a pre-forking
+# server (gunicorn --preload) forks its workers, so their in-process models are shared
+# copy-on-write. The Whisper inference pool is started per worker by warm_up_models.
+if os.getenv("PRELOAD_MODELS", "false").lower() in ("1", "true", "yes"):
+    registry.preload(fork_safe_only=True)
+
+
+@app.on_event("startup")
+def warm_up_models():
+    # Serve requests immediately; models load in the background (see /system/health)
+    if os.getenv("MODEL_WARMUP", "true").lower() in ("1", "true", "yes"):
+        registry.warm_up()
+
+
+@app.on_event("startup")
+async def start_analysis_workers():
+    # Results are pushed to the recording's socket when it is still open
+    analysis_queue.notify = websocket_transcription.manager.send_message
+    analysis_queue.is_listening = websocket_transcription.manager.is_connected
+    await analysis_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await analysis_queue.stop()
+    registry.shutdown()
 
 @app.get("/", tags=["Root"])
 def root():
@@ -62,5 +106,6 @@ def root():
             "/surgeries",
             "/operating-rooms",
             "/notifications",
+            "/search",
         ],
     }
@@ -8,3 +8,8 @@ from . import transcription
 from . import note
 from . import note_analysis
 from . import notification
+from . import analysis_job
+from . import analysis_cache
+from . import transcription_segment
+from . import dashboard_rollup
+from . import or_schedule_version
@@ -0,0 +1,19 @@
+from __future__ import annotations
+from sqlalchemy import String, Integer, Float, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+from datetime import datetime
+
+
+class analysis_cache(Base):
+    """Second-tier cache of LLM analysis results, keyed by a hash of prompt + model settings."""
+
+    cache_key: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 hex
+    model: Mapped[str] = mapped_column(String(120), nullable=False)
+    temperature: Mapped[float] = mapped_column(Float, nullable=False)
+    result: Mapped[str] = mapped_column(Text, nullable=False)              # JSON analysis result
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        return f"<AnalysisCache(key={self.cache_key[:12]}, model={self.model})>"
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from sqlalchemy import String, Integer, Enum, ForeignKey, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from .base import Base
+import enum
+from typing import Optional
+from datetime import datetime
+
+
+# Lifecycle of a queued post-recording analysis
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class analysis_jobs(Base):
+    """Durable queue entry for an AI analysis run (processed by services.job_queue)."""
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    transcription_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("transcriptions.id", ondelete="SET NULL"), index=True
+    )
+    # The note_analysis row this job fills in (created as `pending` on enqueue)
+    note_analysis_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("note_analysis.id", ondelete="SET NULL")
+    )
+
+    status: Mapped[JobStatus] = mapped_column(Enum(JobStatus), default=JobStatus.queued)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)         # JSON: text + patient context
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    # Scheduling / leasing
+    available_at: Mapped[Optional[datetime]]                            # not picked up before this time
+    locked_by: Mapped[Optional[str]] = mapped_column(String(64))
+    locked_at: Mapped[Optional[datetime]]
+    completed_at: Mapped[Optional[datetime]]
+
+    # Relationships
+    analysis = relationship("note_analysis")
+
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_available", "status", "available_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<AnalysisJob(id={self.id}, status={self.status}, attempts={self.attempts})>"
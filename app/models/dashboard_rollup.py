@@ -0,0 +1,29 @@
+from __future__ import annotations
+from sqlalchemy import Integer, Float
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+from datetime import date
+
+
+class dashboard_daily(Base):
+    """Per-day dashboard totals, kept current as surgeries and notes change (see services/dashboard_rollup.py)."""
+
+    day: Mapped[date] = mapped_column(primary_key=True)
+    notes_count: Mapped[int] = mapped_column(Integer, default=0)
+    wait_sum_minutes: Mapped[float] = mapped_column(Float, default=0.0)  # sum of max(0, actual - scheduled start)
+    wait_count: Mapped[int] = mapped_column(Integer, default=0)
+    patients_count: Mapped[int] = mapped_column(Integer, default=0)      # distinct patients with a surgery that day
+
+    def __repr__(self) -> str:
+        return f"<DashboardDaily(day={self.day}, notes={self.notes_count})>"
+
+
+class dashboard_room_daily(Base):
+    """Busy minutes per operating room and day, clipped to the rollup window (rooms with 0 minutes have no row)."""
+
+    day: Mapped[date] = mapped_column(primary_key=True)
+    room_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    busy_minutes: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        return f"<DashboardRoomDaily(day={self.day}, room_id={self.room_id}, busy={self.busy_minutes})>"
@@ -0,0 +1,14 @@
+from __future__ import annotations
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+
+class or_schedule_version(Base):
+    """Write generation of each operating room's schedule, bumped by every ORM surgery write touching the room (see services/or_schedule.py)."""
+
+    room_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        return f"<OrScheduleVersion(room_id={self.room_id}, version={self.version})>"
@@ -39,6 +39,10 @@ class transcriptions(Base):
     doctor = relationship("doctors", back_populates="transcriptions")
     patient = relationship("patients", back_populates="transcriptions")
     note = relationship("notes", back_populates="transcription", uselist=False)  # notes.transcription_id (unique)
+    segments = relationship(
+        "transcription_segments", back_populates="transcription",
+        order_by="transcription_segments.seq", cascade="all, delete-orphan"
+    )
 
     _table_args_ = (
         Index("ix_transcriptions_doctor_created", "doctor_id", "created_at"),
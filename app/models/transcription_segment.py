@@ -0,0 +1,30 @@
+from __future__ import annotations
+from sqlalchemy import Integer, Float, ForeignKey, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from .base import Base
+from typing import Optional
+
+
+class transcription_segments(Base):
+    """Append-only pieces of committed transcript text, written while a recording streams."""
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    transcription_id: Mapped[int] = mapped_column(ForeignKey("transcriptions.id", ondelete="CASCADE"))
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)          # order within the transcription
+    chunk_index: Mapped[Optional[int]] = mapped_column(Integer)        # client chunk that committed it
+
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    start_seconds: Mapped[Optional[float]] = mapped_column(Float)     # recording time (s) of the first word, skipped silence included
+    end_seconds: Mapped[Optional[float]] = mapped_column(Float)       # recording time (s) of the last word
+    confidence: Mapped[Optional[float]] = mapped_column(Float)
+
+    # Relationships
+    transcription = relationship("transcriptions", back_populates="segments")
+
+    __table_args__ = (
+        Index("ix_transcription_segments_transcription_seq", "transcription_id", "seq", unique=True),
+    )
+
+    def __repr__(self) -> str:
+        return f"<TranscriptionSegment(transcription_id={self.transcription_id}, seq={self.seq})>"
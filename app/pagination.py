@@ -0,0 +1,54 @@
+import json
+import base64
+import binascii
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy.orm import Query
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque token pointing just past `last_id` in newest-first order."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    q: Query,
+    id_column,
+    response: Response,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> list:
+    """
+    Newest-first page of `q`.
+
+    With `cursor` the page is a keyset seek (`id < last seen id`), which stays
+    fast on deep pages and is stable while rows are inserted. Without one,
+    `offset` is applied as before. Either way, when more rows exist the cursor
+    for the next page is returned in the X-Next-Cursor header.
+    """
+    q = q.order_by(id_column.desc())
+    if cursor:
+        q = q.filter(id_column < decode_cursor(cursor))
+    elif offset:
+        q = q.offset(offset)
+
+    # One extra row tells whether there is a next page without a COUNT
+    rows = q.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    return rows
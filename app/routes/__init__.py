@@ -6,3 +6,6 @@ from . import surgeries
 from . import operating_rooms
 from . import notifications
 from . import websocket_transcription
+from . import system
+from . import analysis_jobs
+from . import search
@@ -0,0 +1,38 @@
+# app/routes/analysis_jobs.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import Optional, List
+
+from ..dependencies import get_db
+from ..pagination import paginate
+from ..models.analysis_job import analysis_jobs, JobStatus
+from ..schemas.analysis_job import AnalysisJobOut
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[AnalysisJobOut])
+def list_analysis_jobs(
+    response: Response,
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
+    transcription_id: Optional[int] = Query(None),
+    status: Optional[JobStatus] = Query(None),
+):
+    q = db.query(analysis_jobs)
+    if transcription_id is not None:
+        q = q.filter(analysis_jobs.transcription_id == transcription_id)
+    if status is not None:
+        q = q.filter(analysis_jobs.status == status)
+    return paginate(q, analysis_jobs.id, response, limit, offset=offset, cursor=cursor)
+
+
+@router.get("/{job_id}", response_model=AnalysisJobOut)
+def get_analysis_job(job_id: int, db: Session = Depends(get_db)):
+    """Poll a queued analysis; once `completed`, the result is in note_analysis_id."""
+    obj = db.get(analysis_jobs, job_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return obj
@@ -1,10 +1,11 @@
 # app/routes/doctors.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 
 from ..dependencies import get_db
+from ..pagination import paginate
 from ..auth import hash_password
 from ..models.doctor import doctors, DoctorStatus
 
@@ -82,9 +83,11 @@ def create_doctor(payload: DoctorCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[DoctorOut])
 def list_doctors(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
     search: Optional[str] = Query(None, description="Search by first/last name or email"),
 ):
     q = db.query(doctors)
@@ -95,7 +98,7 @@ def list_doctors(
             (doctors.last_name.ilike(like)) |
             (doctors.email.ilike(like))
         )
-    return q.order_by(doctors.id.desc()).offset(offset).limit(limit).all()
+    return paginate(q, doctors.id, response, limit, offset=offset, cursor=cursor)
 
 
 @router.get("/{doctor_id}", response_model=DoctorOut)
@@ -1,10 +1,12 @@
 # app/routes/notes.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 
 from ..dependencies import get_db
+from ..pagination import paginate
+from ..services.search_service import search_service
 from ..models.note import notes
 from ..models.patient import patients
 from ..models.doctor import doctors
@@ -93,9 +95,11 @@ def create_note(payload: NoteCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[NoteOut])
 def list_notes(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
     patient_id: Optional[int] = Query(None),
     doctor_id: Optional[int] = Query(None),
     surgery_id: Optional[int] = Query(None),
@@ -114,9 +118,8 @@ def list_notes(
     elif has_transcription is False:
         q = q.filter(notes.transcription_id.is_(None))
     if search:
-        like = f"%{search}%"
-        q = q.filter((notes.title.ilike(like)) | (notes.content.ilike(like)))
-    return q.order_by(notes.id.desc()).offset(offset).limit(limit).all()
+        q = q.filter(search_service.filter_clause("notes", search))
+    return paginate(q, notes.id, response, limit, offset=offset, cursor=cursor)
 
 
 @router.get("/{note_id}", response_model=NoteOut)
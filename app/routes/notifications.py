@@ -1,11 +1,13 @@
 # app/routes/notifications.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 
 from ..dependencies import get_db
+from ..pagination import paginate
+from ..services.search_service import search_service
 from ..models.notification import notifications, Priority
 from ..models.doctor import doctors
 
@@ -64,9 +66,11 @@ def create_notification(payload: NotificationCreate, db: Session = Depends(get_d
 
 @router.get("/", response_model=List[NotificationOut])
 def list_notifications(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
     doctor_id: Optional[int] = Query(None),
     is_read: Optional[bool] = Query(None),
     priority: Optional[Priority] = Query(None),
@@ -89,9 +93,8 @@ def list_notifications(
     if created_to is not None:
         q = q.filter(notifications.created_at <= created_to)
     if search:
-        like = f"%{search}%"
-        q = q.filter((notifications.title.ilike(like)) | (notifications.message.ilike(like)))
-    return q.order_by(notifications.id.desc()).offset(offset).limit(limit).all()
+        q = q.filter(search_service.filter_clause("notifications", search))
+    return paginate(q, notifications.id, response, limit, offset=offset, cursor=cursor)
 
 
 @router.get("/{notification_id}", response_model=NotificationOut)
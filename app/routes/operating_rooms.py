@@ -1,11 +1,15 @@
 # app/routes/operating_rooms.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import date, datetime, timedelta
+import os
 
 from ..dependencies import get_db
+from ..pagination import paginate
 from ..models.operating_room import operating_rooms, RoomStatus
+from ..services.or_schedule import schedule_index
 
 router = APIRouter()
 
@@ -38,6 +42,18 @@ class OperatingRoomOut(BaseModel):
         from_attributes = True
 
 
+class FreeSlotOut(BaseModel):
+    room_id: int
+    room_number: str
+    start: datetime
+    end: datetime
+    available_until: datetime  # end of the free stretch the slot starts
+
+
+# Longest date range a single free-slot search may cover
+FREE_SLOTS_MAX_DAYS = int(os.getenv("OR_FREE_SLOTS_MAX_DAYS", "92"))
+
+
 def _ensure_unique_room_number(db: Session, room_number: str, exclude_id: Optional[int] = None):
     q = db.query(operating_rooms).filter(operating_rooms.room_number == room_number)
     if exclude_id is not None:
@@ -58,9 +74,11 @@ def create_operating_room(payload: OperatingRoomCreate, db: Session = Depends(ge
 
 @router.get("/", response_model=List[OperatingRoomOut])
 def list_operating_rooms(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
     status: Optional[RoomStatus] = Query(None),
     capacity_min: Optional[int] = Query(None),
     capacity_max: Optional[int] = Query(None),
@@ -80,7 +98,55 @@ def list_operating_rooms(
             (operating_rooms.room_name.ilike(like)) |
             (operating_rooms.location.ilike(like))
         )
-    return q.order_by(operating_rooms.id.desc()).offset(offset).limit(limit).all()
+    return paginate(q, operating_rooms.id, response, limit, offset=offset, cursor=cursor)
+
+
+@router.get("/free-slots", response_model=List[FreeSlotOut])
+def find_free_slots(
+    db: Session = Depends(get_db),
+    duration_minutes: int = Query(..., ge=1, le=24 * 60),
+    date_from: date = Query(default_factory=lambda: date.today()),
+    date_to: Optional[date] = Query(None, description="Last day to search (defaults to date_from)"),
+    room_ids: Optional[str] = Query(None, description="Comma-separated room ids (defaults to all rooms)"),
+    day_start: str = Query("07:00"),
+    day_end: str = Query("19:00"),
+    not_before: Optional[datetime] = Query(None, description="Earliest slot start, e.g. now; an offset is converted to server local time"),
+    include_maintenance: bool = Query(False),
+    limit: int = Query(20, ge=1, le=500),
+):
+    """Earliest free slots of `duration_minutes` inside the daily window, across rooms, ordered by start."""
+    date_to = date_to or date_from
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if (date_to - date_from).days + 1 > FREE_SLOTS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Search range is limited to {FREE_SLOTS_MAX_DAYS} days")
+    try:
+        t_start = datetime.strptime(day_start, "%H:%M").time()
+        t_end = datetime.strptime(day_end, "%H:%M").time()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="day_start/day_end must be HH:MM")
+    if not_before is not None and not_before.tzinfo is not None:
+        # Bookings are naive local wall-clock times
+        not_before = not_before.astimezone().replace(tzinfo=None)
+
+    q = db.query(operating_rooms.id, operating_rooms.room_number)
+    if room_ids:
+        try:
+            ids = [int(x) for x in room_ids.split(",") if x.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="room_ids must be comma-separated integers")
+        q = q.filter(operating_rooms.id.in_(ids))
+    if not include_maintenance:
+        q = q.filter(operating_rooms.status != RoomStatus.maintenance)
+    rooms = [(r.id, r.room_number) for r in q.order_by(operating_rooms.id).all()]
+    if not rooms:
+        return []
+
+    days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+    return schedule_index.free_slots(
+        db, rooms, timedelta(minutes=duration_minutes), days, t_start, t_end,
+        not_before=not_before, limit=limit
+    )
 
 
 @router.get("/{room_id}", response_model=OperatingRoomOut)
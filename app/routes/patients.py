@@ -1,10 +1,11 @@
 # app/routes/patients.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Set
 
 from ..dependencies import get_db
+from ..pagination import paginate
 from ..auth import get_current_doctor
 from ..models.doctor import doctors
 from ..models.patient import patients, PatientStatus
@@ -71,9 +72,11 @@ def create_patient(payload: PatientCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[PatientOut])
 def list_patients(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
     search: Optional[str] = Query(None, description="Search by first/last name, email, or phone"),
 ):
     q = db.query(patients)
@@ -85,7 +88,7 @@ def list_patients(
             (patients.email.ilike(like)) |
             (patients.phone.ilike(like))
         )
-    return q.order_by(patients.id.desc()).offset(offset).limit(limit).all()
+    return paginate(q, patients.id, response, limit, offset=offset, cursor=cursor)
 
 
 @router.get("/my", response_model=List[PatientOut], summary="List patients associated to the current doctor")
@@ -0,0 +1,45 @@
+# app/routes/search.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Optional, List, Dict
+
+from ..dependencies import get_db
+from ..services.search_service import search_service, SEARCH_TARGETS
+
+router = APIRouter()
+
+
+# ---------- Schemas ----------
+class SearchHit(BaseModel):
+    id: int
+    rank: Optional[float] = None
+    snippet: Optional[str] = None
+
+
+class SearchResults(BaseModel):
+    query: str
+    backend: str
+    results: Dict[str, List[SearchHit]]
+
+
+# ---------- Routes ----------
+@router.get("/", response_model=SearchResults)
+def search(
+    q: str = Query(..., min_length=1, description="Search terms; the last word also matches as a prefix"),
+    types: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(SEARCH_TARGETS)}"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Best matches per type, ranked by relevance, with <mark>-highlighted snippets."""
+    names = [t.strip() for t in types.split(",") if t.strip()] if types else list(SEARCH_TARGETS)
+    unknown = [t for t in names if t not in SEARCH_TARGETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search type(s): {', '.join(unknown)}")
+
+    return {
+        "query": q,
+        "backend": search_service.backend,
+        "results": {name: search_service.search(db, name, q, limit=limit, offset=offset) for name in names},
+    }
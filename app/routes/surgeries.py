@@ -1,11 +1,15 @@
 # app/routes/surgeries.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import date, datetime
 
 from ..dependencies import get_db
+from ..pagination import paginate
+from ..services.search_service import search_service
+from ..services.or_schedule import schedule_index, booking_interval
+from ..services.dashboard_rollup import scheduled_start
 from ..models.surgery import surgeries, SurgeryStatus
 from ..models.patient import patients
 from ..models.doctor import doctors
@@ -98,21 +102,57 @@ def _validate_fks(db: Session, patient_id: Optional[int], doctor_id: Optional[in
         _exists_or_404(db, operating_rooms, operating_room_id, "Operating room")
 
 
+# Fields that define a booking; changing any of them re-checks the room for conflicts
+BOOKING_FIELDS = ("operating_room_id", "scheduled_date", "scheduled_time", "duration_minutes", "status")
+
+
+def _ensure_room_available(db: Session, booking: dict, exclude_id: Optional[int] = None):
+    """Reject a booking that overlaps another non-cancelled surgery in the same room."""
+    room_id = booking.get("operating_room_id")
+    if room_id is None or booking.get("status") == SurgeryStatus.cancelled:
+        return
+    scheduled_time = booking.get("scheduled_time")
+    if scheduled_time and scheduled_start(date.min, scheduled_time) is None:
+        # Fail closed: an unreadable time would otherwise skip the conflict check
+        raise HTTPException(status_code=400, detail="scheduled_time must be HH:MM (or HH:MM:SS)")
+    duration = booking.get("duration_minutes")
+    if duration is not None and duration <= 0:
+        raise HTTPException(status_code=400, detail="duration_minutes must be positive")
+    interval = booking_interval(booking.get("scheduled_date"), scheduled_time, duration)
+    if interval is None:
+        return
+    # Serializes check + commit per room across processes; released by the route's commit
+    schedule_index.lock_room(db, room_id)
+    conflict = schedule_index.find_conflict(db, room_id, interval[0], interval[1], exclude_id=exclude_id)
+    if conflict:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Operating room {room_id} is already booked from {conflict.start:%Y-%m-%d %H:%M} "
+                f"to {conflict.end:%Y-%m-%d %H:%M} (surgery {conflict.surgery_id})"
+            ),
+        )
+
+
 @router.post("/", response_model=SurgeryOut, status_code=201)
 def create_surgery(payload: SurgeryCreate, db: Session = Depends(get_db)):
     _validate_fks(db, payload.patient_id, payload.doctor_id, payload.operating_room_id)
-    obj = surgeries(**payload.dict())
-    db.add(obj)
-    db.commit()
+    with schedule_index.booking_lock:
+        _ensure_room_available(db, payload.dict())
+        obj = surgeries(**payload.dict())
+        db.add(obj)
+        db.commit()
     db.refresh(obj)
     return obj
 
 
 @router.get("/", response_model=List[SurgeryOut])
 def list_surgeries(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
     patient_id: Optional[int] = Query(None),
     doctor_id: Optional[int] = Query(None),
     operating_room_id: Optional[int] = Query(None),
@@ -135,9 +175,8 @@ def list_surgeries(
     if date_to is not None:
         q = q.filter(surgeries.scheduled_date <= date_to)
     if search:
-        like = f"%{search}%"
-        q = q.filter((surgeries.procedure_name.ilike(like)) | (surgeries.surgery_type.ilike(like)))
-    return q.order_by(surgeries.id.desc()).offset(offset).limit(limit).all()
+        q = q.filter(search_service.filter_clause("surgeries", search))
+    return paginate(q, surgeries.id, response, limit, offset=offset, cursor=cursor)
 
 
 @router.get("/{surgery_id}", response_model=SurgeryOut)
@@ -157,11 +196,18 @@ def update_surgery(surgery_id: int, payload: SurgeryUpdate, db: Session = Depend
     data = payload.model_dict(exclude_unset=True) if hasattr(payload, "model_dict") else payload.dict(exclude_unset=True)
     _validate_fks(db, data.get("patient_id"), data.get("doctor_id"), data.get("operating_room_id"))
 
-    for k, v in data.items():
-        setattr(obj, k, v)
+    with schedule_index.booking_lock:
+        # Recording actual times never conflicts; only (re)booking is checked
+        uncancelled = obj.status == SurgeryStatus.cancelled and data.get("status") not in (None, SurgeryStatus.cancelled)
+        if uncancelled or any(f in data for f in BOOKING_FIELDS if f != "status"):
+            booking = {f: data[f] if f in data else getattr(obj, f) for f in BOOKING_FIELDS}
+            _ensure_room_available(db, booking, exclude_id=obj.id)
 
-    db.add(obj)
-    db.commit()
+        for k, v in data.items():
+            setattr(obj, k, v)
+
+        db.add(obj)
+        db.commit()
     db.refresh(obj)
     return obj
 
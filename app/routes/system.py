@@ -0,0 +1,61 @@
+# app/routes/system.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..database import pool_metrics
+from ..services.model_registry import registry
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health():
+    """
+    Readiness of the model-backed services: 503 until the required ones are loaded,
+    then 200, "degraded" if an optional service failed to load.
+    """
+    ready = registry.is_ready()
+    if not ready:
+        status = "starting"
+    elif registry.is_degraded():
+        status = "degraded"
+    else:
+        status = "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": status, "models": registry.status()},
+    )
+
+
+@router.get("/transcription-workers")
+def transcription_workers():
+    """Queue depth and job counters for each Whisper inference worker."""
+    service = registry.peek("transcription")
+    if service is None:
+        return {"started": False, "workers": []}
+    return service.get_worker_metrics()
+
+
+@router.get("/analysis-client")
+def analysis_client():
+    """Concurrency, timeout/retry settings and circuit-breaker state of the LLM client."""
+    service = registry.peek("analysis")
+    if service is None:
+        return {"loaded": False}
+    return service.get_client_state()
+
+
+
+@router.get("/analysis-cache")
+def analysis_cache_stats():
+    """Hit/miss counters and size of the LLM analysis result cache."""
+    service = registry.peek("analysis")
+    if service is None:
+        return {"loaded": False}
+    return service.cache.stats()
+
+
+@router.get("/db-pool")
+def db_pool():
+    """Engine profile, connection pool occupancy and checkout wait times."""
+    return pool_metrics()
@@ -1,15 +1,19 @@
 # app/routes/transcriptions.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, HttpUrl, field_validator
 from typing import Optional, List
 from datetime import datetime
 
 from ..dependencies import get_db
+from ..pagination import paginate
+from ..services.search_service import search_service
 from ..models.transcription import transcriptions, TranscriptionStatus
 from ..models.doctor import doctors
 from ..models.patient import patients
 from ..models.note import notes  # only to check uniqueness if you later want to link via notes
+from ..models.transcription_segment import transcription_segments
+from ..schemas.transcription_segment import TranscriptionSegmentOut
 
 router = APIRouter()
 
@@ -91,9 +95,11 @@ def create_transcription(payload: TranscriptionCreate, db: Session = Depends(get
 
 @router.get("/", response_model=List[TranscriptionOut])
 def list_transcriptions(
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
     doctor_id: Optional[int] = Query(None),
     patient_id: Optional[int] = Query(None),
     status: Optional[TranscriptionStatus] = Query(None),
@@ -116,9 +122,8 @@ def list_transcriptions(
     if completed_to is not None:
         q = q.filter(transcriptions.completed_at <= completed_to)
     if search:
-        like = f"%{search}%"
-        q = q.filter(transcriptions.transcription_text.ilike(like))
-    return q.order_by(transcriptions.id.desc()).offset(offset).limit(limit).all()
+        q = q.filter(search_service.filter_clause("transcriptions", search))
+    return paginate(q, transcriptions.id, response, limit, offset=offset, cursor=cursor)
 
 
 @router.get("/{transcription_id}", response_model=TranscriptionOut)
@@ -129,6 +134,25 @@ def get_transcription(transcription_id: int, db: Session = Depends(get_db)):
     return obj
 
 
+@router.get("/{transcription_id}/segments", response_model=List[TranscriptionSegmentOut])
+def list_transcription_segments(
+    transcription_id: int,
+    db: Session = Depends(get_db),
+    after_seq: int = Query(-1, ge=-1, description="Only segments after this sequence number (for polling)"),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """Committed text of a transcription as it streams in; the full text is stored on completion."""
+    _exists_or_404(db, transcriptions, transcription_id, "Transcription")
+    return (
+        db.query(transcription_segments)
+        .filter(transcription_segments.transcription_id == transcription_id)
+        .filter(transcription_segments.seq > after_seq)
+        .order_by(transcription_segments.seq.asc())
+        .limit(limit)
+        .all()
+    )
+
+
 @router.patch("/{transcription_id}", response_model=TranscriptionOut)
 def update_transcription(transcription_id: int, payload: TranscriptionUpdate, db: Session = Depends(get_db)):
     obj = db.get(transcriptions, transcription_id)
@@ -1,27 +1,47 @@
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import os
 import json
+import asyncio
 import logging
 import base64
 from datetime import datetime
+from typing import Optional
 
-from ..dependencies import get_db
+from ..dependencies import get_async_db
 from ..models.transcription import transcriptions, TranscriptionStatus
 from ..models.patient import patients
-from ..services.audio_processor import AudioProcessor
-from ..services.transcription_service import TranscriptionService
-from ..services.analysis_service import AnalysisService
-from ..services.medical_ner import MedicalNER
+from ..services.audio_processor import AudioProcessor, ResampleStream
+from ..services.audio_frames import parse_audio_frame, CODEC_PCM_S16LE, CODEC_CONTAINER
+from ..services.streaming_transcriber import StreamingTranscriber
+from ..services.vad import VoiceActivityDetector
+from ..services.entity_accumulator import EntityAccumulator
+from ..services.transcript_writer import TranscriptWriter
+from ..services.model_registry import registry
+from ..services.job_queue import analysis_queue
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize services (singleton)
+# Lightweight services are module singletons; model-backed ones come from the registry
 audio_processor = AudioProcessor()
-transcription_service = TranscriptionService(model_size="base")
-analysis_service = AnalysisService()
-medical_ner = MedicalNER()
+
+# Keep raw chunks on disk for audit/replay; decoding never depends on these files
+ARCHIVE_AUDIO_CHUNKS = os.getenv("ARCHIVE_AUDIO_CHUNKS", "false").lower() in ("1", "true", "yes")
+
+# WebSocket subprotocol for the binary audio frame format (see services/audio_frames.py)
+BINARY_AUDIO_SUBPROTOCOL = "oros.audio.v1"
+
+# How long the socket stays open after the final chunk to stream the analysis back
+ANALYSIS_STREAM_WAIT_SECONDS = float(os.getenv("ANALYSIS_STREAM_WAIT_SECONDS", "120"))
+
+
+def _decode_audio(audio_bytes: bytes, codec: int, sample_rate: Optional[int], stream: ResampleStream, final: bool):
+    if codec == CODEC_PCM_S16LE:
+        return audio_processor.decode_pcm16(audio_bytes, sample_rate, stream=stream, final=final)
+    return audio_processor.decode_audio_bytes(audio_bytes, stream=stream, final=final)
 
 
 class ConnectionManager:
@@ -29,8 +49,8 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: dict[int, WebSocket] = {}
     
-    async def connect(self, transcription_id: int, websocket: WebSocket):
-        await websocket.accept()
+    async def connect(self, transcription_id: int, websocket: WebSocket, subprotocol: Optional[str] = None):
+        await websocket.accept(subprotocol=subprotocol)
         self.active_connections[transcription_id] = websocket
         logger.info(f"WebSocket connected for transcription {transcription_id}")
     
@@ -39,6 +59,9 @@ class ConnectionManager:
             del self.active_connections[transcription_id]
             logger.info(f"WebSocket disconnected for transcription {transcription_id}")
     
+    def is_connected(self, transcription_id: int) -> bool:
+        return transcription_id in self.active_connections
+    
     async def send_message(self, transcription_id: int, message: dict):
         if transcription_id in self.active_connections:
             websocket = self.active_connections[transcription_id]
@@ -56,13 +79,19 @@ manager = ConnectionManager()
 async def websocket_transcribe(
     websocket: WebSocket,
     transcription_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     
-    await manager.connect(transcription_id, websocket)
+    # Clients offering the binary subprotocol send raw audio frames instead of base64 JSON
+    binary_mode = BINARY_AUDIO_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await manager.connect(
+        transcription_id,
+        websocket,
+        subprotocol=BINARY_AUDIO_SUBPROTOCOL if binary_mode else None
+    )
     
     # Get transcription record
-    transcription_record = db.get(transcriptions, transcription_id)
+    transcription_record = await db.get(transcriptions, transcription_id)
     if not transcription_record:
         await websocket.send_json({
             "type": "error",
@@ -71,90 +100,162 @@ async def websocket_transcribe(
         await websocket.close()
         return
     
+    # Loads on first use if warm-up has not finished yet (off the event loop)
+    try:
+        transcription_service = await registry.aget("transcription")
+        medical_ner = await registry.aget("medical_ner")
+    except Exception as e:
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Transcription models unavailable: {str(e)}"
+        })
+        await websocket.close()
+        return
+    
     # Update status
     transcription_record.transcription_status = TranscriptionStatus.in_progress
-    db.commit()
+    await db.commit()
+    
+    # Committed text is persisted as coalesced, append-only segments
+    transcript_writer = TranscriptWriter(db, transcription_id)
+    await transcript_writer.start()
     
     accumulated_text = ""
-    chunk_paths = []
+    confidence = 0.0
+    archive_tasks = []
+    streamer = StreamingTranscriber(
+        transcription_service,
+        language=transcription_record.language or "en"
+    )
+    vad = VoiceActivityDetector()
+    # Frames of one recording are resampled as a continuous signal
+    resample_stream = ResampleStream(AudioProcessor.SAMPLE_RATE)
+    entity_accumulator = EntityAccumulator(medical_ner)
     
     try:
         while True:
-            # Receive message from client
-            data = await websocket.receive_json()
+            # Receive message from client: binary audio frame or JSON message
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            frame = None
+            if message.get("bytes") is not None:
+                if not binary_mode:
+                    raise ValueError(f"Binary frames require the '{BINARY_AUDIO_SUBPROTOCOL}' subprotocol")
+                frame = parse_audio_frame(message["bytes"])
+                data = {"type": "audio_chunk"}
+            else:
+                data = json.loads(message["text"])
             
             message_type = data.get("type")
             
             if message_type == "audio_chunk":
                 # Process audio chunk
-                chunk_data = data.get("data")  # Base64 encoded audio
-                chunk_index = data.get("chunk_index", 0)
-                is_final = data.get("is_final", False)
+                if frame is not None:
+                    chunk_index = frame.chunk_index
+                    is_final = frame.is_final
+                    audio_bytes = frame.payload
+                    codec, sample_rate = frame.codec, frame.sample_rate
+                else:
+                    chunk_data = data.get("data")  # Base64 encoded audio
+                    chunk_index = data.get("chunk_index", 0)
+                    is_final = data.get("is_final", False)
+                    audio_bytes = base64.b64decode(chunk_data)
+                    codec, sample_rate = CODEC_CONTAINER, None
+                
+                # Decode audio straight into a 16 kHz mono float32 buffer (no temp files)
+                audio = await asyncio.to_thread(_decode_audio, audio_bytes, codec, sample_rate, resample_stream, is_final)
                 
-                # Decode audio
-                audio_bytes = base64.b64decode(chunk_data)
+                # Optional raw chunk archival, off the hot path
+                if ARCHIVE_AUDIO_CHUNKS:
+                    archive_tasks.append(asyncio.create_task(
+                        audio_processor.archive_chunk_async(audio_bytes, transcription_id, chunk_index)
+                    ))
                 
-                # Save chunk
-                chunk_path = audio_processor.save_audio_chunk(
-                    audio_bytes,
-                    transcription_id,
-                    chunk_index
-                )
-                chunk_paths.append(chunk_path)
+                # Silent chunks never reach Whisper; speech is trimmed of leading/trailing silence
+                speech, speech_start = vad.process_chunk(audio)
                 
-                # Convert to WAV
-                wav_path = audio_processor.convert_to_wav(chunk_path)
+                # Re-decode only the unstable tail of the rolling buffer on the inference pool;
+                # speech_start lets segment times be reported in recording time, not speech time
+                if speech is not None:
+                    streamer.insert_audio(speech, audio_start=speech_start)
+                    result = await streamer.process()
+                else:
+                    result = streamer.process_skipped()
                 
-                # Transcribe chunk
-                result = transcription_service.transcribe_realtime_chunk(
-                    wav_path,
-                    language=transcription_record.language or "en",
-                    previous_context=accumulated_text
-                )
+                if result["success"] and is_final:
+                    # Nothing more is coming: the pending hypothesis becomes final
+                    final = streamer.finish()
+                    result["committed"] = " ".join(t for t in (result["committed"], final["committed"]) if t)
+                    result.update(
+                        partial=final["partial"],
+                        committed_text=final["committed_text"],
+                        committed_start=result.get("committed_start") if result.get("committed_start") is not None else final["committed_start"],
+                        committed_end=final["committed_end"] if final["committed_end"] is not None else result.get("committed_end")
+                    )
                 
                 if result["success"]:
-                    chunk_text = result["text"]
-                    accumulated_text += " " + chunk_text
+                    chunk_text = result["committed"]
+                    accumulated_text = result["committed_text"]
+                    if result.get("confidence") is not None:
+                        confidence = result["confidence"]
                     
-                    # Extract entities
-                    entities = medical_ner.extract_entities(chunk_text)
+                    # Extract entities from the new text only (offsets are into full_text)
+                    entities = entity_accumulator.add_chunk(chunk_text)
                     
-                    # Send update to client
+                    # Send update to client: newly committed words plus the still-unstable tail
                     await manager.send_message(transcription_id, {
                         "type": "transcription_update",
                         "text": chunk_text,
-                        "full_text": accumulated_text.strip(),
+                        "committed": chunk_text,
+                        "partial": result["partial"],
+                        "full_text": accumulated_text,
                         "is_partial": not is_final,
                         "chunk_index": chunk_index,
                         "entities": entities,
-                        "confidence": result.get("confidence", 0.0)
+                        "confidence": confidence
                     })
                     
-                    # Update database
-                    transcription_record.transcription_text = accumulated_text.strip()
-                    transcription_record.confidence_score = result.get("confidence")
-                    db.commit()
+                    # Buffer the new text; it reaches the database in batched commits
+                    transcript_writer.add(
+                        chunk_text,
+                        chunk_index=chunk_index,
+                        start_seconds=result.get("committed_start"),
+                        end_seconds=result.get("committed_end"),
+                        confidence=result.get("confidence")
+                    )
+                    if not is_final:
+                        await transcript_writer.maybe_flush(transcription_record)
                 
                 # If final chunk, process complete transcription
                 if is_final:
-                    await process_final_transcription(
+                    await transcript_writer.materialize(transcription_record)
+                    job = await process_final_transcription(
                         transcription_record,
-                        accumulated_text.strip(),
-                        chunk_paths,
+                        accumulated_text,
                         db,
-                        transcription_id
+                        transcription_id,
+                        speech_stats=vad.get_stats(),
+                        entities=entity_accumulator.entities()
                     )
+                    await wait_for_analysis(websocket, job.id)
                     break
             
             elif message_type == "cancel":
                 # User cancelled recording
+                await transcript_writer.materialize(transcription_record)
                 transcription_record.transcription_status = TranscriptionStatus.failed
-                db.commit()
+                await db.commit()
                 break
     
     except WebSocketDisconnect:
         logger.info(f"Client disconnected from transcription {transcription_id}")
         manager.disconnect(transcription_id)
+        
+        # Keep what was transcribed so far
+        await transcript_writer.materialize(transcription_record)
+        await db.commit()
     
     except Exception as e:
         logger.error(f"Error in WebSocket: {str(e)}")
@@ -162,27 +263,33 @@ async def websocket_transcribe(
             "type": "error",
             "message": str(e)
         })
+        await db.rollback()
+        await transcript_writer.materialize(transcription_record)
         transcription_record.transcription_status = TranscriptionStatus.failed
-        db.commit()
+        await db.commit()
     
     finally:
-        # Cleanup
-        audio_processor.cleanup_chunks(chunk_paths)
+        logger.info(f"Transcription {transcription_id} speech stats: {vad.get_stats()}")
+        
+        # Let pending archival writes land before the session goes away
+        if archive_tasks:
+            await asyncio.gather(*archive_tasks, return_exceptions=True)
         manager.disconnect(transcription_id)
 
 
 async def process_final_transcription(
     transcription_record: transcriptions,
     full_text: str,
-    chunk_paths: list,
-    db: Session,
-    transcription_id: int
+    db: AsyncSession,
+    transcription_id: int,
+    speech_stats: Optional[dict] = None,
+    entities: Optional[dict] = None
 ):
     
     # Send status
     await manager.send_message(transcription_id, {
         "type": "status",
-        "message": "Analyzing..."
+        "message": "Queued for analysis"
     })
     
     # Get patient and previous notes context
@@ -190,17 +297,18 @@ async def process_final_transcription(
     previous_notes = []
     
     if transcription_record.patient_id:
-        patient = db.get(patients, transcription_record.patient_id)
+        patient = await db.get(patients, transcription_record.patient_id)
         
         # Get previous notes
         from ..models.note import notes
         previous_notes = (
-            db.query(notes)
-            .filter(notes.patient_id == transcription_record.patient_id)
-            .order_by(notes.created_at.desc())
-            .limit(5)
-            .all()
-        )
+            await db.execute(
+                select(notes)
+                .where(notes.patient_id == transcription_record.patient_id)
+                .order_by(notes.created_at.desc())
+                .limit(5)
+            )
+        ).scalars().all()
     
     # Prepare patient info
     patient_info = {}
@@ -223,50 +331,64 @@ async def process_final_transcription(
         for note in previous_notes
     ]
     
-    # Run analysis
-    analysis_result = analysis_service.analyze_transcription(
-        full_text,
-        patient_info,
-        previous_notes_data,
-        context=None
-    )
+    # Queue the analysis; it survives the socket closing and is retried on failure
+    job = await analysis_queue.enqueue_async(db, transcription_id, {
+        "transcription_text": full_text,
+        "patient_info": patient_info,
+        "previous_notes": previous_notes_data,
+        "context": None
+    })
     
-    # Extract all entities
-    all_entities = medical_ner.extract_entities(full_text)
+    # Entities were accumulated chunk by chunk; only reparse when none were passed in
+    if entities is None:
+        medical_ner = await registry.aget("medical_ner")
+        entities = medical_ner.extract_entities(full_text)
     
-    if analysis_result["success"]:
-        # Store analysis
-        from ..models.note_analysis import note_analysis, AnalysisStatus
-        
-        analysis_record = note_analysis(
-            transcription_id=transcription_id,
-            analysis=analysis_result.get("analysis"),
-            keywords=",".join(analysis_result.get("keywords", [])),
-            summary=analysis_result.get("summary"),
-            concerns_identified=json.dumps(analysis_result.get("concerns_identified", [])),
-            urgency_level=analysis_result.get("urgency_level", 1),
-            analysis_status=AnalysisStatus.completed
-        )
-        
-        db.add(analysis_record)
-        
-        # Send analysis to client
-        await manager.send_message(transcription_id, {
-            "type": "analysis_complete",
-            "analysis": analysis_result,
-            "entities": all_entities
-        })
+    await manager.send_message(transcription_id, {
+        "type": "analysis_queued",
+        "job_id": job.id,
+        "note_analysis_id": job.note_analysis_id,
+        "entities": entities
+    })
     
     # Update transcription status
     transcription_record.transcription_status = TranscriptionStatus.completed
     transcription_record.completed_at = datetime.utcnow()
     
-    db.commit()
+    await db.commit()
     
     # Send completion message
     await manager.send_message(transcription_id, {
         "type": "complete",
-        "message": "Transcription and analysis complete",
-        "transcription_id": transcription_id
+        "message": "Transcription complete; analysis queued",
+        "transcription_id": transcription_id,
+        "analysis_job_id": job.id,
+        "speech_stats": speech_stats
     })
+    
+    return job
+
+
+async def wait_for_analysis(websocket: WebSocket, job_id: int):
+    """
+    Keep the socket open while the queued analysis runs so its analysis_partial and
+    analysis_complete messages (sent by the queue's notify hook) reach the client.
+    Returns early if the client goes away; the job itself is unaffected.
+    """
+    done = analysis_queue.watch(job_id)
+    receiver = asyncio.create_task(_until_disconnect(websocket))
+    try:
+        await asyncio.wait(
+            {done, receiver},
+            timeout=ANALYSIS_STREAM_WAIT_SECONDS,
+            return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        receiver.cancel()
+        analysis_queue.unwatch(job_id, done)
+
+
+async def _until_disconnect(websocket: WebSocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
 
@@ -7,3 +7,5 @@ from .transcription import TranscriptionCreate, TranscriptionUpdate, Transcripti
 from .note import NoteCreate, NoteUpdate, NoteOut
 from .note_analysis import NoteAnalysisCreate, NoteAnalysisUpdate, NoteAnalysisOut
 from .notification import NotificationCreate, NotificationUpdate, NotificationOut
+from .analysis_job import AnalysisJobOut
+from .transcription_segment import TranscriptionSegmentOut
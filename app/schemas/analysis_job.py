@@ -0,0 +1,16 @@
+from typing import Optional
+from datetime import datetime
+from ..models.analysis_job import JobStatus
+from .common import ORMBase, WithTimestamps
+
+
+class AnalysisJobOut(ORMBase, WithTimestamps):
+    id: int
+    transcription_id: Optional[int] = None
+    note_analysis_id: Optional[int] = None
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    available_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
@@ -0,0 +1,13 @@
+from typing import Optional
+from .common import ORMBase, WithTimestamps
+
+
+class TranscriptionSegmentOut(ORMBase, WithTimestamps):
+    id: int
+    transcription_id: int
+    seq: int
+    chunk_index: Optional[int] = None
+    text: str
+    start_seconds: Optional[float] = None
+    end_seconds: Optional[float] = None
+    confidence: Optional[float] = None
@@ -0,0 +1,126 @@
+
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from ..database import SessionLocal
+from ..models.analysis_cache import analysis_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache for LLM analysis results.
+
+    Tier 1 is an in-process LRU, tier 2 the `analysis_cache` table (shared across
+    workers and restarts). Entries expire after `ttl_seconds` in both tiers.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_entries: int = 512, ttl_seconds: int = 86400):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.ttl = timedelta(seconds=ttl_seconds)
+
+        self._entries: "OrderedDict[str, Tuple[datetime, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0, "bypassed": 0}
+
+    @staticmethod
+    def make_key(system_prompt: str, prompt: str, model: str, temperature: float) -> str:
+        material = json.dumps([system_prompt, prompt, model, temperature], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = datetime.utcnow()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return dict(result)
+                del self._entries[key]
+
+        try:
+            with self.session_factory() as db:
+                row = db.get(analysis_cache, key)
+                if row is None or row.expires_at <= now:
+                    result = None
+                else:
+                    row.hit_count = (row.hit_count or 0) + 1
+                    result = json.loads(row.result)
+                    expires_at = row.expires_at
+                    db.commit()
+        except Exception as e:
+            logger.warning(f"Analysis cache lookup failed: {str(e)}")
+            result = None
+
+        with self._lock:
+            if result is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["db_hits"] += 1
+            self._remember(key, expires_at, result)
+        return dict(result)
+
+    def put(self, key: str, result: Dict, model: str, temperature: float):
+        expires_at = datetime.utcnow() + self.ttl
+
+        with self._lock:
+            self._remember(key, expires_at, result)
+            self._counters["writes"] += 1
+
+        try:
+            with self.session_factory() as db:
+                db.merge(analysis_cache(
+                    cache_key=key,
+                    model=model,
+                    temperature=temperature,
+                    result=json.dumps(result),
+                    expires_at=expires_at,
+                    hit_count=0
+                ))
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Analysis cache write failed: {str(e)}")
+
+    def record_bypass(self):
+        with self._lock:
+            self._counters["bypassed"] += 1
+
+    def purge_expired(self) -> int:
+        with self.session_factory() as db:
+            deleted = (
+                db.query(analysis_cache)
+                .filter(analysis_cache.expires_at <= datetime.utcnow())
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+        return deleted
+
+    def _remember(self, key: str, expires_at: datetime, result: Dict):
+        self._entries[key] = (expires_at, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["db_hits"]
+        return {
+            **counters,
+            "memory_entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": int(self.ttl.total_seconds()),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
@@ -1,73 +1,206 @@
 
 import os
 import json
+import random
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from groq import Groq
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import groq
+from groq import Groq, AsyncGroq
 from datetime import datetime
 
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .analysis_cache import AnalysisCache
+from .json_stream import IncrementalJSONObject
+from .prompt_builder import PromptBuilder, count_tokens, split_into_chunks, truncate_to_tokens
+
 logger = logging.getLogger(__name__)
 
+# Failures worth another attempt: network errors/timeouts, rate limiting, 5xx
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    groq.APIConnectionError,
+    groq.RateLimitError,
+    groq.InternalServerError,
+)
+
+# Streamed JSON keys -> result keys, for analysis_partial messages
+PARTIAL_FIELDS = {
+    "summary": "summary",
+    "keywords": "keywords",
+    "concerns": "concerns_identified",
+    "urgency_level": "urgency_level",
+    "analysis": "analysis",
+}
+
+PartialCallback = Callable[[str, Any], Awaitable[None]]
+
+
+def _emit_once_per_field(on_partial: PartialCallback) -> PartialCallback:
+    """A retried stream starts from the beginning; fields the client already has are not sent again."""
+    emitted = set()
+
+    async def emit(field: str, value):
+        if field in emitted:
+            return
+        emitted.add(field)
+        await on_partial(field, value)
+
+    return emit
+
+
+# Map step of map-reduce analysis: condense one segment of a long encounter
+MAP_SYSTEM_PROMPT = """You condense one segment of a long medical encounter transcription so it can be analyzed together with the other segments.
+
+Respond in valid JSON format with these exact keys:
+{
+    "summary": "clinically relevant content of this segment in 2-4 sentences",
+    "keywords": ["keyword1", "keyword2", ...],
+    "concerns": ["concern1", "concern2", ...]
+}
+
+Keep medications, doses, vital signs, lab values and findings verbatim."""
+MAP_MAX_TOKENS = 400
+
+# Token allowance of the most recent previous note; each older note gets half of the one before
+NOTE_TOKENS = 300
+HISTORY_TOKENS = 600
+
 class AnalysisService:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        self.client = Groq(api_key=self.api_key)
+        # GROQ_BASE_URL points both clients at another server speaking the same
+        # API (e.g. a local stub serving /openai/v1/chat/completions)
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL")
+        
+        self.client = Groq(api_key=self.api_key, base_url=self.base_url)
         self.model = "llama-3.3-70b-versatile" 
+        self.temperature = 0.3  # Lower for medical accuracy
+        self.max_tokens = 2000
+        
+        # Async path: bounded concurrency, per-call timeout, jittered retries, circuit breaker
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        self.timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.backoff_base = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+        self.backoff_max = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+        
+        # Retries are ours, so the SDK's own retry loop is disabled
+        self.async_client = AsyncGroq(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Identical prompt + model settings -> identical analysis, so repeats are served locally
+        self.cache = AnalysisCache(
+            max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "512")),
+            ttl_seconds=int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+        )
+        
+        # Prompt size control: LLM latency and cost grow with prompt tokens
+        self.prompt_token_budget = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "6000"))
+        self.map_reduce_threshold = int(os.getenv("LLM_MAP_REDUCE_THRESHOLD_TOKENS", "4000"))
+        self.map_chunk_tokens = int(os.getenv("LLM_MAP_CHUNK_TOKENS", "1500"))
     
     def analyze_transcription(
         self,
         transcription_text: str,
         patient_info: Dict,
         previous_notes: List[Dict],
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict:
-        # Build comprehensive prompt
-        prompt = self._build_analysis_prompt(
-            transcription_text,
-            patient_info,
-            previous_notes,
-            context
-        )
-        
         try:
             start_time = datetime.now()
             
-            # Call Groq API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,  # Lower for medical accuracy
-                max_tokens=2000,
-                response_format={"type": "json_object"}  # Structured output
+            # Very long encounters are condensed segment by segment first (map step)
+            if count_tokens(transcription_text) > self.map_reduce_threshold:
+                transcription_text = self._condense_transcription(transcription_text, use_cache)
+            
+            # Build comprehensive prompt
+            prompt = self._build_analysis_prompt(
+                transcription_text,
+                patient_info,
+                previous_notes,
+                context
             )
+            cache_key = self._cache_key(prompt)
+            
+            if use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return self._from_cache(cached, start_time)
+            else:
+                self.cache.record_bypass()
+            
+            # Call Groq API
+            response = self.client.chat.completions.create(**self._completion_kwargs(prompt))
             
             duration = (datetime.now() - start_time).total_seconds()
             
-            # Parse response
-            result = json.loads(response.choices[0].message.content)
+            result = self._parse_response(response.choices[0].message.content, duration)
+            self.cache.put(cache_key, result, self.model, self.temperature)
+            return result
             
+        except Exception as e:
+            logger.error(f"Analysis failed: {str(e)}")
             return {
-                "success": True,
-                "analysis": result.get("analysis", ""),
-                "summary": result.get("summary", ""),
-                "keywords": result.get("keywords", []),
-                "concerns_identified": result.get("concerns", []),
-                "urgency_level": result.get("urgency_level", 1),
-                "processing_time": duration,
-                "model_used": self.model
+                "success": False,
+                "error": str(e)
             }
+    
+    async def analyze_transcription_async(
+        self,
+        transcription_text: str,
+        patient_info: Dict,
+        previous_notes: List[Dict],
+        context: Optional[str] = None,
+        use_cache: bool = True,
+        on_partial: Optional[PartialCallback] = None
+    ) -> Dict:
+        """
+        Non-blocking analyze_transcription for use from the event loop.
+
+        With `on_partial`, the completion is streamed and `on_partial(field, value)`
+        is awaited as each field of the JSON answer completes (summary first).
+        """
+        try:
+            start_time = datetime.now()
+            
+            # Very long encounters are condensed segment by segment first (map step)
+            if count_tokens(transcription_text) > self.map_reduce_threshold:
+                transcription_text = await self._condense_transcription_async(transcription_text, use_cache)
+            
+            prompt = self._build_analysis_prompt(
+                transcription_text,
+                patient_info,
+                previous_notes,
+                context
+            )
+            cache_key = self._cache_key(prompt)
+            
+            if use_cache:
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached is not None:
+                    if on_partial is not None:
+                        for field in PARTIAL_FIELDS.values():
+                            await on_partial(field, cached.get(field))
+                    return self._from_cache(cached, start_time)
+            else:
+                self.cache.record_bypass()
+            
+            content = await self._complete_with_retries(prompt, on_partial)
+            
+            duration = (datetime.now() - start_time).total_seconds()
+            
+            result = self._parse_response(content, duration)
+            await asyncio.to_thread(self.cache.put, cache_key, result, self.model, self.temperature)
+            return result
             
         except Exception as e:
             logger.error(f"Analysis failed: {str(e)}")
@@ -76,6 +209,194 @@ class AnalysisService:
                 "error": str(e)
             }
     
+    async def _complete_with_retries(
+        self,
+        prompt: str,
+        on_partial: Optional[PartialCallback] = None,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if on_partial is not None:
+            on_partial = _emit_once_per_field(on_partial)
+        
+        attempt = 0
+        while True:
+            self.breaker.check()
+            outcome_recorded = False
+            try:
+                async with self._semaphore:
+                    if on_partial is not None:
+                        content = await asyncio.wait_for(
+                            self._stream_completion(prompt, on_partial),
+                            timeout=self.timeout
+                        )
+                    else:
+                        response = await asyncio.wait_for(
+                            self.async_client.chat.completions.create(
+                                **self._completion_kwargs(prompt, system_prompt=system_prompt, max_tokens=max_tokens)
+                            ),
+                            timeout=self.timeout
+                        )
+                        content = response.choices[0].message.content
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                outcome_recorded = True
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                logger.warning(f"LLM call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except CircuitOpenError:
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                outcome_recorded = True
+                raise
+            else:
+                self.breaker.record_success()
+                outcome_recorded = True
+            finally:
+                # Cancelled (or any BaseException): a half-open trial must not stay in flight forever
+                if not outcome_recorded:
+                    self.breaker.release_trial()
+            return content
+    
+    async def _stream_completion(self, prompt: str, on_partial: PartialCallback) -> str:
+        # JSON mode is not available for streamed completions; the system prompt
+        # already asks for a bare JSON object, and the parser skips anything around it
+        kwargs = self._completion_kwargs(prompt, stream=True)
+        stream = await self.async_client.chat.completions.create(**kwargs)
+        
+        parser = IncrementalJSONObject()
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            for key, value in parser.feed(delta):
+                if key in PARTIAL_FIELDS:
+                    await on_partial(PARTIAL_FIELDS[key], value)
+        
+        if parser.fields:
+            return json.dumps(parser.fields)
+        return parser.text
+    
+    def _completion_kwargs(
+        self,
+        prompt: str,
+        stream: bool = False,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> Dict:
+        kwargs = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": system_prompt or self._get_system_prompt()
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": self.temperature,
+            "max_tokens": max_tokens or self.max_tokens
+        }
+        if stream:
+            kwargs["stream"] = True
+        else:
+            kwargs["response_format"] = {"type": "json_object"}  # Structured output
+        return kwargs
+    
+    def _condense_transcription(self, transcription: str, use_cache: bool) -> str:
+        segments = []
+        chunks = split_into_chunks(transcription, self.map_chunk_tokens)
+        for index, chunk in enumerate(chunks, 1):
+            prompt = self._build_map_prompt(chunk, index, len(chunks))
+            cache_key = AnalysisCache.make_key(MAP_SYSTEM_PROMPT, prompt, self.model, self.temperature)
+            segment = self.cache.get(cache_key) if use_cache else None
+            if segment is None:
+                response = self.client.chat.completions.create(
+                    **self._completion_kwargs(prompt, system_prompt=MAP_SYSTEM_PROMPT, max_tokens=MAP_MAX_TOKENS)
+                )
+                segment = json.loads(response.choices[0].message.content)
+                self.cache.put(cache_key, segment, self.model, self.temperature)
+            segments.append(segment)
+        return self._reduce_segments(segments)
+    
+    async def _condense_transcription_async(self, transcription: str, use_cache: bool) -> str:
+        chunks = split_into_chunks(transcription, self.map_chunk_tokens)
+        
+        async def condense(index: int, chunk: str) -> Dict:
+            prompt = self._build_map_prompt(chunk, index, len(chunks))
+            cache_key = AnalysisCache.make_key(MAP_SYSTEM_PROMPT, prompt, self.model, self.temperature)
+            if use_cache:
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached is not None:
+                    return cached
+            content = await self._complete_with_retries(
+                prompt, system_prompt=MAP_SYSTEM_PROMPT, max_tokens=MAP_MAX_TOKENS
+            )
+            segment = json.loads(content)
+            await asyncio.to_thread(self.cache.put, cache_key, segment, self.model, self.temperature)
+            return segment
+        
+        # Segments are independent; the client semaphore bounds how many run at once
+        segments = await asyncio.gather(*(condense(i, chunk) for i, chunk in enumerate(chunks, 1)))
+        logger.info(f"Condensed {count_tokens(transcription)}-token transcription from {len(chunks)} segments")
+        return self._reduce_segments(segments)
+    
+    def _build_map_prompt(self, chunk: str, index: int, total: int) -> str:
+        return f"SEGMENT {index} OF {total}\n{chunk}"
+    
+    def _reduce_segments(self, segments: List[Dict]) -> str:
+        parts = [f"(Condensed from {len(segments)} consecutive segments of a long encounter)"]
+        for index, segment in enumerate(segments, 1):
+            parts.append(f"\nSegment {index}: {segment.get('summary', '')}")
+            if segment.get("keywords"):
+                parts.append(f"Keywords: {', '.join(segment['keywords'])}")
+            if segment.get("concerns"):
+                parts.append(f"Concerns: {'; '.join(segment['concerns'])}")
+        return "\n".join(parts)
+    
+    def _parse_response(self, content: str, duration: float) -> Dict:
+        result = json.loads(content)
+        
+        return {
+            "success": True,
+            "analysis": result.get("analysis", ""),
+            "summary": result.get("summary", ""),
+            "keywords": result.get("keywords", []),
+            "concerns_identified": result.get("concerns", []),
+            "urgency_level": result.get("urgency_level", 1),
+            "processing_time": duration,
+            "model_used": self.model
+        }
+    
+    def _cache_key(self, prompt: str) -> str:
+        return AnalysisCache.make_key(self._get_system_prompt(), prompt, self.model, self.temperature)
+    
+    def _from_cache(self, cached: Dict, start_time: datetime) -> Dict:
+        cached["cached"] = True
+        cached["processing_time"] = (datetime.now() - start_time).total_seconds()
+        return cached
+    
+    def get_client_state(self) -> Dict:
+        return {
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "max_retries": self.max_retries,
+            "circuit_breaker": self.breaker.get_state()
+        }
+    
     def _get_system_prompt(self) -> str:
         return """You are an expert medical AI assistant helping doctors analyze patient encounters.
 
@@ -85,13 +406,13 @@ Your task is to:
 3. Identify any concerns or risks that need attention
 4. Assess urgency level (1-5, where 5 is most urgent)
 
-Always respond in valid JSON format with these exact keys:
+Always respond in valid JSON format with these exact keys, in this order:
 {
-    "analysis": "detailed analysis of the medical encounter",
     "summary": "concise 2-3 sentence summary",
     "keywords": ["keyword1", "keyword2", ...],
     "concerns": ["concern1", "concern2", ...],
-    "urgency_level": 1-5
+    "urgency_level": 1-5,
+    "analysis": "detailed analysis of the medical encounter"
 }
 
 Be thorough but concise. Focus on clinically relevant information."""
@@ -103,39 +424,49 @@ Be thorough but concise. Focus on clinically relevant information."""
         previous_notes: List[Dict],
         context: Optional[str]
     ) -> str:
+        """
+        Assemble the analysis prompt within `prompt_token_budget`.
         
-        prompt_parts = []
+        Patient identity, allergies, the encounter and the instruction are always
+        included; additional context, medical history and previous notes (newest
+        first, older ones given progressively less room) fill what is left.
+        """
+        builder = PromptBuilder(self.prompt_token_budget)
         
         # Patient background
-        prompt_parts.append("PATIENT INFORMATION")
-        prompt_parts.append(f"Name: {patient_info.get('first_name', '')} {patient_info.get('last_name', '')}")
+        patient_lines = [f"Name: {patient_info.get('first_name', '')} {patient_info.get('last_name', '')}"]
         if patient_info.get('date_of_birth'):
-            prompt_parts.append(f"DOB: {patient_info['date_of_birth']}")
+            patient_lines.append(f"DOB: {patient_info['date_of_birth']}")
         if patient_info.get('gender'):
-            prompt_parts.append(f"Gender: {patient_info['gender']}")
+            patient_lines.append(f"Gender: {patient_info['gender']}")
         if patient_info.get('allergies'):
-            prompt_parts.append(f"Allergies: {patient_info['allergies']}")
+            patient_lines.append(f"Allergies: {patient_info['allergies']}")
+        builder.add("PATIENT INFORMATION", "\n".join(patient_lines), priority=0, required=True)
+        
         if patient_info.get('medical_history'):
-            prompt_parts.append(f"Medical History: {patient_info['medical_history']}")
+            builder.add("MEDICAL HISTORY", truncate_to_tokens(patient_info['medical_history'], HISTORY_TOKENS), priority=2)
         
         # Previous notes context
-        if previous_notes:
-            prompt_parts.append("\nPREVIOUS NOTES (Most Recent)")
-            for i, note in enumerate(previous_notes[:3], 1):  # Last 3 notes
-                prompt_parts.append(f"\nNote {i} ({note.get('created_at', 'N/A')}):")
-                prompt_parts.append(note.get('content', '')[:500])  # First 500 chars
+        for i, note in enumerate(previous_notes[:3]):
+            builder.add(
+                f"PREVIOUS NOTE {i + 1} ({note.get('created_at', 'N/A')})",
+                truncate_to_tokens(note.get('content', ''), NOTE_TOKENS >> i),
+                priority=3 + i
+            )
         
         # Current transcription
-        prompt_parts.append("\nCURRENT ENCOUNTER TRANSCRIPTION")
-        prompt_parts.append(transcription)
+        builder.add("CURRENT ENCOUNTER TRANSCRIPTION", transcription, priority=0, required=True)
         
         # Additional context
         if context:
-            prompt_parts.append(f"\nADDITIONAL CONTEXT")
-            prompt_parts.append(context)
+            builder.add("ADDITIONAL CONTEXT", context, priority=1)
         
-        prompt_parts.append("\nINSTRUCTION")
-        prompt_parts.append("Analyze the current encounter in context of the patient's history and previous notes. Provide structured analysis in JSON format.")
+        builder.add(
+            "INSTRUCTION",
+            "Analyze the current encounter in context of the patient's history and previous notes. Provide structured analysis in JSON format.",
+            priority=0,
+            required=True
+        )
         
-        return "\n".join(prompt_parts)
+        return builder.build()
 
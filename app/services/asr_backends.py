@@ -0,0 +1,233 @@
+
+import os
+import logging
+from typing import Dict, List, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ASRBackend:
+    """
+    Speech recognition engine used by TranscriptionService and the inference workers.
+
+    `transcribe` returns an openai-whisper style result:
+    {"text", "language", "segments": [{"start", "end", "text", "no_speech_prob", "words"?}]}
+
+    `shares_weights` is True when the weights are file-backed and read-only, so
+    several inference processes share one copy through the page cache.
+    """
+
+    name = "base"
+    shares_weights = False
+
+    def __init__(self, model_size: str = "base", device: str = "cpu"):
+        self.model_size = model_size
+        self.device = device
+
+    def transcribe(self, audio: Union[str, np.ndarray], **options) -> Dict:
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: List[np.ndarray], language: str = "en", task: str = "transcribe") -> List[Dict]:
+        """Decode several <=30 s buffers; engines without batching fall back to a loop."""
+        return [
+            self.transcribe(audio, language=language, task=task, fp16=False, verbose=False)
+            for audio in audios
+        ]
+
+
+def _load_whisper_mmap(model_size: str):
+    """
+    openai-whisper model on CPU with its parameters mmap-ed from the checkpoint.
+
+    whisper.load_model reads the checkpoint into private fp32 tensors in every
+    process. Here the fp16 tensors stay file-backed (MAP_PRIVATE, never written
+    by inference), so all workers share one copy in the page cache; whisper's
+    Linear/Conv1d/LayerNorm cast weights to the input dtype in forward.
+    """
+    import torch
+    import whisper
+    from whisper.model import ModelDims, Whisper
+
+    alignment_heads = None
+    if model_size in whisper._MODELS:
+        default_root = os.path.join(os.path.expanduser("~"), ".cache")
+        download_root = os.path.join(os.getenv("XDG_CACHE_HOME", default_root), "whisper")
+        checkpoint_file = whisper._download(whisper._MODELS[model_size], download_root, False)
+        alignment_heads = whisper._ALIGNMENT_HEADS[model_size]
+    elif os.path.isfile(model_size):
+        checkpoint_file = model_size
+    else:
+        raise RuntimeError(f"Model {model_size} not found; available models = {whisper.available_models()}")
+
+    checkpoint = torch.load(checkpoint_file, map_location="cpu", mmap=True, weights_only=True)
+    model = Whisper(ModelDims(**checkpoint["dims"]))
+    # assign=True keeps the mmap-backed tensors instead of copying into fresh ones
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+    if alignment_heads is not None:
+        model.set_alignment_heads(alignment_heads)
+    return model.eval()
+
+
+class WhisperBackend(ASRBackend):
+    """Reference openai-whisper model (fp32 compute on CPU, weights shared via mmap)."""
+
+    name = "whisper"
+    shares_weights = True
+
+    def __init__(self, model_size: str = "base", device: str = "cpu"):
+        super().__init__(model_size, device)
+        self.model = self._load_model(model_size, device)
+
+    def _load_model(self, model_size: str, device: str):
+        if device == "cpu":
+            return _load_whisper_mmap(model_size)
+
+        import whisper
+
+        return whisper.load_model(model_size, device=device)
+
+    def transcribe(self, audio: Union[str, np.ndarray], **options) -> Dict:
+        return self.model.transcribe(audio, **options)
+
+    def transcribe_batch(self, audios: List[np.ndarray], language: str = "en", task: str = "transcribe") -> List[Dict]:
+        """One padded mel batch through a single encoder/decoder pass (whisper.decode)."""
+        import torch
+        import whisper
+
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(torch.from_numpy(audio)),
+                n_mels=self.model.dims.n_mels
+            )
+            for audio in audios
+        ]).to(self.model.device)
+
+        options = whisper.DecodingOptions(
+            language=language,
+            task=task,
+            fp16=False,
+            without_timestamps=True
+        )
+        decoded = whisper.decode(self.model, mels, options)
+
+        results = []
+        for audio, item in zip(audios, decoded):
+            results.append({
+                "text": item.text,
+                "language": item.language or language,
+                "segments": [{
+                    "id": 0,
+                    "start": 0.0,
+                    "end": audio.size / whisper.audio.SAMPLE_RATE,
+                    "text": item.text,
+                    "avg_logprob": item.avg_logprob,
+                    "no_speech_prob": item.no_speech_prob
+                }]
+            })
+        return results
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """
+    openai-whisper with torch dynamic int8 quantization of all Linear layers (CPU only).
+
+    Quantization writes new packed weights in each process, so they cannot be shared.
+    """
+
+    name = "whisper-int8"
+    shares_weights = False
+
+    def __init__(self, model_size: str = "base", device: str = "cpu"):
+        super().__init__(model_size, "cpu")
+        import torch
+        import whisper
+
+        # whisper.model.Linear only adds a dtype cast in forward; quantize_dynamic
+        # matches exact types, so expose those layers as plain nn.Linear first.
+        for module in self.model.modules():
+            if type(module) is whisper.model.Linear:
+                module.__class__ = torch.nn.Linear
+
+        self.model = torch.quantization.quantize_dynamic(
+            self.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    def _load_model(self, model_size: str, device: str):
+        # Plain nn.Linear does not cast, so quantize from private fp32 weights
+        import whisper
+
+        return whisper.load_model(model_size, device=device)
+
+    def transcribe(self, audio: Union[str, np.ndarray], **options) -> Dict:
+        options["fp16"] = False
+        return self.model.transcribe(audio, **options)
+
+
+class FasterWhisperBackend(ASRBackend):
+    """CTranslate2 (faster-whisper) model, int8 on CPU by default. Weights are per process."""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str = "base", device: str = "cpu"):
+        super().__init__(model_size, device)
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImportError("ASR backend 'faster-whisper' requires the faster-whisper package")
+
+        self.compute_type = os.getenv("ASR_COMPUTE_TYPE", "int8" if device == "cpu" else "float16")
+        self.model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=self.compute_type,
+            cpu_threads=int(os.getenv("ASR_CPU_THREADS", "0"))
+        )
+
+    def transcribe(self, audio: Union[str, np.ndarray], **options) -> Dict:
+        segments, info = self.model.transcribe(
+            audio,
+            language=options.get("language"),
+            task=options.get("task", "transcribe"),
+            initial_prompt=options.get("initial_prompt"),
+            word_timestamps=options.get("word_timestamps", False),
+            beam_size=options.get("beam_size", 5)
+        )
+
+        result_segments = []
+        for segment in segments:
+            item = {
+                "id": segment.id,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "avg_logprob": segment.avg_logprob,
+                "no_speech_prob": segment.no_speech_prob
+            }
+            if segment.words:
+                item["words"] = [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in segment.words
+                ]
+            result_segments.append(item)
+
+        return {
+            "text": "".join(s["text"] for s in result_segments),
+            "segments": result_segments,
+            "language": info.language
+        }
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    QuantizedWhisperBackend.name: QuantizedWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def load_backend(name: str, model_size: str = "base", device: str = "cpu") -> ASRBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}'. Available: {', '.join(BACKENDS)}")
+
+    logger.info(f"Loading ASR backend '{name}' ({model_size}) on {device}")
+    return BACKENDS[name](model_size, device)
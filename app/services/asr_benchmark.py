@@ -0,0 +1,252 @@
+
+"""
+Compare ASR backends on a local corpus: real-time factor and word error rate.
+
+    python -m app.services.asr_benchmark --corpus benchmarks/corpus \
+        --backends whisper,whisper-int8,faster-whisper --model-size base
+
+The corpus directory holds a manifest.jsonl with one {"audio": "<file>", "text": "<reference>"}
+object per line; audio paths are relative to the corpus directory.
+
+benchmarks/corpus ships two generated clips (rewrite them with --write-sample):
+  - synthetic_vowels.wav: voiced vowels and pauses, no words. Its reference is
+    empty, so its WER is the hallucination rate on non-speech.
+  - tts_clinical_note.wav: a short clinical note spoken by espeak-ng (en-us),
+    with its reference transcript. Synthesizing it needs `pip install
+    espeakng-loader`; the text is ours and espeak-ng's GPL does not cover its
+    output, so the clip is redistributable with the repository.
+Add real recordings to the manifest for accuracy on natural speech.
+Agreement is each backend's WER against the first backend's output (normally
+the fp32 reference), i.e. how far quantization moves the transcript.
+"""
+import re
+import io
+import json
+import time
+import wave
+import ctypes
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from .asr_backends import BACKENDS, load_backend
+from .audio_processor import AudioProcessor
+from .resampler import resample
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_words(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # Levenshtein distance over words, single rolling row
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        prev_diag, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            cost = 0 if ref_word == hyp_word else 1
+            prev_diag, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev_diag + cost)
+    return row[len(hyp)] / len(ref)
+
+
+SAMPLE_CLIP = "synthetic_vowels.wav"
+SPEECH_CLIP = "tts_clinical_note.wav"
+SPEECH_TEXT = (
+    "The patient has chest pain and shortness of breath. "
+    "Her blood pressure is high and she has a history of diabetes. "
+    "We will start aspirin and repeat the blood tests tomorrow morning."
+)
+SAMPLE_MANIFEST = [
+    {"audio": SAMPLE_CLIP, "text": ""},
+    {"audio": SPEECH_CLIP, "text": SPEECH_TEXT, "source": "espeak-ng en-us, 150 wpm (asr_benchmark --write-sample)"},
+]
+
+# Formant frequencies (Hz) of the vowels in the synthetic clip: /a/, /i/, /u/, /e/
+_VOWEL_FORMANTS = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480)]
+
+
+def synthesize_sample(seconds_per_vowel: float = 0.5, pause_seconds: float = 0.25, seed: int = 0) -> np.ndarray:
+    """Deterministic speech-like clip at 16 kHz: glottal pulse train through vowel formant resonators."""
+    rate = AudioProcessor.SAMPLE_RATE
+    rng = np.random.default_rng(seed)
+    pieces = [np.zeros(int(rate * pause_seconds))]
+    for formants in _VOWEL_FORMANTS:
+        n = int(rate * seconds_per_vowel)
+        t = np.arange(n) / rate
+        # Slightly falling pitch, like a spoken vowel
+        phase = np.cumsum(2 * np.pi * np.linspace(130, 110, n) / rate)
+        source = np.maximum(0.0, np.sin(phase)) ** 8
+        voiced = np.zeros(n)
+        for index, formant in enumerate(formants):
+            bandwidth = 80.0 + 40.0 * index
+            # Impulse response of a damped resonator, applied by FFT convolution
+            ir_t = t[:int(rate * 0.02)]
+            impulse = np.exp(-np.pi * bandwidth * ir_t) * np.sin(2 * np.pi * formant * ir_t)
+            voiced += np.fft.irfft(np.fft.rfft(source, 2 * n) * np.fft.rfft(impulse, 2 * n))[:n] / (index + 1)
+        envelope = np.minimum(1.0, np.minimum(t, t[::-1]) / 0.05)
+        pieces.append(voiced * envelope)
+        pieces.append(np.zeros(int(rate * pause_seconds)))
+
+    audio = np.concatenate(pieces)
+    audio = 0.5 * audio / np.abs(audio).max() + 0.002 * rng.standard_normal(audio.size)
+    return audio.astype(np.float32)
+
+
+def synthesize_speech(text: str, words_per_minute: int = 150) -> np.ndarray:
+    """Speak `text` with espeak-ng (en-us) and return it as 16 kHz float32."""
+    try:
+        import espeakng_loader
+    except ImportError:
+        raise ImportError("Speech sample synthesis requires the espeakng-loader package")
+
+    lib = ctypes.CDLL(espeakng_loader.get_library_path())
+    chunks = []
+
+    @ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+    def on_samples(wav, count, events):
+        if count > 0:
+            chunks.append(np.ctypeslib.as_array(wav, (count,)).copy())
+        return 0
+
+    # AUDIO_OUTPUT_SYNCHRONOUS; the path is the directory holding espeak-ng-data
+    data_root = str(Path(espeakng_loader.get_data_path()).parent).encode()
+    rate = lib.espeak_Initialize(2, 0, data_root, 0)
+    if rate <= 0:
+        raise RuntimeError("espeak-ng failed to initialize")
+    try:
+        lib.espeak_SetSynthCallback(on_samples)
+        lib.espeak_SetVoiceByName(b"en-us")
+        lib.espeak_SetParameter(1, words_per_minute, 0)  # espeakRATE, absolute
+        encoded = text.encode()
+        lib.espeak_Synth(encoded, ctypes.c_size_t(len(encoded) + 1), 0, 1, 0, 0, None, None)
+        lib.espeak_Synchronize()
+    finally:
+        lib.espeak_Terminate()
+
+    audio = np.concatenate(chunks).astype(np.float32) / 32768.0
+    return resample(audio, rate).astype(np.float32)
+
+
+def _write_wav(path: Path, audio: np.ndarray):
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(AudioProcessor.SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+    path.write_bytes(buffer.getvalue())
+
+
+def write_sample_corpus(corpus_dir: Path):
+    """Write the sample clips and their manifest; keeps an existing speech clip without espeak-ng."""
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    _write_wav(corpus_dir / SAMPLE_CLIP, synthesize_sample())
+    try:
+        _write_wav(corpus_dir / SPEECH_CLIP, synthesize_speech(SPEECH_TEXT))
+    except ImportError as e:
+        logger.warning(f"Not rewriting {SPEECH_CLIP}: {e}")
+    (corpus_dir / "manifest.jsonl").write_text("".join(json.dumps(entry) + "\n" for entry in SAMPLE_MANIFEST))
+
+
+def load_corpus(corpus_dir: Path) -> List[Dict]:
+    manifest = corpus_dir / "manifest.jsonl"
+    if not manifest.exists():
+        raise FileNotFoundError(f"No manifest.jsonl in {corpus_dir}")
+
+    processor = AudioProcessor(storage_path=str(corpus_dir))
+    items = []
+    for line in manifest.read_text().splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        audio = processor.decode_audio_bytes((corpus_dir / entry["audio"]).read_bytes())
+        items.append({
+            "name": entry["audio"],
+            "audio": audio,
+            "duration": audio.size / AudioProcessor.SAMPLE_RATE,
+            "reference": entry["text"]
+        })
+    return items
+
+
+def benchmark_backend(name: str, model_size: str, corpus: List[Dict], language: str) -> Dict:
+    load_start = time.perf_counter()
+    backend = load_backend(name, model_size, "cpu")
+    load_seconds = time.perf_counter() - load_start
+
+    # One untimed pass so lazy initialisation does not skew the first sample
+    backend.transcribe(corpus[0]["audio"], language=language, fp16=False, verbose=False)
+
+    audio_seconds = processing_seconds = 0.0
+    errors = []
+    hypotheses = []
+    for item in corpus:
+        start = time.perf_counter()
+        result = backend.transcribe(item["audio"], language=language, fp16=False, verbose=False)
+        processing_seconds += time.perf_counter() - start
+        audio_seconds += item["duration"]
+        errors.append(word_error_rate(item["reference"], result["text"]))
+        hypotheses.append(result["text"])
+
+    return {
+        "backend": name,
+        "model_size": model_size,
+        "load_seconds": round(load_seconds, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "processing_seconds": round(processing_seconds, 2),
+        "rtf": round(processing_seconds / audio_seconds, 3) if audio_seconds else None,
+        "wer": round(sum(errors) / len(errors), 4) if errors else None,
+        "hypotheses": hypotheses
+    }
+
+
+def agreement(reference: List[str], hypotheses: List[str]) -> float:
+    """Mean WER of `hypotheses` against another backend's output for the same files."""
+    return round(sum(word_error_rate(r, h) for r, h in zip(reference, hypotheses)) / len(reference), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ASR backends (RTF and WER)")
+    parser.add_argument("--corpus", default="benchmarks/corpus", help="Directory containing manifest.jsonl")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backend names")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--write-sample", action="store_true", help="(Re)write the synthetic sample corpus into --corpus and exit")
+    args = parser.parse_args()
+
+    if args.write_sample:
+        write_sample_corpus(Path(args.corpus))
+        print(f"Wrote sample corpus to {args.corpus}")
+        return
+
+    corpus = load_corpus(Path(args.corpus))
+    print(f"Corpus: {len(corpus)} files, {sum(i['duration'] for i in corpus):.1f}s of audio")
+
+    baseline = None
+    for name in args.backends.split(","):
+        try:
+            report = benchmark_backend(name.strip(), args.model_size, corpus, args.language)
+        except ImportError as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        hypotheses = report.pop("hypotheses")
+        if baseline is None:
+            baseline = (report["backend"], hypotheses)
+        else:
+            report[f"wer_vs_{baseline[0]}"] = agreement(baseline[1], hypotheses)
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
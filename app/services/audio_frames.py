@@ -0,0 +1,62 @@
+
+import struct
+from typing import NamedTuple
+
+# Binary WebSocket audio frame:
+#   magic "OR" | version u8 | flags u8 | codec u8 | reserved u8 | chunk_index u32 | sample_rate u32 | payload
+# All header fields are big-endian; payload is raw codec bytes (no base64).
+FRAME_HEADER = struct.Struct("!2sBBBxII")
+FRAME_MAGIC = b"OR"
+FRAME_VERSION = 1
+
+FLAG_FINAL = 0x01
+
+CODEC_PCM_S16LE = 0  # raw little-endian 16-bit mono PCM at `sample_rate`
+CODEC_OPUS = 1       # Opus in an Ogg/WebM container (MediaRecorder output)
+CODEC_CONTAINER = 2  # any self-describing container (wav, mp3, ...)
+
+CODEC_NAMES = {
+    CODEC_PCM_S16LE: "pcm_s16le",
+    CODEC_OPUS: "opus",
+    CODEC_CONTAINER: "container",
+}
+
+
+class AudioFrame(NamedTuple):
+    chunk_index: int
+    is_final: bool
+    codec: int
+    sample_rate: int
+    payload: bytes
+
+
+def parse_audio_frame(data: bytes) -> AudioFrame:
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError("Audio frame shorter than header")
+    
+    magic, version, flags, codec, chunk_index, sample_rate = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Invalid audio frame magic")
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version: {version}")
+    if codec not in CODEC_NAMES:
+        raise ValueError(f"Unsupported audio codec: {codec}")
+    
+    return AudioFrame(
+        chunk_index=chunk_index,
+        is_final=bool(flags & FLAG_FINAL),
+        codec=codec,
+        sample_rate=sample_rate,
+        payload=data[FRAME_HEADER.size:]
+    )
+
+
+def build_audio_frame(
+    payload: bytes,
+    chunk_index: int,
+    is_final: bool = False,
+    codec: int = CODEC_PCM_S16LE,
+    sample_rate: int = 16000
+) -> bytes:
+    flags = FLAG_FINAL if is_final else 0
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, flags, codec, chunk_index, sample_rate) + payload
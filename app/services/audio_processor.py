@@ -1,9 +1,35 @@
 
 import os
 import io
+import wave
+import asyncio
+import subprocess
 from pathlib import Path
+from typing import Optional
+import numpy as np
 from pydub import AudioSegment
 
+from .resampler import StreamResampler, resample
+
+class ResampleStream:
+    """
+    Resampling state of one recording: chunks at the same source rate go through
+    one StreamResampler, so they join up exactly as if decoded in one piece.
+    """
+    
+    def __init__(self, target_rate: int = 16000):
+        self.target_rate = target_rate
+        self._resampler: Optional[StreamResampler] = None
+    
+    def resampler_for(self, frame_rate: int) -> Optional[StreamResampler]:
+        if frame_rate == self.target_rate:
+            return None
+        if self._resampler is None or self._resampler.orig_rate != frame_rate:
+            # A rate change starts over; only the old filter tail (< 1 ms) is lost
+            self._resampler = StreamResampler(frame_rate, self.target_rate)
+        return self._resampler
+
+
 class AudioProcessor:
     
     SAMPLE_RATE = 16000  
@@ -22,6 +48,96 @@ class AudioProcessor:
         
         return str(filepath)
     
+    async def archive_chunk_async(self, audio_data: bytes, transcription_id: int, chunk_index: int) -> str:
+        """Persist a raw chunk off the event loop; used only for archival, never for decoding."""
+        return await asyncio.to_thread(self.save_audio_chunk, audio_data, transcription_id, chunk_index)
+    
+    def decode_audio_bytes(self, audio_data: bytes, stream: Optional[ResampleStream] = None, final: bool = True) -> np.ndarray:
+        """
+        Decode an encoded audio payload into a float32 mono buffer at SAMPLE_RATE,
+        ready to be passed straight to Whisper without touching the disk.
+
+        Consecutive WAV chunks of one recording can share a `stream` so chunk
+        edges carry no resampling seams; `final` drains it on the last chunk.
+        """
+        if audio_data[:4] == b"RIFF" and audio_data[8:12] == b"WAVE":
+            try:
+                return self._decode_wav(audio_data, stream, final)
+            except (wave.Error, EOFError, ValueError):
+                # Non-PCM WAV (e.g. float or compressed), let ffmpeg handle it
+                pass
+        
+        return self._decode_with_ffmpeg(audio_data)
+    
+    def decode_pcm16(
+        self,
+        pcm_data: bytes,
+        sample_rate: int = SAMPLE_RATE,
+        stream: Optional[ResampleStream] = None,
+        final: bool = True
+    ) -> np.ndarray:
+        """Decode raw little-endian 16-bit mono PCM (binary WebSocket frames)."""
+        # An odd trailing byte can only be a truncated sample
+        usable = len(pcm_data) - (len(pcm_data) % 2)
+        samples = np.frombuffer(pcm_data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        return self._resample(samples, sample_rate or self.SAMPLE_RATE, stream, final)
+    
+    def _decode_wav(self, audio_data: bytes, stream: Optional[ResampleStream] = None, final: bool = True) -> np.ndarray:
+        with wave.open(io.BytesIO(audio_data), 'rb') as wav:
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            frame_rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+        
+        if sample_width == 1:
+            samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif sample_width == 2:
+            samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+        elif sample_width == 4:
+            samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+        else:
+            raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+        
+        # Downmix to mono
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        
+        return self._resample(samples, frame_rate, stream, final)
+    
+    def _decode_with_ffmpeg(self, audio_data: bytes) -> np.ndarray:
+        # Containerised formats (webm/ogg/mp3...) are decoded through a single ffmpeg
+        # pipe: bytes in on stdin, 16 kHz mono s16le out on stdout, no temp files.
+        cmd = [
+            "ffmpeg", "-nostdin", "-threads", "0",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", str(self.CHANNELS), "-acodec", "pcm_s16le",
+            "-ar", str(self.SAMPLE_RATE),
+            "pipe:1"
+        ]
+        try:
+            out = subprocess.run(cmd, input=audio_data, capture_output=True, check=True).stdout
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}")
+        
+        return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+    
+    def _resample(
+        self,
+        samples: np.ndarray,
+        frame_rate: int,
+        stream: Optional[ResampleStream] = None,
+        final: bool = True
+    ) -> np.ndarray:
+        # Polyphase low-pass resampling: no aliasing of content above 8 kHz into speech
+        resampler = stream.resampler_for(frame_rate) if stream is not None else None
+        if resampler is None:
+            return resample(samples, frame_rate, self.SAMPLE_RATE)
+        
+        out = resampler.process(samples)
+        if final:
+            out = np.concatenate([out, resampler.flush()])
+        return out
+    
     def convert_to_wav(self, input_path: str, output_path: str = None) -> str:
         if output_path is None:
             output_path = str(Path(input_path).with_suffix('.wav'))
@@ -63,4 +179,3 @@ class AudioProcessor:
                 "valid": False,
                 "error": str(e)
             }
-
@@ -0,0 +1,110 @@
+
+import time
+import asyncio
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Gathers decode requests from concurrent sessions into batches.
+
+    A batch is dispatched when it reaches `max_batch_size` or when its oldest
+    request has waited `max_wait_ms`. Requests are grouped by (language, task),
+    since a single whisper.decode pass shares one set of decoding options.
+    """
+
+    # whisper.decode works on exactly one 30 s mel window per item
+    MAX_SECONDS = 30.0
+    SAMPLE_RATE = 16000
+
+    def __init__(self, pool, max_batch_size: int = 8, max_wait_ms: int = 50):
+        self.pool = pool
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0, max_wait_ms)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "max_batch_seen": 0,
+            "queue_wait_ms_total": 0.0
+        }
+
+    def accepts(self, audio) -> bool:
+        return isinstance(audio, np.ndarray) and audio.size <= self.MAX_SECONDS * self.SAMPLE_RATE
+
+    async def submit(self, audio: np.ndarray, language: str = "en", task: str = "transcribe") -> Dict:
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((language, task), audio, future, time.perf_counter()))
+        return await future
+
+    def _ensure_running(self):
+        if self._runner is None or self._runner.done():
+            self._queue = asyncio.Queue()
+            self._runner = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000.0
+
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups: Dict[Tuple[str, str], List] = {}
+            for item in pending:
+                groups.setdefault(item[0], []).append(item)
+
+            # Batches run concurrently so every inference worker can stay busy
+            for (language, task), items in groups.items():
+                dispatch = asyncio.create_task(self._dispatch(language, task, items))
+                self._inflight.add(dispatch)
+                dispatch.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, language: str, task: str, items: List):
+        now = time.perf_counter()
+        self._stats["requests"] += len(items)
+        self._stats["batches"] += 1
+        self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(items))
+        self._stats["queue_wait_ms_total"] += sum((now - item[3]) * 1000.0 for item in items)
+
+        try:
+            results = await self.pool.transcribe_batch([item[1] for item in items], language, task)
+        except Exception as e:
+            logger.error(f"Batched transcription failed: {str(e)}")
+            for item in items:
+                if not item[2].done():
+                    item[2].set_exception(e)
+            return
+
+        for item, result in zip(items, results):
+            if not item[2].done():
+                item[2].set_result(result)
+
+    def get_metrics(self) -> Dict:
+        requests = self._stats["requests"]
+        batches = self._stats["batches"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "requests": requests,
+            "batches": batches,
+            "max_batch_seen": self._stats["max_batch_seen"],
+            "avg_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "avg_queue_wait_ms": round(self._stats["queue_wait_ms_total"] / requests, 2) if requests else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue else 0
+        }
@@ -0,0 +1,590 @@
+"""
+Daily dashboard rollups, maintained as surgeries and notes are written.
+
+    python -m app.services.dashboard_rollup --from 2025-01-01 --to 2025-12-31
+
+`dashboard_daily` holds per-day note counts, wait-time sums and distinct patient
+counts; `dashboard_room_daily` holds per-room busy minutes inside the rollup
+window (DASHBOARD_DAY_START-DASHBOARD_DAY_END). Session flush hooks keep them
+current: a note insert/delete adjusts its day's counter, and any surgery change
+that can move minutes, waits or patients recomputes the (old and new) days it
+touches. Running this module rebuilds a date range, e.g. after a backfill or a
+bulk UPDATE that bypassed the ORM.
+"""
+import os
+import sys
+import time as _time
+import logging
+import argparse
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import (
+    Date, DateTime, Index, Integer, and_, case, cast, delete, event, func, insert, inspect as sa_inspect,
+    literal, null, or_, select, update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal, engine
+from ..models.surgery import surgeries, SurgeryStatus
+from ..models.note import notes
+from ..models.dashboard_rollup import dashboard_daily, dashboard_room_daily
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_ENABLED = os.getenv("DASHBOARD_ROLLUPS", "true").lower() in ("1", "true", "yes")
+
+# Window the per-room rollup is computed for; other windows are computed live
+ROLLUP_DAY_START = os.getenv("DASHBOARD_DAY_START", "07:00")
+ROLLUP_DAY_END = os.getenv("DASHBOARD_DAY_END", "19:00")
+
+# Surgery columns that decide which days/rooms/minutes a surgery counts towards
+_SURGERY_FIELDS = (
+    "status", "patient_id", "operating_room_id", "scheduled_date", "scheduled_time",
+    "duration_minutes", "actual_start_time", "actual_end_time",
+)
+
+# Lookups made by every refresh; created on existing databases by install()
+_INDEXES = (
+    Index("ix_surgeries_scheduled_date", surgeries.scheduled_date),
+    Index("ix_surgeries_actual_start_time", surgeries.actual_start_time),
+    Index("ix_notes_created_at", notes.created_at),
+)
+
+_PENDING_KEY = "dashboard_rollup"
+
+
+def parse_hhmm(value: str) -> time:
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def scheduled_start(scheduled_date: Optional[date], scheduled_time) -> Optional[datetime]:
+    """Scheduled start as a datetime; `scheduled_time` is stored as "HH:MM" text."""
+    if scheduled_date is None or not scheduled_time:
+        return None
+    if isinstance(scheduled_time, time):
+        return datetime.combine(scheduled_date, scheduled_time)
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.combine(scheduled_date, datetime.strptime(scheduled_time.strip(), fmt).time())
+        except ValueError:
+            continue
+    return None
+
+
+def surgery_interval(row) -> Optional[Tuple[datetime, datetime]]:
+    """Actual start/end when both are recorded, otherwise scheduled start + duration."""
+    if row.actual_start_time and row.actual_end_time:
+        return row.actual_start_time, row.actual_end_time
+    if not row.scheduled_time or not row.duration_minutes:
+        return None
+    start = scheduled_start(row.scheduled_date, row.scheduled_time)
+    if start is None:
+        return None
+    return start, start + timedelta(minutes=int(row.duration_minutes))
+
+
+def clip_overlap(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> int:
+    """Return overlap in minutes between [a_start,a_end] and [b_start,b_end]."""
+    start = max(a_start, b_start)
+    end = min(a_end, b_end)
+    if end <= start:
+        return 0
+    return int((end - start).total_seconds() // 60)
+
+
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    return datetime.combine(day, time.min), datetime.combine(day, time.max)
+
+
+class _SqlTime:
+    """
+    Dialect-specific SQL for the interval arithmetic, so it runs in the database.
+
+    Times are expressed as seconds relative to a reference datetime: exact on
+    Postgres (`date_part('epoch', ...)`), rounded to the millisecond on SQLite
+    (`julianday` differences).
+    """
+
+    # strptime("%H:%M" / "%H:%M:%S") accepts 1-2 digit fields, hours 0-23
+    _PG_TIME_PATTERN = r"^([01]?[0-9]|2[0-3]):[0-5]?[0-9](:[0-5]?[0-9])?$"
+    _SQLITE_HOUR_GLOBS = ("[0-9]", "[0-1][0-9]", "2[0-3]")
+    _SQLITE_MINUTE_GLOBS = ("[0-9]", "[0-5][0-9]")
+
+    def __init__(self, dialect_name: str):
+        self.pg = dialect_name == "postgresql"
+
+    def seconds_since(self, column, ref: datetime):
+        if self.pg:
+            return func.date_part("epoch", cast(column, DateTime) - literal(ref, DateTime))
+        return func.round((func.julianday(column) - func.julianday(literal(ref, DateTime))) * 86400.0, 3)
+
+    def time_seconds(self, column):
+        """Seconds after midnight of an "HH:MM[:SS]" text column; NULL when it would not parse."""
+        t = func.trim(column)
+        if self.pg:
+            valid = t.op("~")(self._PG_TIME_PATTERN)
+            seconds = (
+                cast(func.split_part(t, ":", 1), Integer) * 3600
+                + cast(func.split_part(t, ":", 2), Integer) * 60
+                + cast(func.coalesce(func.nullif(func.split_part(t, ":", 3), ""), "0"), Integer)
+            )
+        else:
+            hm = [f"{h}:{m}" for h in self._SQLITE_HOUR_GLOBS for m in self._SQLITE_MINUTE_GLOBS]
+            patterns = hm + [f"{p}:{s}" for p in hm for s in self._SQLITE_MINUTE_GLOBS]
+            valid = or_(*(t.op("GLOB")(p) for p in patterns))
+            colon = func.instr(t, ":")
+            rest = func.substr(t, colon + 1)
+            colon2 = func.instr(rest, ":")
+            seconds = (
+                cast(func.substr(t, 1, colon - 1), Integer) * 3600
+                + cast(rest, Integer) * 60  # CAST stops at the second colon
+                + case((colon2 > 0, cast(func.substr(rest, colon2 + 1), Integer)), else_=0)
+            )
+        return case((valid, seconds), else_=null())
+
+    def least(self, a, b):
+        return func.least(a, b) if self.pg else func.min(a, b)
+
+    def greatest(self, a, b):
+        return func.greatest(a, b) if self.pg else func.max(a, b)
+
+    def day_of(self, column):
+        """Calendar day of a timestamp column (an ISO string on SQLite)."""
+        return cast(column, Date) if self.pg else func.date(column)
+
+    def whole_minutes(self, seconds):
+        """floor(seconds / 60) for non-negative seconds."""
+        if self.pg:
+            return func.floor(seconds / 60)
+        return cast(seconds / 60.0, Integer)
+
+
+def _interval_columns(sql: _SqlTime, ref: datetime):
+    """(start, end) seconds relative to `ref`: actual times when both are set, else scheduled + duration."""
+    has_actual = and_(surgeries.actual_start_time.isnot(None), surgeries.actual_end_time.isnot(None))
+    sched_start = sql.seconds_since(surgeries.scheduled_date, ref) + sql.time_seconds(surgeries.scheduled_time)
+    start = case((has_actual, sql.seconds_since(surgeries.actual_start_time, ref)), else_=sched_start)
+    end = case(
+        (has_actual, sql.seconds_since(surgeries.actual_end_time, ref)),
+        (surgeries.duration_minutes != 0, sched_start + surgeries.duration_minutes * 60),
+        else_=null(),
+    )
+    return start, end
+
+
+# ---------- Computation from the base tables ----------
+def compute_room_busy(conn, day: date, day_start: str = ROLLUP_DAY_START, day_end: str = ROLLUP_DAY_END) -> Dict[int, int]:
+    """Busy minutes per room for `day`, clipped to the [day_start, day_end] window."""
+    win_start = datetime.combine(day, parse_hhmm(day_start))
+    win_end = datetime.combine(day, parse_hhmm(day_end))
+    window_seconds = (win_end - win_start).total_seconds()
+    sql = _SqlTime(conn.dialect.name)
+
+    start, end = _interval_columns(sql, win_start)
+    intervals = (
+        select(surgeries.operating_room_id.label("room_id"), start.label("start"), end.label("end"))
+        .where(surgeries.status != SurgeryStatus.cancelled)
+        .where(surgeries.operating_room_id.isnot(None))
+        .where(
+            (surgeries.scheduled_date == day) |
+            (surgeries.actual_start_time >= win_start) & (surgeries.actual_start_time <= win_end)
+        )
+        .subquery()
+    )
+    overlap = sql.least(intervals.c.end, window_seconds) - sql.greatest(intervals.c.start, 0)
+    rows = conn.execute(
+        select(
+            intervals.c.room_id,
+            func.sum(case((overlap > 0, sql.whole_minutes(overlap)), else_=0)).label("busy"),
+        )
+        .where(intervals.c.start.isnot(None), intervals.c.end.isnot(None))
+        .group_by(intervals.c.room_id)
+    ).all()
+    return {row.room_id: int(row.busy) for row in rows if row.busy}
+
+
+def compute_wait(conn, day: date) -> Tuple[float, int]:
+    """(sum, count) of start delays in minutes for surgeries that actually started on `day`."""
+    start, end = _day_bounds(day)
+    sql = _SqlTime(conn.dialect.name)
+
+    scheduled = sql.seconds_since(surgeries.scheduled_date, start) + sql.time_seconds(surgeries.scheduled_time)
+    wait_minutes = sql.greatest(sql.seconds_since(surgeries.actual_start_time, start) - scheduled, 0) / 60.0
+    row = conn.execute(
+        select(func.sum(wait_minutes), func.count(wait_minutes))
+        .where(surgeries.status != SurgeryStatus.cancelled)
+        .where(surgeries.actual_start_time >= start, surgeries.actual_start_time <= end)
+        .where(scheduled.isnot(None))
+    ).one()
+    return float(row[0] or 0.0), int(row[1])
+
+
+def compute_patients(conn, day: date) -> int:
+    start, end = _day_bounds(day)
+    return conn.execute(
+        select(func.count(func.distinct(surgeries.patient_id)))
+        .where(surgeries.status != SurgeryStatus.cancelled)
+        .where(
+            (surgeries.scheduled_date == day) |
+            ((surgeries.actual_start_time >= start) & (surgeries.actual_start_time <= end))
+        )
+    ).scalar_one()
+
+
+def compute_notes(conn, day: date) -> int:
+    start, end = _day_bounds(day)
+    return conn.execute(
+        select(func.count()).select_from(notes).where(notes.created_at >= start, notes.created_at <= end)
+    ).scalar_one()
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the day/week (Monday)/month bucket containing `day`."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def compute_range(
+    conn,
+    start: date,
+    end: date,
+    granularity: str = "day",
+    day_start: str = ROLLUP_DAY_START,
+    day_end: str = ROLLUP_DAY_END
+) -> dict:
+    """
+    Every dashboard series for [start, end], bucketed by day/week/month.
+
+    One column-only pass over the surgeries in range plus one grouped notes
+    count, instead of a query set per day. Each bucket equals the single-day
+    metrics summed over its days, except distinct patients, which are distinct
+    across the whole bucket.
+    """
+    t_start, t_end = parse_hhmm(day_start), parse_hhmm(day_end)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    buckets = sorted({bucket_start(d, granularity) for d in days})
+    position = {b: i for i, b in enumerate(buckets)}
+    bucket_of = {d: position[bucket_start(d, granularity)] for d in days}
+    n = len(buckets)
+
+    days_in_bucket = [0] * n
+    for d in days:
+        days_in_bucket[bucket_of[d]] += 1
+    window = int((datetime.combine(start, t_end) - datetime.combine(start, t_start)).total_seconds() // 60)
+
+    busy: Dict[int, List[int]] = {}
+    wait_sum, wait_count = [0.0] * n, [0] * n
+    patients = [set() for _ in range(n)]
+
+    range_start, range_end = datetime.combine(start, time.min), datetime.combine(end, time.max)
+    rows = conn.execute(
+        select(
+            surgeries.operating_room_id, surgeries.patient_id, surgeries.scheduled_date, surgeries.scheduled_time,
+            surgeries.duration_minutes, surgeries.actual_start_time, surgeries.actual_end_time,
+        )
+        .where(surgeries.status != SurgeryStatus.cancelled)
+        .where(
+            surgeries.scheduled_date.between(start, end) |
+            surgeries.actual_start_time.between(range_start, range_end)
+        )
+    ).all()
+
+    for row in rows:
+        sched_day = row.scheduled_date if row.scheduled_date is not None and start <= row.scheduled_date <= end else None
+        actual_day = None
+        if row.actual_start_time is not None and start <= row.actual_start_time.date() <= end:
+            actual_day = row.actual_start_time.date()
+
+        # Patients count on the scheduled day and on the day the surgery actually started
+        for d in {sched_day, actual_day} - {None}:
+            patients[bucket_of[d]].add(row.patient_id)
+
+        if actual_day is not None:
+            sched_dt = scheduled_start(row.scheduled_date, row.scheduled_time)
+            if sched_dt is not None:
+                wait_sum[bucket_of[actual_day]] += max(0.0, (row.actual_start_time - sched_dt).total_seconds() / 60.0)
+                wait_count[bucket_of[actual_day]] += 1
+
+        interval = surgery_interval(row)
+        if row.operating_room_id is None or interval is None:
+            continue
+        busy_days = {sched_day}
+        if actual_day is not None:
+            if datetime.combine(actual_day, t_start) <= row.actual_start_time <= datetime.combine(actual_day, t_end):
+                busy_days.add(actual_day)
+        for d in busy_days - {None}:
+            minutes = clip_overlap(interval[0], interval[1], datetime.combine(d, t_start), datetime.combine(d, t_end))
+            if minutes:
+                busy.setdefault(row.operating_room_id, [0] * n)[bucket_of[d]] += minutes
+
+    sql = _SqlTime(conn.dialect.name)
+    note_day = sql.day_of(notes.created_at)
+    notes_count = [0] * n
+    for day_value, count in conn.execute(
+        select(note_day, func.count())
+        .where(notes.created_at >= range_start, notes.created_at <= range_end)
+        .group_by(note_day)
+    ):
+        d = date.fromisoformat(day_value) if isinstance(day_value, str) else _as_day(day_value)
+        if d in bucket_of:
+            notes_count[bucket_of[d]] += count
+
+    return {
+        "buckets": buckets,
+        "days": days_in_bucket,
+        "minutes_window": [window * k for k in days_in_bucket],
+        "busy": busy,
+        "notes_count": notes_count,
+        "wait_sum": wait_sum,
+        "wait_count": wait_count,
+        "distinct_patients": [len(p) for p in patients],
+    }
+
+
+# ---------- Rollup maintenance ----------
+def _upsert(conn, model, values: dict, keys: List[str]):
+    changes = {k: v for k, v in values.items() if k not in keys}
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(model).values(**values)
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_={k: stmt.excluded[k] for k in changes})
+        conn.execute(stmt)
+        return
+    result = conn.execute(
+        update(model).where(*(getattr(model, k) == values[k] for k in keys)).values(**changes)
+    )
+    if result.rowcount == 0:
+        conn.execute(insert(model).values(**values))
+
+
+def _insert_if_absent(conn, model, values: dict, keys: List[str]) -> bool:
+    """Insert the row unless one with the same keys exists; True when inserted."""
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(model).values(**values)
+        return conn.execute(stmt.on_conflict_do_nothing(index_elements=keys)).rowcount == 1
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(model).values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _day_values(conn, day: date) -> dict:
+    wait_sum, wait_count = compute_wait(conn, day)
+    return {
+        "day": day,
+        "wait_sum_minutes": wait_sum,
+        "wait_count": wait_count,
+        "patients_count": compute_patients(conn, day),
+    }
+
+
+def refresh_days(conn, days: Iterable[date], include_notes: bool = False):
+    """Recompute the rollup rows of `days` (note counts only for new rows or when asked)."""
+    for day in sorted(set(days)):
+        busy = compute_room_busy(conn, day)
+        values = _day_values(conn, day)
+        exists = conn.execute(select(dashboard_daily.day).where(dashboard_daily.day == day)).first()
+        if exists is None:
+            # A concurrent note writer's row keeps its count; never overwrite it with this snapshot's
+            _insert_if_absent(conn, dashboard_daily, dict(values, notes_count=compute_notes(conn, day)), ["day"])
+        if include_notes:
+            values["notes_count"] = compute_notes(conn, day)
+        _upsert(conn, dashboard_daily, values, ["day"])
+
+        conn.execute(
+            delete(dashboard_room_daily)
+            .where(dashboard_room_daily.day == day, dashboard_room_daily.room_id.notin_(list(busy)))
+        )
+        for room_id, minutes in busy.items():
+            _upsert(conn, dashboard_room_daily, {"day": day, "room_id": room_id, "busy_minutes": minutes}, ["day", "room_id"])
+
+
+def fill_missing_days(conn, days: Iterable[date]):
+    """
+    Create the rollup rows of days that have none, leaving existing rows alone.
+
+    For readers: a row a concurrent writer inserts first already counts that
+    writer's changes, so it wins over the reader's snapshot (no lost deltas).
+    """
+    for day in sorted(set(days)):
+        _insert_day_if_absent(conn, day, compute_notes(conn, day))
+
+
+def _insert_day_if_absent(conn, day: date, notes_count: int) -> bool:
+    values = _day_values(conn, day)
+    values["notes_count"] = notes_count
+    if not _insert_if_absent(conn, dashboard_daily, values, ["day"]):
+        return False
+    for room_id, minutes in compute_room_busy(conn, day).items():
+        _insert_if_absent(conn, dashboard_room_daily, {"day": day, "room_id": room_id, "busy_minutes": minutes}, ["day", "room_id"])
+    return True
+
+
+def apply_note_deltas(conn, deltas: Dict[date, int]):
+    """
+    Add each day's note delta with an atomic increment. A missing row is first
+    created insert-only, counted without this flush's notes; the increment then
+    adds them, so two concurrent first writers both land (the second one's
+    insert waits for the first and does nothing).
+    """
+    for day, delta in deltas.items():
+        if not delta:
+            continue
+        increment = (
+            update(dashboard_daily)
+            .where(dashboard_daily.day == day)
+            .values(notes_count=dashboard_daily.notes_count + delta)
+        )
+        if conn.execute(increment).rowcount == 0:
+            _insert_day_if_absent(conn, day, compute_notes(conn, day) - delta)
+            conn.execute(increment)
+
+
+# ---------- Flush hooks ----------
+def _as_day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _surgery_days(obj, changed_only: bool) -> set:
+    state = sa_inspect(obj)
+    if changed_only and not any(state.attrs[f].load_history().has_changes() for f in _SURGERY_FIELDS):
+        return set()
+    days = set()
+    for field in ("scheduled_date", "actual_start_time"):
+        history = state.attrs[field].load_history()
+        for value in (*history.added, *history.unchanged, *history.deleted):
+            if value is not None:
+                days.add(_as_day(value))
+    return days
+
+
+def _before_flush(session, flush_context, instances):
+    pending = {"days": set(), "note_deltas": defaultdict(int), "new_notes": []}
+    for obj in session.new:
+        if isinstance(obj, surgeries):
+            pending["days"] |= _surgery_days(obj, changed_only=False)
+        elif isinstance(obj, notes):
+            pending["new_notes"].append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, surgeries):
+            pending["days"] |= _surgery_days(obj, changed_only=True)
+    for obj in session.deleted:
+        if isinstance(obj, surgeries):
+            pending["days"] |= _surgery_days(obj, changed_only=False)
+        elif isinstance(obj, notes) and obj.created_at is not None:
+            pending["note_deltas"][_as_day(obj.created_at)] -= 1
+    session.info[_PENDING_KEY] = pending
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not (pending["days"] or pending["note_deltas"] or pending["new_notes"]):
+        return
+
+    conn = session.connection()
+    deltas = pending["note_deltas"]
+    note_ids = [n.id for n in pending["new_notes"] if n.id is not None]
+    if note_ids:
+        # created_at is a server default, so read back what the database stored
+        for created_at in conn.execute(select(notes.created_at).where(notes.id.in_(note_ids))).scalars():
+            if created_at is not None:
+                deltas[_as_day(created_at)] += 1
+
+    # Note deltas first, so refresh_days finds their rows and leaves the counts alone
+    apply_note_deltas(conn, deltas)
+    refresh_days(conn, pending["days"])
+
+
+def install(engine):
+    """Create the lookup indexes if missing and start maintaining rollups on flush."""
+    for index in _INDEXES:
+        index.create(engine, checkfirst=True)
+    if ROLLUPS_ENABLED and not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
+        event.listen(Session, "after_flush", _after_flush)
+
+
+# ---------- Reads (dashboard routes) ----------
+async def daily_rows(db, days: List[date]) -> Dict[date, dashboard_daily]:
+    """Rollup rows for `days`, computing (and storing) any day not rolled up yet."""
+    rows = (await db.execute(select(dashboard_daily).where(dashboard_daily.day.in_(days)))).scalars().all()
+    found = {row.day: row for row in rows}
+    missing = [d for d in days if d not in found]
+    if missing:
+        # Insert-if-absent only, then re-read: never overwrite a row a writer made meanwhile
+        await db.run_sync(lambda s: fill_missing_days(s.connection(), missing))
+        await db.commit()
+        rows = (
+            await db.execute(
+                select(dashboard_daily).where(dashboard_daily.day.in_(days)).execution_options(populate_existing=True)
+            )
+        ).scalars().all()
+        found = {row.day: row for row in rows}
+    return found
+
+
+async def room_busy(db, day: date) -> Dict[int, int]:
+    """Rolled-up busy minutes per room for `day` (call daily_rows first so the day exists)."""
+    rows = await db.execute(
+        select(dashboard_room_daily.room_id, dashboard_room_daily.busy_minutes).where(dashboard_room_daily.day == day)
+    )
+    return {row.room_id: row.busy_minutes for row in rows}
+
+
+# ---------- Backfill ----------
+def _data_range(db) -> Tuple[Optional[date], Optional[date]]:
+    bounds = [
+        db.execute(select(func.min(surgeries.scheduled_date), func.max(surgeries.scheduled_date))).one(),
+        db.execute(select(func.min(surgeries.actual_start_time), func.max(surgeries.actual_start_time))).one(),
+        db.execute(select(func.min(notes.created_at), func.max(notes.created_at))).one(),
+    ]
+    lows = [_as_day(lo) for lo, _ in bounds if lo is not None]
+    highs = [_as_day(hi) for _, hi in bounds if hi is not None]
+    return (min(lows) if lows else None), (max(highs) if highs else None)
+
+
+def rebuild(start: Optional[date] = None, end: Optional[date] = None, batch_days: int = 31) -> int:
+    install(engine)
+    with SessionLocal() as db:
+        lo, hi = _data_range(db)
+    start = start or lo
+    end = end or hi
+    if start is None or end is None:
+        return 0
+
+    rebuilt = 0
+    began = _time.perf_counter()
+    day = start
+    while day <= end:
+        batch = [day + timedelta(days=i) for i in range(batch_days) if day + timedelta(days=i) <= end]
+        with SessionLocal() as db:
+            refresh_days(db.connection(), batch, include_notes=True)
+            db.commit()
+        rebuilt += len(batch)
+        day = batch[-1] + timedelta(days=1)
+        print(f"{rebuilt} days rebuilt ({rebuilt / (_time.perf_counter() - began):.0f}/s), through {batch[-1]}", file=sys.stderr)
+    return rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild dashboard rollups from surgeries and notes")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="First day (default: earliest data)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Last day (default: latest data)")
+    parser.add_argument("--batch-days", type=int, default=31, help="Days recomputed per transaction")
+    args = parser.parse_args()
+    rebuild(args.start, args.end, args.batch_days)
+
+
+if __name__ == "__main__":
+    main()
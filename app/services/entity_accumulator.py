@@ -0,0 +1,69 @@
+
+from typing import Dict, List, Tuple
+
+
+class EntityAccumulator:
+    """
+    Session-level medical entity set built incrementally from committed chunks.
+
+    Each chunk is matched together with the last `overlap_words` words of the
+    text before it, so terms split across a chunk boundary ("chest | pain",
+    "120/80 | mmHg") are still found. Offsets are global positions in the
+    accumulated text (chunks joined with single spaces, as the streaming
+    transcriber does). Only the overlap tail is kept, so the cost per chunk and
+    at finalisation does not grow with the length of the recording.
+    """
+
+    def __init__(self, medical_ner, overlap_words: int = 8):
+        self.ner = medical_ner
+        self.overlap_words = overlap_words
+
+        self.text_length = 0
+        self._tail_words: List[str] = []
+        self._entities: Dict[str, Dict[Tuple[int, str], Dict]] = {}
+
+    def add_chunk(self, chunk_text: str) -> Dict[str, List[Dict]]:
+        """Append newly committed text; returns the entities it adds, with global offsets."""
+        chunk_text = chunk_text.strip()
+        if not chunk_text:
+            return {}
+
+        separator = " " if self.text_length else ""
+        chunk_start = self.text_length + len(separator)
+
+        tail = " ".join(self._tail_words)
+        tail_start = self.text_length - len(tail)
+        window = f"{tail} {chunk_text}" if tail else chunk_text
+
+        found = self.ner.extract_entities(window)
+
+        # Matches lying wholly in the tail were provisional: keep them only if the
+        # wider window still produces them
+        for category, items in self._entities.items():
+            seen = {(tail_start + e["start"], e["text"].lower()) for e in found.get(category, [])}
+            for key in [k for k in items if k[0] >= tail_start and k not in seen]:
+                del items[key]
+
+        added: Dict[str, List[Dict]] = {category: [] for category in found}
+        for category, items in found.items():
+            bucket = self._entities.setdefault(category, {})
+            for entity in items:
+                start = tail_start + entity["start"]
+                end = tail_start + entity["end"]
+                key = (start, entity["text"].lower())
+                if key in bucket:
+                    continue
+                located = {"text": entity["text"], "start": start, "end": end}
+                bucket[key] = located
+                added[category].append(located)
+
+        self.text_length = chunk_start + len(chunk_text)
+        self._tail_words = (self._tail_words + chunk_text.split())[-self.overlap_words:]
+        return added
+
+    def entities(self) -> Dict[str, List[Dict]]:
+        """All entities of the session so far, ordered by position within each category."""
+        return {
+            category: sorted(items.values(), key=lambda e: e["start"])
+            for category, items in self._entities.items()
+        }
@@ -0,0 +1,174 @@
+
+import os
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Per-process ASR backend, populated by _init_worker inside each pool worker
+_worker_backend = None
+
+
+def _init_worker(backend_name: str, model_size: str, device: str):
+    global _worker_backend
+    from .asr_backends import load_backend
+
+    _worker_backend = load_backend(backend_name, model_size, device)
+
+
+def _ping_worker() -> bool:
+    return _worker_backend is not None
+
+
+def _transcribe_in_worker(audio, options: Dict) -> Dict:
+    return _worker_backend.transcribe(audio, **options)
+
+
+def _transcribe_batch_in_worker(audios: List, language: str, task: str) -> List[Dict]:
+    return _worker_backend.transcribe_batch(audios, language=language, task=task)
+
+
+class InferencePool:
+    """
+    Bounded pool of inference processes, each holding its own loaded ASR backend.
+
+    Every worker is a single-process executor so jobs can be routed to the least
+    loaded model and queue depth can be reported per worker.
+
+    Backends whose weights are mmap-shared (see ASRBackend.shares_weights) add
+    little memory per worker. The others hold a full private copy each, so their
+    worker count is capped at ASR_MAX_PRIVATE_WEIGHT_WORKERS.
+    """
+
+    def __init__(
+        self,
+        backend_name: str = "whisper",
+        model_size: str = "base",
+        device: str = "cpu",
+        num_workers: int = 2,
+        max_queue_per_worker: int = 4
+    ):
+        self.backend_name = backend_name
+        self.model_size = model_size
+        self.device = device
+        self.num_workers = max(1, num_workers)
+
+        from .asr_backends import BACKENDS
+
+        backend_class = BACKENDS.get(backend_name)
+        if backend_class is not None and not (backend_class.shares_weights and device == "cpu"):
+            max_private = max(1, int(os.getenv("ASR_MAX_PRIVATE_WEIGHT_WORKERS", "2")))
+            if self.num_workers > max_private:
+                logger.warning(
+                    f"'{backend_name}' on {device} loads a private copy of the weights per worker; "
+                    f"capping inference workers at {max_private} (ASR_MAX_PRIVATE_WEIGHT_WORKERS)"
+                )
+                self.num_workers = max_private
+        self.max_queue_per_worker = max(1, max_queue_per_worker)
+
+        self._executors: List[ProcessPoolExecutor] = []
+        self._stats: List[Dict] = []
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pid: Optional[int] = None
+
+    def start(self):
+        if self._executors and self._pid == os.getpid():
+            return
+        if self._executors:
+            # Inherited through a fork: the executors' manager threads did not come
+            # along, so nothing submitted to them would ever complete
+            logger.warning("Inference pool was started before fork; starting new workers in this process")
+            self._executors = []
+            self._stats = []
+            self._slots = None
+        self._pid = os.getpid()
+
+        # Spawn (not fork) so torch state from the API process is never inherited
+        ctx = multiprocessing.get_context("spawn")
+        for index in range(self.num_workers):
+            self._executors.append(
+                ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(self.backend_name, self.model_size, self.device)
+                )
+            )
+            self._stats.append({
+                "worker": index,
+                "queue_depth": 0,
+                "completed": 0,
+                "failed": 0
+            })
+
+        logger.info(f"Started {self.num_workers} '{self.backend_name}' inference workers ({self.model_size})")
+
+    def warm_up(self):
+        """Block until every worker process has run its initializer (model loaded)."""
+        self.start()
+        futures = [executor.submit(_ping_worker) for executor in self._executors]
+        for future in futures:
+            future.result()
+
+    def shutdown(self, wait: bool = True):
+        for executor in self._executors:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        self._executors = []
+        self._stats = []
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` on the least loaded worker without blocking the event loop."""
+        self.start()
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.num_workers * self.max_queue_per_worker)
+
+        async with self._slots:
+            index = self._acquire_worker()
+            try:
+                future = self._executors[index].submit(fn, *args)
+                result = await asyncio.wrap_future(future)
+            except Exception:
+                self._release_worker(index, failed=True)
+                raise
+
+            self._release_worker(index, failed=False)
+            return result
+
+    async def transcribe(self, audio, options: Dict) -> Dict:
+        return await self.run(_transcribe_in_worker, audio, options)
+
+    async def transcribe_batch(self, audios: List, language: str, task: str) -> List[Dict]:
+        return await self.run(_transcribe_batch_in_worker, audios, language, task)
+
+    def _acquire_worker(self) -> int:
+        with self._lock:
+            index = min(range(len(self._stats)), key=lambda i: self._stats[i]["queue_depth"])
+            self._stats[index]["queue_depth"] += 1
+            return index
+
+    def _release_worker(self, index: int, failed: bool):
+        with self._lock:
+            stats = self._stats[index]
+            stats["queue_depth"] -= 1
+            stats["failed" if failed else "completed"] += 1
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            workers = [dict(stats) for stats in self._stats]
+
+        return {
+            "backend": self.backend_name,
+            "model_size": self.model_size,
+            "device": self.device,
+            "num_workers": self.num_workers,
+            "max_queue_per_worker": self.max_queue_per_worker,
+            "started": bool(workers),
+            "total_queue_depth": sum(w["queue_depth"] for w in workers),
+            "workers": workers
+        }
@@ -0,0 +1,359 @@
+
+import os
+import json
+import uuid
+import socket
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import update, or_, and_
+
+from ..database import SessionLocal
+from ..models.analysis_job import analysis_jobs, JobStatus
+from ..models.note_analysis import note_analysis, AnalysisStatus
+from .model_registry import registry
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisJobQueue:
+    """
+    DB-backed queue for post-recording analysis (no external broker).
+
+    Jobs are claimed with a conditional UPDATE so several workers (or processes)
+    never run the same job. Each claim gets its own lease token (`locked_by`); the
+    worker renews the lease every `lease_seconds / 3` while the job runs, and a
+    `running` job whose lease expired (worker crashed or stalled) is claimable
+    again. Completion and failure are recorded only while the token still holds
+    the lease, so a worker that lost it cannot overwrite the new owner's result.
+    Failures are retried with backoff up to `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        concurrency: int = 2,
+        max_attempts: int = 3,
+        poll_interval: float = 1.0,
+        lease_seconds: int = 300,
+        retry_delay_seconds: float = 10.0
+    ):
+        self.session_factory = session_factory
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_delay_seconds = retry_delay_seconds
+
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # Optional hooks to push results to a still-connected client
+        self.notify: Optional[Callable[[int, Dict], Awaitable[None]]] = None
+        self.is_listening: Optional[Callable[[int], bool]] = None
+        self._watchers: Dict[int, List[asyncio.Future]] = {}
+
+    def enqueue(self, db, transcription_id: Optional[int], payload: Dict) -> analysis_jobs:
+        """Create a pending note_analysis row and the job that will fill it in."""
+        analysis_record = self._new_analysis_record(transcription_id)
+        db.add(analysis_record)
+        db.flush()
+
+        job = self._new_job(transcription_id, analysis_record.id, payload)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self._wake()
+        return job
+
+    async def enqueue_async(self, db, transcription_id: Optional[int], payload: Dict) -> analysis_jobs:
+        """enqueue() for an AsyncSession."""
+        analysis_record = self._new_analysis_record(transcription_id)
+        db.add(analysis_record)
+        await db.flush()
+
+        job = self._new_job(transcription_id, analysis_record.id, payload)
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+
+        self._wake()
+        return job
+
+    def _new_analysis_record(self, transcription_id: Optional[int]) -> note_analysis:
+        return note_analysis(
+            transcription_id=transcription_id,
+            analysis_status=AnalysisStatus.pending
+        )
+
+    def _new_job(self, transcription_id: Optional[int], note_analysis_id: int, payload: Dict) -> analysis_jobs:
+        return analysis_jobs(
+            transcription_id=transcription_id,
+            note_analysis_id=note_analysis_id,
+            status=JobStatus.queued,
+            payload=json.dumps(payload),
+            attempts=0,
+            max_attempts=self.max_attempts,
+            available_at=datetime.utcnow()
+        )
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def watch(self, job_id: int) -> asyncio.Future:
+        """Future resolved with the final message when this process finishes the job."""
+        future = asyncio.get_running_loop().create_future()
+        self._watchers.setdefault(job_id, []).append(future)
+        return future
+    
+    def unwatch(self, job_id: int, future: asyncio.Future):
+        watchers = self._watchers.get(job_id, [])
+        if future in watchers:
+            watchers.remove(future)
+        if not watchers:
+            self._watchers.pop(job_id, None)
+    
+    async def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        logger.info(f"Started {self.concurrency} analysis job workers ({self.worker_id})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                claim = await asyncio.to_thread(self._claim_next)
+                if claim is None:
+                    await self._idle()
+                    continue
+                await self._process(*claim)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis worker {index} error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _idle(self):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    def _claim_next(self) -> Optional[Tuple[int, str]]:
+        """Claim the oldest claimable job; returns (job id, lease token)."""
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=self.lease_seconds)
+        claimable = or_(
+            and_(analysis_jobs.status == JobStatus.queued, analysis_jobs.available_at <= now),
+            and_(analysis_jobs.status == JobStatus.running, analysis_jobs.locked_at < lease_expired),
+        )
+
+        with self.session_factory() as db:
+            candidates = [
+                job_id for (job_id,) in (
+                    db.query(analysis_jobs.id)
+                    .filter(claimable)
+                    .order_by(analysis_jobs.id.asc())
+                    .limit(self.concurrency)
+                    .all()
+                )
+            ]
+            for job_id in candidates:
+                token = f"{self.worker_id[:55]}/{uuid.uuid4().hex[:8]}"
+                # Only one claimer can win the conditional update
+                claimed = db.execute(
+                    update(analysis_jobs)
+                    .where(analysis_jobs.id == job_id, claimable)
+                    .values(
+                        status=JobStatus.running,
+                        locked_by=token,
+                        locked_at=now,
+                        attempts=analysis_jobs.attempts + 1
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return job_id, token
+        return None
+
+    def _holds_lease(self, job_id: int, token: str):
+        return and_(
+            analysis_jobs.id == job_id,
+            analysis_jobs.status == JobStatus.running,
+            analysis_jobs.locked_by == token,
+        )
+
+    def _renew(self, job_id: int, token: str) -> bool:
+        with self.session_factory() as db:
+            renewed = db.execute(
+                update(analysis_jobs)
+                .where(self._holds_lease(job_id, token))
+                .values(locked_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return bool(renewed)
+
+    async def _heartbeat(self, job_id: int, token: str):
+        """Keep the lease alive while the job runs."""
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await asyncio.to_thread(self._renew, job_id, token):
+                    logger.warning(f"Analysis job {job_id} lease lost; its result will be discarded")
+                    return
+            except Exception as e:
+                # Transient DB error: the next beat (well inside the lease) retries
+                logger.warning(f"Analysis job {job_id} lease renewal failed: {str(e)}")
+
+    async def _process(self, job_id: int, token: str):
+        job = await asyncio.to_thread(self._load, job_id)
+        payload = json.loads(job["payload"])
+        transcription_id = job["transcription_id"]
+
+        async def on_partial(field, value):
+            await self.notify(transcription_id, {
+                "type": "analysis_partial",
+                "job_id": job_id,
+                "field": field,
+                "value": value
+            })
+
+        # Stream fields to the client as they are generated only when someone is
+        # listening; otherwise the cheaper JSON-mode call is used
+        stream = self._has_listener(job_id, transcription_id)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, token))
+        try:
+            analysis_service = await registry.aget("analysis")
+            result = await analysis_service.analyze_transcription_async(
+                payload["transcription_text"],
+                payload.get("patient_info", {}),
+                payload.get("previous_notes", []),
+                context=payload.get("context"),
+                use_cache=payload.get("use_cache", True),
+                on_partial=on_partial if stream else None
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        finally:
+            heartbeat.cancel()
+
+        if result["success"]:
+            if not await asyncio.to_thread(self._complete, job_id, token, result):
+                return
+            message = {"type": "analysis_complete", "job_id": job_id, "analysis": result}
+        else:
+            final = await asyncio.to_thread(self._fail, job_id, token, result.get("error", "unknown error"))
+            if not final:
+                return
+            message = {"type": "analysis_failed", "job_id": job_id, "error": result.get("error")}
+
+        # A client may have connected while the job ran; notify is a no-op without one
+        if self.notify is not None and transcription_id is not None:
+            await self.notify(transcription_id, message)
+        for future in self._watchers.pop(job_id, []):
+            if not future.done():
+                future.set_result(message)
+
+    def _has_listener(self, job_id: int, transcription_id: Optional[int]) -> bool:
+        if self.notify is None or transcription_id is None:
+            return False
+        if self._watchers.get(job_id):
+            return True
+        return self.is_listening is not None and self.is_listening(transcription_id)
+
+    def _load(self, job_id: int) -> Dict:
+        with self.session_factory() as db:
+            job = db.get(analysis_jobs, job_id)
+            return {"payload": job.payload, "transcription_id": job.transcription_id}
+
+    def _complete(self, job_id: int, token: str, result: Dict) -> bool:
+        """Record the result; returns False (nothing written) when the lease was lost."""
+        with self.session_factory() as db:
+            won = db.execute(
+                update(analysis_jobs)
+                .where(self._holds_lease(job_id, token))
+                .values(
+                    status=JobStatus.completed,
+                    completed_at=datetime.utcnow(),
+                    last_error=None,
+                    locked_by=None
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not won:
+                db.rollback()
+                logger.warning(f"Analysis job {job_id} lease lost before completion; result discarded")
+                return False
+
+            job = db.get(analysis_jobs, job_id)
+            if job.note_analysis_id is not None:
+                analysis_record = db.get(note_analysis, job.note_analysis_id)
+                if analysis_record is not None:
+                    analysis_record.analysis = result.get("analysis")
+                    analysis_record.keywords = ",".join(result.get("keywords", []))
+                    analysis_record.summary = result.get("summary")
+                    analysis_record.concerns_identified = json.dumps(result.get("concerns_identified", []))
+                    analysis_record.urgency_level = result.get("urgency_level", 1)
+                    analysis_record.analysis_status = AnalysisStatus.completed
+            db.commit()
+            return True
+
+    def _fail(self, job_id: int, token: str, error: str) -> bool:
+        """Record a failed attempt; returns True when the job will not be retried."""
+        with self.session_factory() as db:
+            job = db.get(analysis_jobs, job_id)
+            final = job.attempts >= job.max_attempts
+            values = {"last_error": error, "locked_by": None}
+            if final:
+                values.update(status=JobStatus.failed, completed_at=datetime.utcnow())
+            else:
+                delay = self.retry_delay_seconds * 2 ** (job.attempts - 1)
+                values.update(status=JobStatus.queued, available_at=datetime.utcnow() + timedelta(seconds=delay))
+
+            won = db.execute(
+                update(analysis_jobs)
+                .where(self._holds_lease(job_id, token))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not won:
+                db.rollback()
+                logger.warning(f"Analysis job {job_id} lease lost before failure was recorded; ignoring")
+                return False
+
+            if not final:
+                logger.warning(f"Analysis job {job_id} failed (attempt {job.attempts}), retrying in {delay:.0f}s")
+                db.commit()
+                return False
+
+            if job.note_analysis_id is not None:
+                analysis_record = db.get(note_analysis, job.note_analysis_id)
+                if analysis_record is not None:
+                    analysis_record.analysis_status = AnalysisStatus.failed
+            logger.error(f"Analysis job {job_id} failed permanently: {error}")
+            db.commit()
+            return True
+
+
+analysis_queue = AnalysisJobQueue(
+    concurrency=int(os.getenv("ANALYSIS_WORKERS", "2")),
+    max_attempts=int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3")),
+    poll_interval=float(os.getenv("ANALYSIS_JOB_POLL_SECONDS", "1.0")),
+    lease_seconds=int(os.getenv("ANALYSIS_JOB_LEASE_SECONDS", "300"))
+)
@@ -0,0 +1,70 @@
+
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class IncrementalJSONObject:
+    """
+    Incremental parser for a streamed JSON object.
+
+    Text is fed as it arrives; `feed` returns the top-level members whose values
+    became complete in that chunk, in document order. Nested values are only
+    reported once they are closed, so every reported value is valid JSON.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._text += chunk
+        completed = []
+
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    self._close_member(i, completed)
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                self._close_member(i, completed)
+                self._member_start = i + 1
+
+        self._pos = len(text)
+        return completed
+
+    def _close_member(self, end: int, completed: List[Tuple[str, Any]]):
+        if self._member_start is None:
+            return
+        member = self._text[self._member_start:end].strip()
+        if not member:
+            return
+        try:
+            key, value = json.loads("{" + member + "}").popitem()
+        except (ValueError, KeyError):
+            return
+        self.fields[key] = value
+        completed.append((key, value))
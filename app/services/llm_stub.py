@@ -0,0 +1,123 @@
+"""
+Local stand-in for the Groq chat-completions API, for exercising AnalysisService
+timeouts, retries and the circuit breaker without the network.
+
+    python -m app.services.llm_stub --port 8099
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=stub uvicorn app.main:app
+
+Every request pops the next step of a script; with the script empty it answers
+with a fixed analysis. A step is a dict:
+    {"delay": 2.5}          sleep first (combine with any of the below)
+    {"status": 503}         answer with this HTTP error
+    {"content": "..."}      answer with this message content
+    {"stall_after": 3}      streamed answers only: send 3 events, then hang
+Set the script with POST /_stub/script (a JSON list of steps); GET /_stub/requests
+returns how many completion requests arrived.
+"""
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_CONTENT = json.dumps({
+    "summary": "Stub summary.",
+    "keywords": ["stub"],
+    "concerns": [],
+    "urgency_level": 1,
+    "analysis": "Stub analysis."
+})
+
+
+class StubState:
+    def __init__(self):
+        self.script: List[Dict] = []
+        self.requests = 0
+
+    def next_step(self) -> Dict:
+        self.requests += 1
+        return self.script.pop(0) if self.script else {}
+
+
+def create_app(state: StubState = None) -> FastAPI:
+    state = state or StubState()
+    app = FastAPI(title="Chat completions stub")
+    app.state.stub = state
+
+    @app.post("/_stub/script")
+    async def set_script(request: Request):
+        state.script = list(await request.json())
+        state.requests = 0
+        return {"steps": len(state.script)}
+
+    @app.get("/_stub/requests")
+    def request_count():
+        return {"requests": state.requests}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        step = state.next_step()
+        if step.get("delay"):
+            await asyncio.sleep(step["delay"])
+        if step.get("status"):
+            return JSONResponse(
+                status_code=step["status"],
+                content={"error": {"message": f"stub error {step['status']}", "type": "stub_error"}}
+            )
+
+        content = step.get("content", DEFAULT_CONTENT)
+        created = int(time.time())
+        if body.get("stream"):
+            return StreamingResponse(
+                _sse_chunks(body["model"], content, created, step.get("stall_after")),
+                media_type="text/event-stream"
+            )
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    return app
+
+
+async def _sse_chunks(model: str, content: str, created: int, stall_after: int = None):
+    # A few characters per event, like a model emitting tokens
+    for index, start in enumerate(range(0, len(content), 8)):
+        if index == stall_after:
+            # Until the client gives up on the stream
+            await asyncio.sleep(3600)
+        chunk = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content[start:start + 8]}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local chat-completions stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,110 @@
 
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional
+import os
 import re
-import spacy
-from spacy.matcher import PhraseMatcher
 import logging
 
+from .vocabulary import MedicalVocabulary
+
 logger = logging.getLogger(__name__)
 
+# en_core_web_sm components that entity matching never reads
+UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
+LAB_UNITS = ("mg/dL", "mmol/L", "g/dL", "%", "bpm", "kg", "lbs")
+
+
+def _lab_value_pattern(units: Iterable[str]) -> re.Pattern:
+    """
+    Lab values (number + unit) as one alternation, compiled once. The first
+    alternative that matches at a position wins, so the order is explicit:
+    blood pressure, then temperature, then units longest first, so a unit that
+    is a prefix of another ("mg" / "mg/dL") cannot cut the longer one short.
+    """
+    unit_alternation = "|".join(re.escape(unit) for unit in sorted(units, key=len, reverse=True))
+    return re.compile(
+        r'\d+/\d+\s*mmHg'                   # Blood pressure
+        r'|\d+\.?\d*\s*°?[FC]'              # Temperature
+        r'|\d+\.?\d*\s*(?:' + unit_alternation + r')',
+        re.IGNORECASE
+    )
+
+
+LAB_VALUE_PATTERN = _lab_value_pattern(LAB_UNITS)
+
+
 class MedicalNER:
     def __init__(self):
+        # spaCy is imported here so importing this module stays cheap
+        import spacy
       
+        # Matching only needs tokens (terms are compared lowercased), so by default
+        # the tagger/parser/NER/lemmatizer are not even loaded
+        self.tokenizer_only = os.getenv("NER_TOKENIZER_ONLY", "true").lower() in ("1", "true", "yes")
+        self.batch_size = int(os.getenv("NER_BATCH_SIZE", "256"))
+        
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("Loaded spaCy model")
+            self.nlp = spacy.load("en_core_web_sm", exclude=UNUSED_COMPONENTS if self.tokenizer_only else [])
+            logger.info(f"Loaded spaCy model (pipeline: {self.nlp.pipe_names or 'tokenizer only'})")
         except:
             logger.warning("spaCy model not available")
             self.nlp = None
         
-        # Initialize matchers for medical terms
+        # Terminology files compiled once into a token trie (cached on disk)
         if self.nlp:
-            self.symptom_matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
-            self.medication_matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
-            self.procedure_matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
-            
-            # Load medical vocabularies
             self._load_medical_vocabularies()
     
     def _load_medical_vocabularies(self):
+        import spacy
         
-        # Common symptoms
-        symptoms = [
-            "fever", "pain", "headache", "nausea", "vomiting", "dizziness",
-            "fatigue", "weakness", "shortness of breath", "chest pain",
-            "abdominal pain", "back pain", "cough", "sore throat",
-            "diarrhea", "constipation", "rash", "swelling", "bleeding"
-        ]
+        tokenizer = self.nlp.tokenizer
         
-        # Common medications
-        medications = [
-            "aspirin", "ibuprofen", "acetaminophen", "paracetamol",
-            "amoxicillin", "penicillin", "metformin", "insulin",
-            "lisinopril", "atorvastatin", "omeprazole", "warfarin"
-        ]
+        def tokenize_many(terms):
+            return ([t.lower_ for t in doc] for doc in tokenizer.pipe(terms))
         
-        # Common procedures
-        procedures = [
-            "x-ray", "CT scan", "MRI", "ultrasound", "blood test",
-            "biopsy", "surgery", "ECG", "EKG", "echocardiogram"
-        ]
-        
-        # Add patterns to matchers
-        symptom_patterns = [self.nlp.make_doc(text) for text in symptoms]
-        medication_patterns = [self.nlp.make_doc(text) for text in medications]
-        procedure_patterns = [self.nlp.make_doc(text) for text in procedures]
-        
-        self.symptom_matcher.add("SYMPTOM", symptom_patterns)
-        self.medication_matcher.add("MEDICATION", medication_patterns)
-        self.procedure_matcher.add("PROCEDURE", procedure_patterns)
+        # Cached tries are only valid for the tokenizer that produced them
+        tokenizer_id = f"spacy-{spacy.__version__}:{self.nlp.meta.get('name')}-{self.nlp.meta.get('version')}"
+        self.vocabulary = MedicalVocabulary.load(tokenize_many, tokenizer_id)
     
     def extract_entities(self, text: str) -> Dict[str, List[Dict]]:
         if not self.nlp:
             return {}
         
-        doc = self.nlp(text)
-        
-        entities = {
-            "symptoms": [],
-            "medications": [],
-            "procedures": [],
-            "lab_values": []
-        }
+        doc = self.nlp.make_doc(text) if self.tokenizer_only else self.nlp(text)
         
-        # Use phrase matchers for specific medical terms
-        symptom_matches = self.symptom_matcher(doc)
-        for match_id, start, end in symptom_matches:
-            entities["symptoms"].append({
-                "text": doc[start:end].text,
-                "start": doc[start].idx,
-                "end": doc[end-1].idx + len(doc[end-1])
-            })
+        return self._entities_from_doc(doc)
+    
+    def extract_entities_many(
+        self,
+        texts: Iterable[str],
+        batch_size: Optional[int] = None,
+        n_process: int = 1
+    ) -> List[Dict[str, List[Dict]]]:
+        """
+        Batched extract_entities over many texts via nlp.pipe.
+        
+        Results are in input order. `n_process` > 1 runs the pipeline in worker processes,
+        which pays off for large backfills rather than live requests.
+        """
+        if not self.nlp:
+            return [{} for _ in texts]
+        
+        docs = self.nlp.pipe(
+            texts,
+            batch_size=batch_size or self.batch_size,
+            n_process=n_process
+        )
+        return [self._entities_from_doc(doc) for doc in docs]
+    
+    def _entities_from_doc(self, doc) -> Dict[str, List[Dict]]:
+        text = doc.text
         
-        medication_matches = self.medication_matcher(doc)
-        for match_id, start, end in medication_matches:
-            entities["medications"].append({
-                "text": doc[start:end].text,
-                "start": doc[start].idx,
-                "end": doc[end-1].idx + len(doc[end-1])
-            })
+        entities = {category: [] for category in self.vocabulary.categories}
+        entities["lab_values"] = []
         
-        procedure_matches = self.procedure_matcher(doc)
-        for match_id, start, end in procedure_matches:
-            entities["procedures"].append({
+        # Vocabulary terms, matched on lowercased tokens
+        for category, start, end in self.vocabulary.match([t.lower_ for t in doc]):
+            entities[category].append({
                 "text": doc[start:end].text,
                 "start": doc[start].idx,
                 "end": doc[end-1].idx + len(doc[end-1])
@@ -107,25 +121,14 @@ class MedicalNER:
         return entities
     
     def _extract_lab_values(self, text: str) -> List[Dict]:
-        lab_values = []
-        
-        # Pattern for lab values: number + unit
-        patterns = [
-            r'\d+/\d+\s*mmHg',  # Blood pressure
-            r'\d+\.?\d*\s*°?[FC]',  # Temperature
-            r'\d+\.?\d*\s*(?:mg/dL|mmol/L|g/dL|%|bpm|kg|lbs)',  # Various units
+        return [
+            {
+                "text": match.group(),
+                "start": match.start(),
+                "end": match.end()
+            }
+            for match in LAB_VALUE_PATTERN.finditer(text)
         ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                lab_values.append({
-                    "text": match.group(),
-                    "start": match.start(),
-                    "end": match.end()
-                })
-        
-        return lab_values
     
     def _deduplicate_entities(self, entities: List[Dict]) -> List[Dict]:
         seen = set()
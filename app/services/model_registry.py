@@ -0,0 +1,146 @@
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Lazily constructed, process-wide model services.
+
+    Nothing is loaded at import time: a service is built on first `get`, by a
+    background `warm_up`, or eagerly via `preload`.
+
+    `preload(fork_safe_only=True)` may run before a pre-forking server forks its
+    workers (gunicorn --preload): only services registered `fork_safe` are built
+    then, so in-process state such as the spaCy pipeline is shared copy-on-write.
+    Services that own processes or threads (the Whisper inference pool) are not
+    fork safe; each worker builds its own after the fork. Their weights are shared
+    across inference processes by mmap-ing the checkpoint (asr_backends), not by fork.
+
+    Only `required` services gate readiness; an optional one that fails to load
+    (analysis without GROQ_API_KEY) leaves the API degraded, not unready.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._status: Dict[str, Dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._fork_safe: Dict[str, bool] = {}
+        self._required: Dict[str, bool] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], fork_safe: bool = True, required: bool = True):
+        self._factories[name] = factory
+        self._fork_safe[name] = fork_safe
+        self._required[name] = required
+        self._locks[name] = threading.Lock()
+        self._status[name] = {"state": "not_loaded", "load_seconds": None, "error": None}
+
+    def get(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        if name not in self._factories:
+            raise KeyError(f"Unknown model service '{name}'")
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._instances:
+                return self._instances[name]
+
+            self._status[name].update(state="loading", error=None)
+            start = time.perf_counter()
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                logger.error(f"Failed to load model service '{name}': {str(e)}")
+                self._status[name].update(state="failed", error=str(e))
+                raise
+
+            self._instances[name] = instance
+            self._status[name].update(state="ready", load_seconds=round(time.perf_counter() - start, 2))
+            logger.info(f"Model service '{name}' ready in {self._status[name]['load_seconds']}s")
+            return instance
+
+    async def aget(self, name: str) -> Any:
+        """Awaitable `get`; a cold load runs in a thread instead of on the event loop."""
+        if name in self._instances:
+            return self._instances[name]
+        return await asyncio.to_thread(self.get, name)
+
+    def peek(self, name: str) -> Optional[Any]:
+        """Return the service only if it is already loaded."""
+        return self._instances.get(name)
+
+    def preload(self, names: Optional[List[str]] = None, fork_safe_only: bool = False):
+        for name in names or list(self._factories):
+            if fork_safe_only and not self._fork_safe[name]:
+                logger.info(f"Model service '{name}' is not fork safe; each worker loads it after forking")
+                continue
+            try:
+                self.get(name)
+            except Exception:
+                # Already recorded in status; readiness reports it
+                pass
+
+    def warm_up(self, names: Optional[List[str]] = None) -> threading.Thread:
+        thread = threading.Thread(target=self.preload, args=(names,), name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self) -> bool:
+        return all(
+            status["state"] == "ready"
+            for name, status in self._status.items()
+            if self._required[name]
+        )
+
+    def is_degraded(self) -> bool:
+        """An optional service failed to load; the required ones may still be fine."""
+        return any(
+            status["state"] == "failed"
+            for name, status in self._status.items()
+            if not self._required[name]
+        )
+
+    def status(self) -> Dict[str, Dict]:
+        return {name: dict(status, required=self._required[name]) for name, status in self._status.items()}
+
+    def shutdown(self):
+        for instance in self._instances.values():
+            if hasattr(instance, "shutdown"):
+                instance.shutdown()
+
+
+def _load_transcription_service():
+    from .transcription_service import TranscriptionService
+
+    service = TranscriptionService(model_size=os.getenv("WHISPER_MODEL_SIZE", "base"))
+    # Ready means the inference workers have their models loaded, not just configured
+    service.warm_up()
+    return service
+
+
+def _load_analysis_service():
+    from .analysis_service import AnalysisService
+
+    return AnalysisService()
+
+
+def _load_medical_ner():
+    from .medical_ner import MedicalNER
+
+    return MedicalNER()
+
+
+registry = ModelRegistry()
+# Starts spawned inference processes (and executor threads), which do not survive a fork
+registry.register("transcription", _load_transcription_service, fork_safe=False)
+# Needs GROQ_API_KEY; transcription keeps working without it
+registry.register("analysis", _load_analysis_service, required=False)
+registry.register("medical_ner", _load_medical_ner)
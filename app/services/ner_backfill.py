@@ -0,0 +1,73 @@
+
+"""
+Extract medical entities for stored transcriptions in bulk.
+
+    python -m app.services.ner_backfill --output entities.jsonl --n-process 4
+
+Writes one {"transcription_id": ..., "entities": {...}} object per line for every
+transcription with text, reading the table in id-ordered pages.
+"""
+import sys
+import json
+import time
+import argparse
+from typing import Iterator, List, Tuple
+
+from ..database import SessionLocal
+from ..models.transcription import transcriptions
+from .medical_ner import MedicalNER
+
+
+def iter_transcriptions(page_size: int, start_id: int = 0) -> Iterator[List[Tuple[int, str]]]:
+    last_id = start_id
+    while True:
+        with SessionLocal() as db:
+            page = (
+                db.query(transcriptions.id, transcriptions.transcription_text)
+                .filter(transcriptions.id > last_id, transcriptions.transcription_text.isnot(None))
+                .order_by(transcriptions.id.asc())
+                .limit(page_size)
+                .all()
+            )
+        if not page:
+            return
+        yield [(row.id, row.transcription_text) for row in page]
+        last_id = page[-1].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill medical entities for stored transcriptions")
+    parser.add_argument("--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--page-size", type=int, default=2000, help="Transcriptions read per query")
+    parser.add_argument("--batch-size", type=int, default=256, help="nlp.pipe batch size")
+    parser.add_argument("--n-process", type=int, default=1, help="spaCy worker processes")
+    parser.add_argument("--start-id", type=int, default=0, help="Resume after this transcription id")
+    args = parser.parse_args()
+
+    ner = MedicalNER()
+    out = sys.stdout if args.output == "-" else open(args.output, "a")
+
+    start = time.perf_counter()
+    processed = 0
+    try:
+        for page in iter_transcriptions(args.page_size, args.start_id):
+            ids = [transcription_id for transcription_id, _ in page]
+            results = ner.extract_entities_many(
+                (text for _, text in page),
+                batch_size=args.batch_size,
+                n_process=args.n_process
+            )
+            for transcription_id, entities in zip(ids, results):
+                out.write(json.dumps({"transcription_id": transcription_id, "entities": entities}) + "\n")
+            out.flush()
+
+            processed += len(page)
+            elapsed = time.perf_counter() - start
+            print(f"{processed} transcriptions ({processed / elapsed:.0f}/s), last id {ids[-1]}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
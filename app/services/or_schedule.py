@@ -0,0 +1,402 @@
+
+import os
+import time
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, select, update, insert, inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models.surgery import surgeries, SurgeryStatus
+from ..models.or_schedule_version import or_schedule_version
+from .dashboard_rollup import scheduled_start, surgery_interval
+
+logger = logging.getLogger(__name__)
+
+# Surgery columns that move a booking between rooms/times
+_BOOKING_FIELDS = (
+    "status", "operating_room_id", "scheduled_date", "scheduled_time",
+    "duration_minutes", "actual_start_time", "actual_end_time",
+)
+
+_PENDING_KEY = "or_schedule"
+
+
+class Booking(NamedTuple):
+    start: datetime
+    end: datetime
+    surgery_id: int
+
+
+def booking_interval(scheduled_date, scheduled_time, duration_minutes) -> Optional[Tuple[datetime, datetime]]:
+    """Requested [start, end) of a booking: scheduled start + duration."""
+    if not duration_minutes or int(duration_minutes) <= 0:
+        return None
+    start = scheduled_start(scheduled_date, scheduled_time)
+    if start is None:
+        return None
+    return start, start + timedelta(minutes=int(duration_minutes))
+
+
+def _days_touched(start: datetime, end: datetime) -> List[date]:
+    last = (end - timedelta(microseconds=1)).date()
+    return [start.date() + timedelta(days=i) for i in range((last - start.date()).days + 1)]
+
+
+class DaySchedule:
+    """
+    Bookings of one room on one day, sorted by start.
+
+    `max_end[i]` is the latest end among the first i+1 bookings, so a conflict
+    check is one bisect plus one comparison, even if legacy data overlaps.
+    """
+
+    __slots__ = ("bookings", "starts", "max_end", "loaded_at", "version")
+
+    def __init__(self, bookings: List[Booking], loaded_at: float, version: int):
+        self.loaded_at = loaded_at
+        self.version = version  # room's or_schedule_version when loaded
+        self._reindex(sorted(bookings))
+
+    def _reindex(self, bookings: List[Booking]):
+        self.bookings = bookings
+        self.starts = [b.start for b in bookings]
+        self.max_end = list(accumulate((b.end for b in bookings), max))
+
+    def add(self, booking: Booking):
+        bookings = list(self.bookings)
+        bisect.insort(bookings, booking)
+        self._reindex(bookings)
+
+    def remove(self, surgery_id: int):
+        if any(b.surgery_id == surgery_id for b in self.bookings):
+            self._reindex([b for b in self.bookings if b.surgery_id != surgery_id])
+
+    def conflict(self, start: datetime, end: datetime, exclude_id: Optional[int] = None) -> Optional[Booking]:
+        i = bisect.bisect_left(self.starts, end)  # bookings starting before `end`
+        if i == 0 or self.max_end[i - 1] <= start:
+            return None
+        for booking in reversed(self.bookings[:i]):
+            if booking.end > start and booking.surgery_id != exclude_id:
+                return booking
+        return None
+
+    def gaps(self, window_start: datetime, window_end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        """Free [start, end) stretches inside the window."""
+        cursor = window_start
+        for booking in self.bookings:
+            if booking.start >= window_end:
+                break
+            if booking.end <= cursor:
+                continue
+            if booking.start > cursor:
+                yield cursor, booking.start
+            cursor = max(cursor, booking.end)
+        if cursor < window_end:
+            yield cursor, window_end
+
+
+class ScheduleIndex:
+    """
+    In-memory interval index of operating-room bookings, per (room, day).
+
+    A surgery occupies its actual start/end when both are recorded, otherwise
+    scheduled start + duration; cancelled surgeries occupy nothing. Room-days
+    are loaded lazily and updated in place when a session commits surgery changes.
+
+    Every ORM write touching a room bumps its row in `or_schedule_version` in the
+    same transaction, so each lookup first reads the rooms' versions (one primary
+    key query) and reloads only the room-days loaded at an older version, i.e.
+    written by another process since. Writes that bypass the ORM are picked up
+    after `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._days: Dict[Tuple[int, date], DaySchedule] = {}
+        self._placement: Dict[int, Set[Tuple[int, date]]] = defaultdict(set)
+        self._lock = threading.RLock()
+        # Held by the surgery routes across check + commit, so requests in this
+        # process queue here instead of on the database lock (see lock_room)
+        self.booking_lock = threading.Lock()
+        self._installed = False
+
+    # ---------- Loading ----------
+    @staticmethod
+    def _room_versions(db, room_ids: List[int]) -> Dict[int, int]:
+        rows = db.execute(
+            select(or_schedule_version.room_id, or_schedule_version.version)
+            .where(or_schedule_version.room_id.in_(room_ids))
+        ).all()
+        versions = {room_id: 0 for room_id in room_ids}
+        versions.update({row.room_id: row.version for row in rows})
+        return versions
+
+    def _is_stale(self, key: Tuple[int, date], version: int, now: float) -> bool:
+        schedule = self._days.get(key)
+        return (
+            schedule is None
+            or schedule.version != version
+            or now - schedule.loaded_at > self.ttl_seconds
+        )
+
+    def ensure(self, db, room_ids: List[int], days: List[date]):
+        """Load the schedules of `room_ids` x `days` that are missing or stale, in one query."""
+        # Versions are read before the bookings: a write landing in between leaves
+        # the room-day at the older version, so the next lookup reloads it
+        versions = self._room_versions(db, room_ids)
+        now = time.monotonic()
+        with self._lock:
+            missing = [
+                (room_id, day) for room_id in room_ids for day in days
+                if self._is_stale((room_id, day), versions[room_id], now)
+            ]
+        if not missing:
+            return
+
+        lo = min(day for _, day in missing)
+        hi = max(day for _, day in missing)
+        rooms = sorted({room_id for room_id, _ in missing})
+        # Bookings that start the day before can run past midnight
+        rows = db.execute(
+            select(
+                surgeries.id, surgeries.operating_room_id, surgeries.scheduled_date, surgeries.scheduled_time,
+                surgeries.duration_minutes, surgeries.actual_start_time, surgeries.actual_end_time,
+            )
+            .where(surgeries.status != SurgeryStatus.cancelled)
+            .where(surgeries.operating_room_id.in_(rooms))
+            .where(
+                surgeries.scheduled_date.between(lo - timedelta(days=1), hi) |
+                surgeries.actual_start_time.between(
+                    datetime.combine(lo - timedelta(days=1), datetime.min.time()),
+                    datetime.combine(hi, datetime.max.time()),
+                )
+            )
+        ).all()
+
+        grouped: Dict[Tuple[int, date], List[Booking]] = defaultdict(list)
+        for row in rows:
+            interval = surgery_interval(row)
+            if interval is None or interval[1] <= interval[0]:
+                continue
+            for day in _days_touched(*interval):
+                grouped[(row.operating_room_id, day)].append(Booking(interval[0], interval[1], row.id))
+
+        loaded_at = time.monotonic()
+        with self._lock:
+            for key in missing:
+                bookings = grouped.get(key, [])
+                self._days[key] = DaySchedule(bookings, loaded_at, versions[key[0]])
+                for booking in bookings:
+                    self._placement[booking.surgery_id].add(key)
+
+    # ---------- Queries ----------
+    def find_conflict(
+        self,
+        db,
+        room_id: int,
+        start: datetime,
+        end: datetime,
+        exclude_id: Optional[int] = None
+    ) -> Optional[Booking]:
+        """First booking of `room_id` overlapping [start, end), other than `exclude_id`."""
+        if end <= start:
+            return None
+        days = _days_touched(start, end)
+        self.ensure(db, [room_id], days)
+        with self._lock:
+            for day in days:
+                booking = self._days[(room_id, day)].conflict(start, end, exclude_id)
+                if booking is not None:
+                    return booking
+        return None
+
+    def free_slots(
+        self,
+        db,
+        rooms: List[Tuple[int, str]],
+        duration: timedelta,
+        days: List[date],
+        day_start,
+        day_end,
+        not_before: Optional[datetime] = None,
+        limit: int = 20
+    ) -> List[dict]:
+        """Earliest free stretches of at least `duration`, across `rooms`, inside each day's window."""
+        self.ensure(db, [room_id for room_id, _ in rooms], days)
+        slots: List[dict] = []
+        with self._lock:
+            for day in days:
+                window_start = datetime.combine(day, day_start)
+                window_end = datetime.combine(day, day_end)
+                if not_before is not None:
+                    window_start = max(window_start, not_before)
+                if window_end - window_start < duration:
+                    continue
+
+                day_slots = []
+                for room_id, room_number in rooms:
+                    for gap_start, gap_end in self._days[(room_id, day)].gaps(window_start, window_end):
+                        if gap_end - gap_start >= duration:
+                            day_slots.append({
+                                "room_id": room_id,
+                                "room_number": room_number,
+                                "start": gap_start,
+                                "end": gap_start + duration,
+                                "available_until": gap_end,
+                            })
+                day_slots.sort(key=lambda s: (s["start"], s["room_id"]))
+                slots.extend(day_slots)
+                if len(slots) >= limit:
+                    break
+        return slots[:limit]
+
+    # ---------- Keeping in sync with writes ----------
+    def apply(
+        self,
+        changes: Dict[int, Optional[Tuple[int, datetime, datetime]]],
+        versions: Optional[Dict[int, Tuple[int, int]]] = None
+    ):
+        """
+        Move committed surgeries to their new (room, interval), or drop them (None).
+
+        `versions` maps room id -> (version after the commit, bumps it made). Cached
+        room-days that were current just before the commit are current after it.
+        """
+        with self._lock:
+            for room_id, (version, bumps) in (versions or {}).items():
+                for (key_room, _), schedule in self._days.items():
+                    if key_room == room_id and schedule.version == version - bumps:
+                        schedule.version = version
+            for surgery_id, placement in changes.items():
+                for key in self._placement.pop(surgery_id, ()):
+                    schedule = self._days.get(key)
+                    if schedule is not None:
+                        schedule.remove(surgery_id)
+                if placement is None:
+                    continue
+                room_id, start, end = placement
+                booking = Booking(start, end, surgery_id)
+                for day in _days_touched(start, end):
+                    schedule = self._days.get((room_id, day))
+                    if schedule is not None:  # days not loaded yet pick it up when loaded
+                        schedule.add(booking)
+                        self._placement[surgery_id].add((room_id, day))
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self._placement.clear()
+
+    @staticmethod
+    def _bump_versions(conn, room_ids: List[int]) -> Dict[int, int]:
+        """Increment the rooms' schedule versions (sorted, so writers lock rows in one order)."""
+        dialect = conn.dialect.name
+        for room_id in room_ids:
+            if dialect in ("sqlite", "postgresql"):
+                stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(or_schedule_version).values(room_id=room_id, version=1)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["room_id"], set_={"version": or_schedule_version.version + 1}
+                )
+                conn.execute(stmt)
+                continue
+            result = conn.execute(
+                update(or_schedule_version)
+                .where(or_schedule_version.room_id == room_id)
+                .values(version=or_schedule_version.version + 1)
+            )
+            if result.rowcount == 0:
+                conn.execute(insert(or_schedule_version).values(room_id=room_id, version=1))
+        rows = conn.execute(
+            select(or_schedule_version.room_id, or_schedule_version.version)
+            .where(or_schedule_version.room_id.in_(room_ids))
+        ).all()
+        return {row.room_id: row.version for row in rows}
+
+    @staticmethod
+    def lock_room(db, room_id: int):
+        """
+        Lock the room's version row until the transaction ends, so a booking check +
+        insert in another process (uvicorn worker) waits for this one to commit and
+        then sees its booking. Call before the conflict check.
+
+        The row is created at version 0 if missing (the value lookups assume then),
+        and locked with a no-op UPDATE: a row lock on Postgres, and the database
+        write lock on SQLite, where SELECT ... FOR UPDATE does nothing.
+        """
+        conn = db.connection()
+        dialect = conn.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(or_schedule_version).values(room_id=room_id, version=0)
+            conn.execute(stmt.on_conflict_do_nothing(index_elements=["room_id"]))
+        else:
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(or_schedule_version).values(room_id=room_id, version=0))
+            except IntegrityError:
+                pass
+        conn.execute(
+            update(or_schedule_version)
+            .where(or_schedule_version.room_id == room_id)
+            .values(version=or_schedule_version.version)
+        )
+
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault(_PENDING_KEY, {"changes": {}, "versions": {}})
+        changes = pending["changes"]
+        rooms: Set[int] = set()
+        for obj in session.deleted:
+            if isinstance(obj, surgeries):
+                changes[obj.id] = None
+                if obj.operating_room_id is not None:
+                    rooms.add(obj.operating_room_id)
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, surgeries):
+                continue
+            if obj in session.dirty:
+                state = sa_inspect(obj)
+                if not any(state.attrs[f].history.has_changes() for f in _BOOKING_FIELDS):
+                    continue
+                # The room it moved out of changes too
+                rooms.update(r for r in state.attrs["operating_room_id"].history.deleted if r is not None)
+            if obj.operating_room_id is not None:
+                rooms.add(obj.operating_room_id)
+            interval = surgery_interval(obj)
+            if obj.status == SurgeryStatus.cancelled or obj.operating_room_id is None or interval is None or interval[1] <= interval[0]:
+                changes[obj.id] = None
+            else:
+                changes[obj.id] = (obj.operating_room_id, interval[0], interval[1])
+
+        if rooms:
+            versions = pending["versions"]
+            for room_id, version in self._bump_versions(session.connection(), sorted(rooms)).items():
+                bumps = versions[room_id][1] + 1 if room_id in versions else 1
+                versions[room_id] = (version, bumps)
+
+    def _after_commit(self, session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending and (pending["changes"] or pending["versions"]):
+            self.apply(pending["changes"], pending["versions"])
+
+    def _after_rollback(self, session, previous_transaction):
+        session.info.pop(_PENDING_KEY, None)
+
+    def install(self):
+        """Follow surgery writes made through any Session (sync or async)."""
+        if self._installed:
+            return
+        self._installed = True
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_soft_rollback", self._after_rollback)
+
+
+schedule_index = ScheduleIndex(ttl_seconds=float(os.getenv("OR_SCHEDULE_TTL_SECONDS", "60")))
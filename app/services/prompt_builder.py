@@ -0,0 +1,124 @@
+
+import re
+import math
+from typing import List, NamedTuple, Optional
+
+# Words (including numbers/units) and single punctuation marks
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local token estimate for budgeting (no tokenizer download, no API call).
+
+    Llama-style BPE vocabularies average roughly four characters per token on
+    English clinical text, with every punctuation mark its own token. The
+    estimate errs slightly high, which keeps assembled prompts under budget.
+    """
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep whole leading sentences up to `max_tokens`; cut mid-sentence only if the first one is too long."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    kept, used = [], 0
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+
+    if not kept:
+        words, used = [], 0
+        for word in text.split():
+            used += count_tokens(word)
+            if used > max_tokens - 1:
+                break
+            words.append(word)
+        return " ".join(words) + " …"
+    return " ".join(kept) + " …"
+
+
+def split_into_chunks(text: str, chunk_tokens: int) -> List[str]:
+    """Split on sentence boundaries into chunks of at most ~`chunk_tokens` tokens."""
+    chunks, current, used = [], [], 0
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if current and used + tokens > chunk_tokens:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class PromptSection(NamedTuple):
+    title: Optional[str]
+    body: str
+    priority: int            # lower = more important, kept first when the budget is tight
+    required: bool = False   # never shortened or dropped
+    min_tokens: int = 16     # a section that must be shortened below this is dropped instead
+
+
+class PromptBuilder:
+    """
+    Assemble a prompt from sections under a token budget.
+
+    Required sections are always kept. The rest are admitted by priority and
+    shortened to whatever budget is left; sections that would fall below their
+    `min_tokens` are dropped. Output keeps the order the sections were added in.
+    """
+
+    def __init__(self, budget_tokens: int):
+        self.budget_tokens = budget_tokens
+        self.sections: List[PromptSection] = []
+
+    def add(
+        self,
+        title: Optional[str],
+        body: str,
+        priority: int,
+        required: bool = False,
+        min_tokens: int = 16
+    ) -> "PromptBuilder":
+        if body:
+            self.sections.append(PromptSection(title, body, priority, required, min_tokens))
+        return self
+
+    def build(self) -> str:
+        return "\n\n".join(part for part in self._fit() if part)
+
+    def _fit(self) -> List[Optional[str]]:
+        rendered: List[Optional[str]] = [None] * len(self.sections)
+        remaining = self.budget_tokens
+
+        order = sorted(range(len(self.sections)), key=lambda i: (not self.sections[i].required, self.sections[i].priority, i))
+        for i in order:
+            section = self.sections[i]
+            header = f"{section.title}\n" if section.title else ""
+            header_tokens = count_tokens(header)
+
+            if section.required:
+                body = section.body
+            else:
+                body = truncate_to_tokens(section.body, remaining - header_tokens)
+                if not body or (body != section.body and count_tokens(body) < section.min_tokens):
+                    continue
+
+            rendered[i] = f"{header}{body}"
+            remaining -= header_tokens + count_tokens(body)
+        return rendered
@@ -0,0 +1,96 @@
+"""
+Polyphase FIR resampling to Whisper's 16 kHz.
+
+Same algorithm as scipy.signal.resample_poly (upsample by `up`, Kaiser-windowed
+sinc low-pass, downsample by `down`), computed one polyphase branch per output
+sample so the zero-stuffed signal is never built. The low-pass removes content
+above the new Nyquist instead of folding it back into the speech band, and the
+resampler keeps its input history between calls, so a stream resampled frame
+by frame equals the whole recording resampled at once (no seams at chunk edges).
+"""
+import math
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+# Filter half-length in zero crossings of the sinc, and the Kaiser window shape
+# (resample_poly's defaults)
+ZERO_CROSSINGS = 10
+KAISER_BETA = 5.0
+
+
+@lru_cache(maxsize=16)
+def _polyphase_bank(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """Filter split into `up` branches: bank[p, k] = h[p + k * up]; plus the filter's centre tap."""
+    max_rate = max(up, down)
+    half_len = ZERO_CROSSINGS * max_rate
+    n = np.arange(-half_len, half_len + 1)
+    cutoff = 1.0 / max_rate  # new Nyquist, as a fraction of the upsampled Nyquist
+    h = np.sinc(cutoff * n) * np.kaiser(n.size, KAISER_BETA)
+    h *= up / h.sum()  # unity DC gain after zero-stuffing
+
+    taps = -(-h.size // up)
+    h = np.concatenate([h, np.zeros(taps * up - h.size)])
+    return h.reshape(taps, up).T.copy(), half_len
+
+
+class StreamResampler:
+    """Resample a stream from `orig_rate` to `target_rate`, chunk by chunk."""
+
+    def __init__(self, orig_rate: int, target_rate: int = 16000):
+        if orig_rate <= 0 or target_rate <= 0:
+            raise ValueError(f"Invalid sample rates: {orig_rate} -> {target_rate}")
+        g = math.gcd(orig_rate, target_rate)
+        self.orig_rate = orig_rate
+        self.target_rate = target_rate
+        self.up = target_rate // g
+        self.down = orig_rate // g
+        self._bank, self._half_len = _polyphase_bank(self.up, self.down)
+        self._taps = self._bank.shape[1]
+
+        self._buffer = np.zeros(0, dtype=np.float64)
+        self._buffer_start = 0  # stream index of _buffer[0]
+        self._received = 0
+        self._emitted = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Output for `samples`, as far as it is determined by the input so far."""
+        if samples.size:
+            self._buffer = np.concatenate([self._buffer, samples.astype(np.float64, copy=False)])
+            self._received += samples.size
+        # Output n needs input up to (n * down + half_len) // up
+        ready = -(-(self._received * self.up - self._half_len) // self.down)
+        return self._emit(ready)
+
+    def flush(self) -> np.ndarray:
+        """Remaining output at the end of the stream (input beyond the end is silence)."""
+        return self._emit(-(-self._received * self.up // self.down))
+
+    def _emit(self, stop: int) -> np.ndarray:
+        if stop <= self._emitted:
+            return np.zeros(0, dtype=np.float32)
+
+        t = np.arange(self._emitted, stop, dtype=np.int64) * self.down + self._half_len
+        phase = t % self.up
+        inputs = (t // self.up)[:, None] - np.arange(self._taps)[None, :]
+        valid = (inputs >= 0) & (inputs < self._received)
+        local = np.clip(inputs - self._buffer_start, 0, max(self._buffer.size - 1, 0))
+        window = np.where(valid, self._buffer[local] if self._buffer.size else 0.0, 0.0)
+        out = np.einsum("ij,ij->i", self._bank[phase], window)
+
+        self._emitted = stop
+        # Keep only the history the next output still reaches back to
+        oldest = (self._emitted * self.down + self._half_len) // self.up - self._taps + 1
+        drop = min(max(0, oldest - self._buffer_start), self._buffer.size)
+        self._buffer = self._buffer[drop:]
+        self._buffer_start += drop
+        return out.astype(np.float32)
+
+
+def resample(samples: np.ndarray, orig_rate: int, target_rate: int = 16000) -> np.ndarray:
+    """Resample a whole signal (output length ceil(n * target / orig))."""
+    if orig_rate == target_rate or samples.size == 0:
+        return samples.astype(np.float32, copy=False)
+    resampler = StreamResampler(orig_rate, target_rate)
+    return np.concatenate([resampler.process(samples), resampler.flush()])
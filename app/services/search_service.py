@@ -0,0 +1,221 @@
+
+import os
+import re
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import text, or_, false
+from sqlalchemy.exc import OperationalError
+
+from ..database import engine
+from ..models.note import notes
+from ..models.transcription import transcriptions
+from ..models.notification import notifications
+from ..models.surgery import surgeries
+
+logger = logging.getLogger(__name__)
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Snippet markers around matched terms
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+
+class SearchTarget(NamedTuple):
+    model: type
+    columns: List[str]
+
+
+SEARCH_TARGETS: Dict[str, SearchTarget] = {
+    "notes": SearchTarget(notes, ["title", "content"]),
+    "transcriptions": SearchTarget(transcriptions, ["transcription_text"]),
+    "notifications": SearchTarget(notifications, ["title", "message"]),
+    "surgeries": SearchTarget(surgeries, ["procedure_name", "surgery_type"]),
+}
+
+
+class SearchService:
+    """
+    Full-text search over the SEARCH_TARGETS tables.
+
+    SQLite: one external-content FTS5 table per target (`<table>_fts`), kept in
+    sync by insert/update/delete triggers, with prefix indexes for
+    search-as-you-type. Postgres: a GIN index on the `to_tsvector` expression of
+    the searched columns. Any other backend (or SQLite without FTS5) falls back
+    to ilike so search keeps working, just without an index.
+    """
+
+    def __init__(self, engine, language: str = "english"):
+        self.engine = engine
+        self.language = language
+        self.backend = "like"
+
+    def install(self):
+        """Create the indexes/triggers if missing; safe to run at every startup."""
+        dialect = self.engine.dialect.name
+        try:
+            if dialect == "sqlite":
+                self._install_sqlite()
+                self.backend = "fts5"
+            elif dialect == "postgresql":
+                self._install_postgres()
+                self.backend = "tsvector"
+        except OperationalError as e:
+            logger.warning(f"Full-text search unavailable, using LIKE: {str(e)}")
+            self.backend = "like"
+        logger.info(f"Search backend: {self.backend}")
+
+    def _install_sqlite(self):
+        with self.engine.begin() as conn:
+            for target in SEARCH_TARGETS.values():
+                table = target.model.__tablename__
+                fts = f"{table}_fts"
+                cols = ", ".join(target.columns)
+                new_cols = ", ".join(f"new.{c}" for c in target.columns)
+                old_cols = ", ".join(f"old.{c}" for c in target.columns)
+
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+                ).first()
+                if exists:
+                    continue
+
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                    f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+                ))
+                # Index rows that existed before the FTS table
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+                logger.info(f"Created FTS5 index {fts}")
+
+    def _install_postgres(self):
+        with self.engine.begin() as conn:
+            for target in SEARCH_TARGETS.values():
+                table = target.model.__tablename__
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_fts ON {table} USING GIN ({self._tsvector(target)})"
+                ))
+
+    def _tsvector(self, target: SearchTarget) -> str:
+        # Must match the indexed expression exactly for Postgres to use the index
+        document = " || ' ' || ".join(f"coalesce({c}, '')" for c in target.columns)
+        return f"to_tsvector('{self.language}', {document})"
+
+    @staticmethod
+    def _terms(query: str) -> List[str]:
+        return _TERM_PATTERN.findall(query.lower())
+
+    def _match_expression(self, query: str) -> Optional[str]:
+        """All terms must match; the last one as a prefix (the word being typed)."""
+        terms = self._terms(query)
+        if not terms:
+            return None
+        if self.backend == "fts5":
+            return " ".join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*'
+        return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+    def filter_clause(self, target_name: str, query: str):
+        """WHERE clause restricting `target_name` rows to those matching `query`."""
+        target = SEARCH_TARGETS[target_name]
+        model = target.model
+        match = self._match_expression(query)
+
+        if self.backend == "fts5" and match:
+            fts = f"{model.__tablename__}_fts"
+            return model.id.in_(
+                text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :fts_query").bindparams(fts_query=match)
+            )
+        if self.backend == "tsvector" and match:
+            return text(
+                f"{self._tsvector(target)} @@ to_tsquery('{self.language}', :fts_query)"
+            ).bindparams(fts_query=match)
+
+        if not query.strip():
+            return false()
+        like = f"%{query}%"
+        return or_(*(getattr(model, c).ilike(like) for c in target.columns))
+
+    def search(self, db, target_name: str, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Ranked matches with a highlighted snippet: [{"id", "rank", "snippet"}]."""
+        target = SEARCH_TARGETS[target_name]
+        table = target.model.__tablename__
+        match = self._match_expression(query)
+        if match is None:
+            return []
+
+        if self.backend == "fts5":
+            fts = f"{table}_fts"
+            sql = (
+                f"SELECT rowid AS id, -bm25({fts}) AS rank, "
+                f"snippet({fts}, -1, :hl_start, :hl_end, '…', 16) AS snippet "
+                f"FROM {fts} WHERE {fts} MATCH :fts_query ORDER BY bm25({fts}) LIMIT :limit OFFSET :offset"
+            )
+        elif self.backend == "tsvector":
+            document = " || ' ' || ".join(f"coalesce({c}, '')" for c in target.columns)
+            tsquery = f"to_tsquery('{self.language}', :fts_query)"
+            sql = (
+                f"SELECT id, ts_rank({self._tsvector(target)}, {tsquery}) AS rank, "
+                f"ts_headline('{self.language}', {document}, {tsquery}, "
+                f"'StartSel=' || :hl_start || ', StopSel=' || :hl_end || ', MaxWords=24, MinWords=8') AS snippet "
+                f"FROM {table} WHERE {self._tsvector(target)} @@ {tsquery} "
+                f"ORDER BY rank DESC LIMIT :limit OFFSET :offset"
+            )
+        else:
+            rows = (
+                db.query(target.model)
+                .filter(self.filter_clause(target_name, query))
+                .order_by(target.model.id.desc())
+                .offset(offset)
+                .limit(limit)
+                .all()
+            )
+            return [
+                {"id": row.id, "rank": None, "snippet": self._plain_snippet(row, target, query)}
+                for row in rows
+            ]
+
+        result = db.execute(text(sql), {
+            "fts_query": match,
+            "hl_start": HIGHLIGHT_START,
+            "hl_end": HIGHLIGHT_END,
+            "limit": limit,
+            "offset": offset,
+        })
+        return [
+            {"id": row.id, "rank": round(float(row.rank), 4), "snippet": row.snippet}
+            for row in result
+        ]
+
+    @staticmethod
+    def _plain_snippet(row, target: SearchTarget, query: str, width: int = 60) -> Optional[str]:
+        needle = query.strip().lower()
+        for column in target.columns:
+            value = getattr(row, column) or ""
+            pos = value.lower().find(needle)
+            if pos >= 0:
+                start = max(0, pos - width)
+                end = min(len(value), pos + len(needle) + width)
+                return (
+                    ("…" if start else "") + value[start:pos] + HIGHLIGHT_START
+                    + value[pos:pos + len(needle)] + HIGHLIGHT_END + value[pos + len(needle):end]
+                    + ("…" if end < len(value) else "")
+                )
+        return None
+
+
+# Installed at startup (app/main.py) once the tables exist
+search_service = SearchService(engine, language=os.getenv("SEARCH_LANGUAGE", "english"))
@@ -0,0 +1,205 @@
+
+import re
+import bisect
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingTranscriber:
+    """
+    Per-session streaming decoder over a rolling audio buffer.
+
+    Each call re-decodes only the uncommitted tail of the audio (plus a short
+    overlap) and commits the words two consecutive hypotheses agree on
+    (LocalAgreement-2). Committed text is fed back to Whisper as `initial_prompt`.
+
+    Internally times are stream time, i.e. seconds of audio inserted so far. When
+    the inserted audio is VAD-trimmed speech, `insert_audio(audio, audio_start)`
+    records where each piece sits in the recording, and the reported
+    committed_start/committed_end are mapped back to recording time.
+    """
+
+    SAMPLE_RATE = 16000
+
+    def __init__(
+        self,
+        transcription_service,
+        language: str = "en",
+        overlap_seconds: float = 1.0,
+        max_buffer_seconds: float = 20.0,
+        prompt_chars: int = 200
+    ):
+        self.transcription_service = transcription_service
+        self.language = language
+        self.overlap_seconds = overlap_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+        self.prompt_chars = prompt_chars
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0      # stream time (s) of buffer[0]
+        self.committed_until = 0.0    # stream time (s) where the last committed word ends
+        self.committed_words: List[Dict] = []
+        self.hypothesis: List[Dict] = []
+
+        # Inserted pieces: stream time of each piece's start -> its recording time
+        self.stream_seconds = 0.0
+        self._piece_stream_starts: List[float] = []
+        self._piece_audio_starts: List[float] = []
+
+    @property
+    def committed_text(self) -> str:
+        return self._join(self.committed_words)
+
+    @property
+    def partial_text(self) -> str:
+        return self._join(self.hypothesis)
+
+    def insert_audio(self, audio: np.ndarray, audio_start: Optional[float] = None):
+        """Append audio; `audio_start` is its recording time when earlier audio was dropped (VAD)."""
+        if audio_start is not None:
+            self._piece_stream_starts.append(self.stream_seconds)
+            self._piece_audio_starts.append(audio_start)
+        self.buffer = np.concatenate([self.buffer, audio.astype(np.float32, copy=False)])
+        self.stream_seconds += audio.size / self.SAMPLE_RATE
+
+    def to_audio_time(self, stream_time: float, is_end: bool = False) -> float:
+        """Recording time of a stream time; an end exactly on a piece boundary stays in the earlier piece."""
+        if not self._piece_stream_starts:
+            return stream_time
+        find = bisect.bisect_left if is_end else bisect.bisect_right
+        index = max(0, find(self._piece_stream_starts, stream_time) - 1)
+        return self._piece_audio_starts[index] + (stream_time - self._piece_stream_starts[index])
+
+    async def process(self) -> Dict:
+        """Decode the current buffer and return the newly committed and pending text."""
+        if self.buffer.size == 0:
+            return self._update([], confidence=0.0)
+
+        result = await self.transcription_service.transcribe_audio_async(
+            self.buffer,
+            self.language,
+            initial_prompt=self.committed_text[-self.prompt_chars:] or None,
+            word_timestamps=True,
+            skip_silence=False  # chunks are already gated by the session VAD
+        )
+        if not result["success"]:
+            return result
+
+        words = self._new_words(self._extract_words(result.get("segments", [])))
+        committed = self._agreed_prefix(self.hypothesis, words)
+        self.hypothesis = words[len(committed):]
+
+        # Never let an unstable tail grow without bound
+        if self.hypothesis and self._buffer_seconds() > self.max_buffer_seconds:
+            committed = committed + self.hypothesis
+            self.hypothesis = []
+
+        self._commit(committed)
+        self._trim_buffer()
+
+        return self._update(committed, confidence=result.get("confidence", 0.0))
+
+    def process_skipped(self) -> Dict:
+        """Result for a chunk the VAD rejected: nothing decoded, nothing new committed."""
+        return self._update([], confidence=None)
+
+    def finish(self) -> Dict:
+        """Commit whatever is still pending; called after the final chunk was processed."""
+        committed = self.hypothesis
+        self.hypothesis = []
+        self._commit(committed)
+        self.buffer = np.zeros(0, dtype=np.float32)
+        return self._update(committed, confidence=None)
+
+    def _update(self, committed: List[Dict], confidence: Optional[float]) -> Dict:
+        return {
+            "success": True,
+            "committed": self._join(committed),
+            "committed_start": self.to_audio_time(committed[0]["start"]) if committed else None,
+            "committed_end": self.to_audio_time(committed[-1]["end"], is_end=True) if committed else None,
+            "partial": self.partial_text,
+            "committed_text": self.committed_text,
+            "confidence": confidence
+        }
+
+    def _extract_words(self, segments: List[Dict]) -> List[Dict]:
+        words = []
+        for segment in segments:
+            seg_words = segment.get("words")
+            if not seg_words:
+                seg_words = self._approximate_words(segment)
+            for word in seg_words:
+                text = word["word"].strip()
+                if text:
+                    words.append({
+                        "word": text,
+                        "start": self.buffer_offset + float(word["start"]),
+                        "end": self.buffer_offset + float(word["end"])
+                    })
+        return words
+
+    def _approximate_words(self, segment: Dict) -> List[Dict]:
+        # No word timings available: spread the segment span over its words by length
+        tokens = segment.get("text", "").split()
+        if not tokens:
+            return []
+        start, end = float(segment.get("start", 0.0)), float(segment.get("end", 0.0))
+        total = sum(len(t) for t in tokens)
+        words, cursor = [], start
+        for token in tokens:
+            span = (end - start) * len(token) / total
+            words.append({"word": token, "start": cursor, "end": cursor + span})
+            cursor += span
+        return words
+
+    def _new_words(self, words: List[Dict]) -> List[Dict]:
+        # Drop words that fall inside the already committed (overlap) region
+        words = [w for w in words if w["start"] >= self.committed_until - 0.1]
+
+        # The overlap can still re-emit the last few committed words; strip that n-gram
+        if words and self.committed_words:
+            for n in range(min(5, len(words), len(self.committed_words)), 0, -1):
+                tail = [self._normalize(w["word"]) for w in self.committed_words[-n:]]
+                head = [self._normalize(w["word"]) for w in words[:n]]
+                if tail == head:
+                    words = words[n:]
+                    break
+        return words
+
+    def _agreed_prefix(self, previous: List[Dict], current: List[Dict]) -> List[Dict]:
+        prefix = []
+        for old, new in zip(previous, current):
+            if self._normalize(old["word"]) != self._normalize(new["word"]):
+                break
+            prefix.append(new)
+        return prefix
+
+    def _commit(self, words: List[Dict]):
+        if not words:
+            return
+        self.committed_words.extend(words)
+        self.committed_until = max(self.committed_until, words[-1]["end"])
+
+    def _trim_buffer(self):
+        # Keep only the uncommitted tail plus `overlap_seconds` of context
+        cut_time = self.committed_until - self.overlap_seconds
+        if cut_time <= self.buffer_offset:
+            return
+        cut = int((cut_time - self.buffer_offset) * self.SAMPLE_RATE)
+        cut = min(cut, self.buffer.size)
+        self.buffer = self.buffer[cut:]
+        self.buffer_offset += cut / self.SAMPLE_RATE
+
+    def _buffer_seconds(self) -> float:
+        return self.buffer.size / self.SAMPLE_RATE
+
+    @staticmethod
+    def _normalize(word: str) -> str:
+        return re.sub(r"[^\w]", "", word.lower())
+
+    @staticmethod
+    def _join(words: List[Dict]) -> str:
+        return " ".join(w["word"] for w in words)
@@ -0,0 +1,115 @@
+
+import os
+import time
+import logging
+from typing import List, Optional
+
+from sqlalchemy import select, func
+
+from ..models.transcription_segment import transcription_segments
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptWriter:
+    """
+    Write-behind buffer for one streaming session's transcript.
+
+    Committed text is appended as `transcription_segments` rows, flushed in one
+    commit at most every `flush_interval` seconds or `flush_chunks` segments,
+    instead of rewriting the whole growing text after every chunk. The full text
+    is only materialised on the transcription row when the session ends.
+    """
+
+    def __init__(
+        self,
+        db,
+        transcription_id: int,
+        flush_interval: Optional[float] = None,
+        flush_chunks: Optional[int] = None
+    ):
+        self.db = db
+        self.transcription_id = transcription_id
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("TRANSCRIPT_FLUSH_SECONDS", "5"))
+        self.flush_chunks = flush_chunks if flush_chunks is not None else int(os.getenv("TRANSCRIPT_FLUSH_CHUNKS", "10"))
+
+        self.next_seq: Optional[int] = None
+        self.confidence: Optional[float] = None
+        self._pending: List[transcription_segments] = []
+        self._last_flush = time.monotonic()
+        self.flushes = 0
+
+    async def start(self):
+        """Continue numbering after segments from an earlier session of the same transcription."""
+        last_seq = (
+            await self.db.execute(
+                select(func.max(transcription_segments.seq))
+                .where(transcription_segments.transcription_id == self.transcription_id)
+            )
+        ).scalar()
+        self.next_seq = 0 if last_seq is None else last_seq + 1
+
+    def add(
+        self,
+        text: str,
+        chunk_index: Optional[int] = None,
+        start_seconds: Optional[float] = None,
+        end_seconds: Optional[float] = None,
+        confidence: Optional[float] = None
+    ):
+        if confidence is not None:
+            self.confidence = confidence
+        if not text:
+            return
+        self._pending.append(transcription_segments(
+            transcription_id=self.transcription_id,
+            seq=self.next_seq,
+            chunk_index=chunk_index,
+            text=text,
+            start_seconds=start_seconds,
+            end_seconds=end_seconds,
+            confidence=confidence
+        ))
+        self.next_seq += 1
+
+    async def maybe_flush(self, record=None) -> bool:
+        """Flush when enough segments are pending or the interval has elapsed."""
+        if not self._pending:
+            return False
+        due = (
+            len(self._pending) >= self.flush_chunks
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+        if due:
+            await self.flush(record)
+        return due
+
+    async def flush(self, record=None):
+        """Write pending segments (and the latest confidence) in a single commit."""
+        if self._pending:
+            self.db.add_all(self._pending)
+        if record is not None and self.confidence is not None:
+            record.confidence_score = self.confidence
+        await self.db.commit()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self.flushes += 1
+
+    async def materialize(self, record) -> str:
+        """Flush, then store the joined segment text on the transcription row."""
+        if self._pending:
+            self.db.add_all(self._pending)
+            self._pending = []
+            await self.db.flush()
+
+        texts = (
+            await self.db.execute(
+                select(transcription_segments.text)
+                .where(transcription_segments.transcription_id == self.transcription_id)
+                .order_by(transcription_segments.seq)
+            )
+        ).scalars().all()
+        record.transcription_text = " ".join(texts)
+        if self.confidence is not None:
+            record.confidence_score = self.confidence
+        return record.transcription_text
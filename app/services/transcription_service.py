@@ -1,50 +1,141 @@
 
-import whisper
-import torch
-from typing import Optional, Dict, List
+import os
+import threading
+import numpy as np
+from typing import Optional, Dict, List, Union
 from datetime import datetime
 import logging
 
+from .asr_backends import load_backend
+from .inference_pool import InferencePool
+from .batch_scheduler import BatchScheduler
+from .vad import VoiceActivityDetector
+
 logger = logging.getLogger(__name__)
 
+# Whisper's prompt window is ~224 tokens; the tail of the context is what matters
+PROMPT_CONTEXT_CHARS = 200
+
 class TranscriptionService:
     
-    def __init__(self, model_size: str = "base"):
+    def __init__(
+        self,
+        model_size: str = "base",
+        num_workers: Optional[int] = None,
+        backend: Optional[str] = None
+    ):
+        import torch
+        
         self.model_size = model_size
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Loading Whisper model '{model_size}' on {self.device}")
+        # whisper | whisper-int8 | faster-whisper (see asr_backends.BACKENDS)
+        self.backend_name = backend or os.getenv("ASR_BACKEND", "whisper")
+        
+        # In-process backend is only needed by the sync API; load it on first use
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        
+        # Skip Whisper entirely for silent in-memory buffers
+        self.vad_enabled = os.getenv("VAD_ENABLED", "true").lower() in ("1", "true", "yes")
         
-        self.model = whisper.load_model(model_size, device=self.device)
-        logger.info(f"Whisper model loaded successfully")
+        # Worker processes used by the async API so inference never runs on the event loop
+        self.pool = InferencePool(
+            backend_name=self.backend_name,
+            model_size=model_size,
+            device=self.device,
+            num_workers=num_workers or int(os.getenv("WHISPER_WORKERS", "2")),
+            max_queue_per_worker=int(os.getenv("WHISPER_MAX_QUEUE_PER_WORKER", "4"))
+        )
+        
+        # Cross-session batching of short buffers. Batched decoding has no per-item
+        # prompt or word timings, so it trades some boundary accuracy for throughput.
+        self.batching_enabled = os.getenv("WHISPER_BATCHING", "false").lower() in ("1", "true", "yes")
+        self.batcher = BatchScheduler(
+            self.pool,
+            max_batch_size=int(os.getenv("WHISPER_MAX_BATCH_SIZE", "8")),
+            max_wait_ms=int(os.getenv("WHISPER_BATCH_MAX_WAIT_MS", "50"))
+        )
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = load_backend(self.backend_name, self.model_size, self.device)
+                    logger.info(f"ASR backend '{self.backend_name}' loaded successfully")
+        return self._backend
+    
+    def warm_up(self):
+        """Start the inference workers and block until each has loaded its model."""
+        self.pool.warm_up()
     
     def transcribe_audio(
         self, 
-        audio_path: str, 
+        audio: Union[str, np.ndarray], 
         language: str = "en",
-        task: str = "transcribe"
+        task: str = "transcribe",
+        initial_prompt: Optional[str] = None,
+        skip_silence: bool = True,
+        vad: Optional[VoiceActivityDetector] = None
     ) -> Dict:
         try:
             start_time = datetime.now()
             
+            audio, offset = self._gate_silence(audio, skip_silence, vad)
+            if audio is None:
+                return self._silent_result(language)
+            
             # Transcribe
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                task=task,
-                fp16=False,
-                verbose=False
-            )
+            options = self._transcribe_options(language, task, initial_prompt)
+            
+            result = self.backend.transcribe(audio, **options)
             
             duration = (datetime.now() - start_time).total_seconds()
             
+            return self._format_result(result, language, duration, offset)
+            
+        except Exception as e:
+            logger.error(f"Transcription failed: {str(e)}")
             return {
-                "success": True,
-                "text": result["text"].strip(),
-                "segments": result.get("segments", []),
-                "language": result.get("language", language),
-                "processing_time": duration,
-                "confidence": self._calculate_avg_confidence(result.get("segments", []))
+                "success": False,
+                "error": str(e),
+                "text": None
             }
+    
+    async def transcribe_audio_async(
+        self,
+        audio: Union[str, np.ndarray],
+        language: str = "en",
+        task: str = "transcribe",
+        initial_prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+        skip_silence: bool = True,
+        vad: Optional[VoiceActivityDetector] = None
+    ) -> Dict:
+        """
+        Same as transcribe_audio, but runs on the inference worker pool.
+        `audio` is a file path or a float32 16 kHz mono buffer from AudioProcessor.
+        Pass the session's `vad` for consecutive chunks of one recording.
+        """
+        try:
+            start_time = datetime.now()
+            
+            audio, offset = self._gate_silence(audio, skip_silence, vad)
+            if audio is None:
+                return self._silent_result(language)
+            
+            if self.batching_enabled and self.batcher.accepts(audio):
+                result = await self.batcher.submit(audio, language, task)
+            else:
+                options = self._transcribe_options(language, task, initial_prompt)
+                if word_timestamps:
+                    options["word_timestamps"] = True
+                
+                result = await self.pool.transcribe(audio, options)
+            
+            duration = (datetime.now() - start_time).total_seconds()
+            
+            return self._format_result(result, language, duration, offset)
             
         except Exception as e:
             logger.error(f"Transcription failed: {str(e)}")
@@ -56,17 +147,96 @@ class TranscriptionService:
     
     def transcribe_realtime_chunk(
         self,
-        audio_path: str,
+        audio: Union[str, np.ndarray],
+        language: str = "en",
+        previous_context: Optional[str] = None,
+        vad: Optional[VoiceActivityDetector] = None
+    ) -> Dict:
+        result = self.transcribe_audio(audio, language, initial_prompt=previous_context, vad=vad)
+        
+        if result["success"] and previous_context:
+            result["full_text"] = previous_context + " " + result["text"]
+        
+        return result
+    
+    async def transcribe_realtime_chunk_async(
+        self,
+        audio: Union[str, np.ndarray],
         language: str = "en",
-        previous_context: Optional[str] = None
+        previous_context: Optional[str] = None,
+        vad: Optional[VoiceActivityDetector] = None
     ) -> Dict:
-        result = self.transcribe_audio(audio_path, language)
+        result = await self.transcribe_audio_async(
+            audio,
+            language,
+            initial_prompt=previous_context,
+            vad=vad
+        )
         
         if result["success"] and previous_context:
             result["full_text"] = previous_context + " " + result["text"]
         
         return result
     
+    def get_worker_metrics(self) -> Dict:
+        metrics = self.pool.get_metrics()
+        metrics["batching"] = dict(self.batcher.get_metrics(), enabled=self.batching_enabled)
+        return metrics
+    
+    def shutdown(self):
+        self.pool.shutdown()
+    
+    def _transcribe_options(self, language: str, task: str, initial_prompt: Optional[str] = None) -> Dict:
+        options = {
+            "language": language,
+            "task": task,
+            "fp16": False,
+            "verbose": False
+        }
+        if initial_prompt:
+            # Same trimming for the sync and worker-pool paths
+            options["initial_prompt"] = initial_prompt[-PROMPT_CONTEXT_CHARS:]
+        return options
+    
+    def _gate_silence(self, audio: Union[str, np.ndarray], skip_silence: bool, vad: Optional[VoiceActivityDetector] = None):
+        """
+        Trim leading/trailing silence from a buffer; (None, 0.0) if it holds no speech.
+        Without a session detector, a fresh one judges the buffer against its fixed prior floor.
+        """
+        if not (skip_silence and self.vad_enabled and isinstance(audio, np.ndarray)):
+            return audio, 0.0
+        return (vad or VoiceActivityDetector()).trim(audio)
+    
+    def _silent_result(self, language: str) -> Dict:
+        return {
+            "success": True,
+            "text": "",
+            "segments": [],
+            "language": language,
+            "processing_time": 0.0,
+            "confidence": 0.0,
+            "skipped_silence": True
+        }
+    
+    def _format_result(self, result: Dict, language: str, duration: float, offset: float = 0.0) -> Dict:
+        if offset:
+            # Map timestamps back onto the untrimmed audio
+            for segment in result.get("segments", []):
+                segment["start"] += offset
+                segment["end"] += offset
+                for word in segment.get("words") or []:
+                    word["start"] += offset
+                    word["end"] += offset
+        
+        return {
+            "success": True,
+            "text": result["text"].strip(),
+            "segments": result.get("segments", []),
+            "language": result.get("language", language),
+            "processing_time": duration,
+            "confidence": self._calculate_avg_confidence(result.get("segments", []))
+        }
+    
     def _calculate_avg_confidence(self, segments: List[Dict]) -> float:
         if not segments:
             return 0.0
@@ -0,0 +1,145 @@
+
+import numpy as np
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+
+class VoiceActivityDetector:
+    """
+    Energy + spectral-flatness voice activity detection on 16 kHz float32 PCM.
+
+    A frame counts as speech when it is louder than the adaptive noise floor by
+    `margin_db` and its spectrum is not noise-like (flatness below threshold).
+    One instance per recording session keeps the noise floor and speech statistics.
+
+    The floor starts from the absolute prior `min_energy_db - margin_db`, so a
+    session that opens mid-speech is judged against that rather than against the
+    speech itself. It is learnt only from frames that were not speech (quiet or
+    noise-like), or, when a chunk has none, from the quietest frames of the last
+    `history_seconds`. Drops are followed at once; rises are capped at
+    `max_rise_db_per_second`.
+    """
+
+    SAMPLE_RATE = 16000
+
+    def __init__(
+        self,
+        frame_ms: int = 30,
+        min_energy_db: float = -50.0,
+        margin_db: float = 10.0,
+        flatness_threshold: float = 0.5,
+        hangover_ms: int = 200,
+        min_speech_ms: int = 90,
+        max_rise_db_per_second: float = 3.0,
+        history_seconds: float = 10.0
+    ):
+        self.frame_length = int(self.SAMPLE_RATE * frame_ms / 1000)
+        self.min_energy_db = min_energy_db
+        self.margin_db = margin_db
+        self.flatness_threshold = flatness_threshold
+        self.hangover_frames = max(0, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_rise_db_per_second = max_rise_db_per_second
+
+        self.noise_floor_db = min_energy_db - margin_db
+        self._history = deque(maxlen=max(1, int(history_seconds * 1000 / frame_ms)))
+        self.total_seconds = 0.0
+        self.speech_seconds = 0.0
+        self.chunks_total = 0
+        self.chunks_skipped = 0
+
+    @property
+    def speech_ratio(self) -> float:
+        return self.speech_seconds / self.total_seconds if self.total_seconds else 0.0
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        """Per-frame boolean speech mask (hangover applied)."""
+        return self._apply_hangover(self._frame_mask(audio))
+
+    def _frame_mask(self, audio: np.ndarray) -> np.ndarray:
+        n_frames = audio.size // self.frame_length
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = audio[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+
+        rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+        energy_db = 20.0 * np.log10(rms)
+
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(self.frame_length), axis=1)) + 1e-10
+        flatness = np.exp(np.mean(np.log(spectrum), axis=1)) / np.mean(spectrum, axis=1)
+
+        # Classify against the floor learnt so far, then learn from this chunk
+        threshold = max(self.min_energy_db, self.noise_floor_db + self.margin_db)
+        mask = (energy_db > threshold) & (flatness < self.flatness_threshold)
+
+        # Frames just under the threshold may be soft speech; keep them out of the floor
+        noise_frames = (energy_db <= self.noise_floor_db + self.margin_db / 2) | (flatness >= self.flatness_threshold)
+        self._update_floor(energy_db, noise_frames, n_frames * self.frame_length / self.SAMPLE_RATE)
+        return mask
+
+    def _update_floor(self, energy_db: np.ndarray, noise_frames: np.ndarray, seconds: float):
+        self._history.extend(energy_db.tolist())
+        if noise_frames.any():
+            target = float(np.median(energy_db[noise_frames]))
+        elif len(self._history) == self._history.maxlen:
+            # All speech (or a steady non-flat hum): only a long history can move the floor
+            target = float(np.percentile(self._history, 10))
+        else:
+            return
+
+        # Below the prior the threshold is clamped at min_energy_db anyway
+        target = max(target, self.min_energy_db - self.margin_db)
+        if target < self.noise_floor_db:
+            self.noise_floor_db = target
+        else:
+            self.noise_floor_db += min(target - self.noise_floor_db, self.max_rise_db_per_second * seconds)
+
+    def _apply_hangover(self, mask: np.ndarray) -> np.ndarray:
+        # Extend speech regions so word onsets/offsets are not clipped
+        if self.hangover_frames and mask.any():
+            kernel = np.ones(2 * self.hangover_frames + 1, dtype=int)
+            mask = np.convolve(mask.astype(int), kernel, mode="same") > 0
+
+        return mask
+
+    def trim(self, audio: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Strip leading/trailing silence. Returns (trimmed audio, seconds removed at
+        the start), or (None, 0.0) when the chunk holds no speech at all.
+        """
+        raw_mask = self._frame_mask(audio)
+        if int(raw_mask.sum()) < self.min_speech_frames:
+            return None, 0.0
+
+        mask = self._apply_hangover(raw_mask)
+        speech_frames = np.flatnonzero(mask)
+        start = speech_frames[0] * self.frame_length
+        end = min(audio.size, (speech_frames[-1] + 1) * self.frame_length)
+        return audio[start:end], start / self.SAMPLE_RATE
+
+    def process_chunk(self, audio: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Gate one streaming chunk: (trimmed speech, recording time in seconds where
+        it starts), or (None, chunk start) for a silent chunk.
+        """
+        chunk_start = self.total_seconds
+        self.chunks_total += 1
+        self.total_seconds += audio.size / self.SAMPLE_RATE
+
+        speech, trimmed = self.trim(audio)
+        if speech is None:
+            self.chunks_skipped += 1
+            return None, chunk_start
+
+        self.speech_seconds += speech.size / self.SAMPLE_RATE
+        return speech, chunk_start + trimmed
+
+    def get_stats(self) -> Dict:
+        return {
+            "total_seconds": round(self.total_seconds, 2),
+            "speech_seconds": round(self.speech_seconds, 2),
+            "speech_ratio": round(self.speech_ratio, 3),
+            "chunks_total": self.chunks_total,
+            "chunks_skipped": self.chunks_skipped
+        }
@@ -0,0 +1,136 @@
+
+import os
+import pickle
+import hashlib
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOCABULARY_DIR = Path(__file__).resolve().parent.parent / "data" / "vocabulary"
+
+# Bump when the pickled layout changes so stale caches are rebuilt
+CACHE_FORMAT = 1
+
+_TERMINAL = ""  # trie key holding the categories of a complete term
+
+
+class TermTrie:
+    """
+    Token-level trie over lowercased terms.
+
+    `match` walks the trie from every token position, so the cost per token is
+    bounded by the longest term (a handful of tokens), not by the lexicon size.
+    Like spaCy's PhraseMatcher it reports every match, including nested ones.
+    """
+
+    def __init__(self):
+        self.root: Dict = {}
+        self.size = 0
+        self.max_depth = 0
+
+    def add(self, tokens: List[str], category: str):
+        if not tokens:
+            return
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        categories = node.setdefault(_TERMINAL, [])
+        if category not in categories:
+            categories.append(category)
+            self.size += 1
+        self.max_depth = max(self.max_depth, len(tokens))
+
+    def match(self, tokens: List[str]) -> List[Tuple[str, int, int]]:
+        matches = []
+        for start in range(len(tokens)):
+            node = self.root
+            for end in range(start, min(len(tokens), start + self.max_depth)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                for category in node.get(_TERMINAL, ()):
+                    matches.append((category, start, end + 1))
+        return matches
+
+
+class MedicalVocabulary:
+    """
+    Medical terminology loaded from `<category>.txt` files (one term per line,
+    `#` comments) and compiled into a TermTrie.
+
+    The compiled trie is pickled to `cache_dir`, keyed by a hash of the files
+    and the tokenizer, so restarts skip tokenizing the lexicon again.
+    """
+
+    def __init__(self, trie: TermTrie, categories: List[str]):
+        self.trie = trie
+        self.categories = categories
+
+    @classmethod
+    def load(
+        cls,
+        tokenize_many: Callable[[List[str]], Iterable[List[str]]],
+        tokenizer_id: str,
+        directory: Optional[str] = None,
+        cache_dir: Optional[str] = None
+    ) -> "MedicalVocabulary":
+        directory = Path(directory or os.getenv("MEDICAL_VOCABULARY_DIR") or DEFAULT_VOCABULARY_DIR)
+        cache_dir = Path(cache_dir or os.getenv("MEDICAL_VOCABULARY_CACHE", "./vocabulary_cache"))
+
+        files = sorted(directory.glob("*.txt"))
+        if not files:
+            logger.warning(f"No vocabulary files found in {directory}")
+
+        cache_file = cache_dir / f"vocabulary-{cls._fingerprint(files, tokenizer_id)}.pkl"
+        if cache_file.exists():
+            try:
+                with open(cache_file, "rb") as f:
+                    trie, categories = pickle.load(f)
+                logger.info(f"Loaded {trie.size} vocabulary terms from cache {cache_file}")
+                return cls(trie, categories)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable vocabulary cache {cache_file}: {str(e)}")
+
+        trie = TermTrie()
+        categories = []
+        for path in files:
+            category = path.stem
+            categories.append(category)
+            terms = cls._read_terms(path)
+            for tokens in tokenize_many(terms):
+                trie.add(tokens, category)
+        logger.info(f"Compiled {trie.size} vocabulary terms from {len(files)} files")
+
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(".tmp")
+            with open(tmp_file, "wb") as f:
+                pickle.dump((trie, categories), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write vocabulary cache: {str(e)}")
+
+        return cls(trie, categories)
+
+    def match(self, tokens: List[str]) -> List[Tuple[str, int, int]]:
+        return self.trie.match(tokens)
+
+    @staticmethod
+    def _read_terms(path: Path) -> List[str]:
+        terms = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                term = line.strip()
+                if term and not term.startswith("#"):
+                    terms.append(term)
+        return terms
+
+    @staticmethod
+    def _fingerprint(files: List[Path], tokenizer_id: str) -> str:
+        digest = hashlib.sha256(f"{CACHE_FORMAT}:{tokenizer_id}".encode("utf-8"))
+        for path in files:
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+        return digest.hexdigest()[:16]
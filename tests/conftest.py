@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Keep the app's module-level engine off the developer database and skip model warm-up
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test_oros.db')}")
+os.environ.setdefault("MODEL_WARMUP", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,148 @@
+"""
+AnalysisService timeouts, retries and circuit breaker against the local stub
+chat-completions server (app/services/llm_stub.py).
+"""
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from app.services.analysis_service import AnalysisService
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.llm_stub import StubState, create_app
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    state = StubState()
+    server = uvicorn.Server(uvicorn.Config(create_app(state), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "stub server did not start"
+        time.sleep(0.02)
+
+    yield state, f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def service(stub, monkeypatch):
+    state, base_url = stub
+    state.script, state.requests = [], 0
+    monkeypatch.setenv("LLM_TIMEOUT_SECONDS", "0.3")
+    monkeypatch.setenv("LLM_MAX_RETRIES", "2")
+    monkeypatch.setenv("LLM_BACKOFF_BASE_SECONDS", "0.01")
+    monkeypatch.setenv("LLM_BACKOFF_MAX_SECONDS", "0.02")
+    monkeypatch.setenv("LLM_BREAKER_FAILURES", "3")
+    monkeypatch.setenv("LLM_BREAKER_RESET_SECONDS", "0.3")
+    return AnalysisService(api_key="stub", base_url=base_url)
+
+
+def _complete(service):
+    return service._complete_with_retries("Patient reports mild headache.")
+
+
+def test_success_against_stub(service, stub):
+    state, _ = stub
+    result = asyncio.run(service.analyze_transcription_async("Patient reports mild headache.", {}, [], use_cache=False))
+    assert result["success"] and result["summary"] == "Stub summary."
+    assert state.requests == 1
+
+
+def test_retries_transient_errors_then_succeeds(service, stub):
+    state, _ = stub
+    state.script = [{"status": 503}, {"status": 429}]
+    content = asyncio.run(_complete(service))
+    assert "Stub summary." in content
+    assert state.requests == 3
+    assert service.breaker.state == "closed"
+
+
+def test_timeouts_are_retried_then_raised(service, stub):
+    state, _ = stub
+    state.script = [{"delay": 1.0}] * 3
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(_complete(service))
+    assert state.requests == 3  # first attempt + LLM_MAX_RETRIES
+
+
+def test_non_retryable_error_is_not_retried(service, stub):
+    state, _ = stub
+    state.script = [{"status": 400}]
+    with pytest.raises(Exception):
+        asyncio.run(_complete(service))
+    assert state.requests == 1
+
+
+def test_breaker_opens_then_recovers_through_half_open(service, stub):
+    state, _ = stub
+    state.script = [{"status": 503}] * 3
+
+    async def scenario():
+        with pytest.raises(Exception):
+            await _complete(service)
+        assert service.breaker.state == "open"
+
+        # Refused locally while open
+        with pytest.raises(CircuitOpenError):
+            await _complete(service)
+        assert state.requests == 3
+
+        await asyncio.sleep(0.35)
+        await _complete(service)  # half-open trial succeeds
+        assert service.breaker.state == "closed"
+
+    asyncio.run(scenario())
+    assert state.requests == 4
+
+
+def test_cancelled_half_open_trial_does_not_wedge_the_breaker(service, stub):
+    state, _ = stub
+    state.script = [{"status": 503}] * 3 + [{"delay": 2.0}]
+
+    async def scenario():
+        with pytest.raises(Exception):
+            await _complete(service)
+        await asyncio.sleep(0.35)
+
+        # The half-open trial is cancelled mid-flight (e.g. the job was stopped)
+        service.timeout = 10
+        trial = asyncio.create_task(_complete(service))
+        await asyncio.sleep(0.1)
+        assert service.breaker.state == "half_open"
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        # The next call is allowed to be the trial instead of being refused forever
+        await _complete(service)
+        assert service.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_retried_stream_does_not_resend_fields(service, stub):
+    state, _ = stub
+    # The first stream stalls after "summary" has completed; the retry starts over
+    state.script = [{"stall_after": 6}]
+    sent = []
+
+    async def on_partial(field, value):
+        sent.append(field)
+
+    result = asyncio.run(service.analyze_transcription_async(
+        "Patient reports mild headache.", {}, [], use_cache=False, on_partial=on_partial
+    ))
+    assert result["success"] and result["summary"] == "Stub summary."
+    assert state.requests == 2
+    assert sent == ["summary", "keywords", "concerns_identified", "urgency_level", "analysis"]
@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.services import asr_benchmark
+from app.services.asr_backends import ASRBackend
+from app.services.audio_processor import AudioProcessor
+from app.services.vad import VoiceActivityDetector
+
+CORPUS = Path(__file__).resolve().parent.parent / "benchmarks" / "corpus"
+
+
+class FakeBackend(ASRBackend):
+    """Says the same words for any input; `words` is set per test."""
+    name = "fake"
+    words = ""
+
+    def __init__(self, model_size, device):
+        pass
+
+    def transcribe(self, audio, **options):
+        return {"text": self.words, "segments": []}
+
+
+class OtherFakeBackend(FakeBackend):
+    name = "other"
+
+
+@pytest.fixture
+def fake_backends(monkeypatch):
+    monkeypatch.setitem(asr_benchmark.BACKENDS, "fake", FakeBackend)
+    monkeypatch.setitem(asr_benchmark.BACKENDS, "other", OtherFakeBackend)
+    monkeypatch.setattr(FakeBackend, "words", "")
+    monkeypatch.setattr(OtherFakeBackend, "words", "")
+
+
+def test_committed_sample_matches_generator(tmp_path):
+    asr_benchmark.write_sample_corpus(tmp_path)
+    assert (tmp_path / "manifest.jsonl").read_text() == (CORPUS / "manifest.jsonl").read_text()
+    # FFT rounding may differ by an LSB between numpy builds
+    decode = AudioProcessor(storage_path=str(tmp_path)).decode_audio_bytes
+    regenerated = decode((tmp_path / asr_benchmark.SAMPLE_CLIP).read_bytes())
+    committed = decode((CORPUS / asr_benchmark.SAMPLE_CLIP).read_bytes())
+    np.testing.assert_allclose(regenerated, committed, atol=2 / 32768)
+
+
+def _sample(name):
+    return next(item for item in asr_benchmark.load_corpus(CORPUS) if item["name"] == name)
+
+
+def test_sample_corpus_loads_as_16k_audio():
+    corpus = asr_benchmark.load_corpus(CORPUS)
+    assert [item["name"] for item in corpus] == [asr_benchmark.SAMPLE_CLIP, asr_benchmark.SPEECH_CLIP]
+
+    vowels = _sample(asr_benchmark.SAMPLE_CLIP)
+    assert vowels["reference"] == ""
+    assert vowels["duration"] == pytest.approx(3.25, abs=0.01)
+    # Voiced enough that the VAD passes it on, so it exercises the same path as speech
+    rate = AudioProcessor.SAMPLE_RATE
+    assert VoiceActivityDetector().trim(vowels["audio"][:int(rate * 0.75)])[0] is not None
+
+    speech = _sample(asr_benchmark.SPEECH_CLIP)
+    assert speech["reference"] == asr_benchmark.SPEECH_TEXT
+    assert 8.0 < speech["duration"] < 15.0
+    assert 0.1 < np.abs(speech["audio"]).max() <= 1.0
+
+
+def test_speech_sample_matches_generator():
+    pytest.importorskip("espeakng_loader")
+    regenerated = asr_benchmark.synthesize_speech(asr_benchmark.SPEECH_TEXT)
+    committed = _sample(asr_benchmark.SPEECH_CLIP)["audio"]
+    # espeak-ng timing is not bit-exact between runs or versions; same text, same pace
+    assert regenerated.size == pytest.approx(committed.size, rel=0.01)
+    assert np.sqrt(np.mean(regenerated ** 2)) == pytest.approx(np.sqrt(np.mean(committed ** 2)), rel=0.1)
+
+
+@pytest.mark.parametrize("reference, hypothesis, expected", [
+    ("the patient is stable", "the patient is stable", 0.0),
+    ("The patient, is stable.", "the patient is stable", 0.0),
+    ("the patient is stable", "the patient stable", 0.25),
+    ("the patient is stable", "a patient is very stable", 0.5),
+    ("", "", 0.0),
+    ("", "thank you", 1.0),
+])
+def test_word_error_rate(reference, hypothesis, expected):
+    assert asr_benchmark.word_error_rate(reference, hypothesis) == pytest.approx(expected)
+
+
+def test_benchmark_reports_wer_against_the_sample(fake_backends):
+    corpus = asr_benchmark.load_corpus(CORPUS)
+    report = asr_benchmark.benchmark_backend("fake", "tiny", corpus, "en")
+    assert report["backend"] == "fake"
+    assert report["audio_seconds"] == pytest.approx(sum(item["duration"] for item in corpus), abs=0.01)
+    # Silent on the vowels (right), nothing for the speech (all deletions)
+    assert report["wer"] == 0.5 and report["hypotheses"] == ["", ""]
+
+    FakeBackend.words = asr_benchmark.SPEECH_TEXT.lower()
+    # Hallucinates on the vowels, perfect on the speech
+    assert asr_benchmark.benchmark_backend("fake", "tiny", corpus, "en")["wer"] == 0.5
+
+
+def test_main_compares_backends_against_the_first(fake_backends, monkeypatch, capsys):
+    FakeBackend.words = "the patient is stable"
+    OtherFakeBackend.words = "the patient stable"
+    monkeypatch.setattr("sys.argv", ["asr_benchmark", "--corpus", str(CORPUS), "--backends", "fake,other"])
+    asr_benchmark.main()
+
+    reports = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    assert [r["backend"] for r in reports] == ["fake", "other"]
+    assert "hypotheses" not in reports[0] and "wer_vs_fake" not in reports[0]
+    assert reports[1]["wer_vs_fake"] == 0.25
+
+
+@pytest.mark.parametrize("backend, module", [
+    ("whisper", "whisper"),
+    ("whisper-int8", "whisper"),
+    ("faster-whisper", "faster_whisper"),
+])
+def test_backend_transcribes_the_speech_sample(backend, module):
+    pytest.importorskip(module)
+    corpus = [_sample(asr_benchmark.SPEECH_CLIP)]
+    report = asr_benchmark.benchmark_backend(backend, "base", corpus, "en")
+    assert report["rtf"] is not None
+    assert report["wer"] <= 0.25, report["hypotheses"]
@@ -0,0 +1,123 @@
+"""
+Randomized parity of the SQL rollup aggregations against the Python loops they replaced.
+"""
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple
+
+import pytest
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.models.surgery import surgeries, SurgeryStatus
+from app.services import dashboard_rollup
+from app.services.dashboard_rollup import clip_overlap, parse_hhmm, scheduled_start, surgery_interval
+
+BASE_DAY = date(2026, 3, 1)
+DAYS = [BASE_DAY + timedelta(days=k) for k in range(-1, 3)]
+WINDOWS = [("07:00", "19:00"), ("00:00", "23:59"), ("06:30", "08:00")]
+# Well-formed, loosely formed and unparseable "HH:MM" values all occur in real data
+SCHEDULED_TIMES = [
+    "07:30", "7:05", "23:59", "24:00", "12:3", "1:2:3", "08:00:59", "abc", "",
+    " 09:15 ", None, "19:00", "06:45", "10:61",
+]
+
+
+# ---------- Reference implementations (the pre-SQL Python loops) ----------
+def reference_room_busy(conn, day: date, day_start: str, day_end: str) -> Dict[int, int]:
+    win_start = datetime.combine(day, parse_hhmm(day_start))
+    win_end = datetime.combine(day, parse_hhmm(day_end))
+    rows = conn.execute(
+        select(
+            surgeries.operating_room_id, surgeries.scheduled_date, surgeries.scheduled_time,
+            surgeries.duration_minutes, surgeries.actual_start_time, surgeries.actual_end_time,
+        )
+        .where(surgeries.status != SurgeryStatus.cancelled)
+        .where(
+            (surgeries.scheduled_date == day) |
+            (surgeries.actual_start_time >= win_start) & (surgeries.actual_start_time <= win_end)
+        )
+    ).all()
+
+    busy: Dict[int, int] = {}
+    for row in rows:
+        interval = surgery_interval(row)
+        if interval is None or row.operating_room_id is None:
+            continue
+        overlap = clip_overlap(interval[0], interval[1], win_start, win_end)
+        if overlap:
+            busy[row.operating_room_id] = busy.get(row.operating_room_id, 0) + overlap
+    return busy
+
+
+def reference_wait(conn, day: date) -> Tuple[float, int]:
+    start = datetime.combine(day, datetime.min.time())
+    end = datetime.combine(day, datetime.max.time())
+    rows = conn.execute(
+        select(surgeries.scheduled_date, surgeries.scheduled_time, surgeries.actual_start_time)
+        .where(surgeries.status != SurgeryStatus.cancelled)
+        .where(surgeries.actual_start_time >= start, surgeries.actual_start_time <= end)
+    ).all()
+
+    total, count = 0.0, 0
+    for row in rows:
+        sched_dt = scheduled_start(row.scheduled_date, row.scheduled_time)
+        if sched_dt is None or not row.actual_start_time:
+            continue
+        total += max(0.0, (row.actual_start_time - sched_dt).total_seconds() / 60.0)
+        count += 1
+    return total, count
+
+
+# ---------- Fixtures ----------
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def _random_surgery(rnd: random.Random) -> dict:
+    row = {
+        "patient_id": rnd.randint(1, 5),
+        "doctor_id": 1,
+        "operating_room_id": rnd.choice([1, 2, 3, None]),
+        "scheduled_date": BASE_DAY + timedelta(days=rnd.randint(-1, 2)) if rnd.random() < 0.9 else None,
+        "scheduled_time": rnd.choice(SCHEDULED_TIMES),
+        "duration_minutes": rnd.choice([None, 0, 45, 120, 600, -30]),
+        "status": rnd.choice(list(SurgeryStatus)),
+        "actual_start_time": None,
+        "actual_end_time": None,
+    }
+    if rnd.random() < 0.6:
+        started = (
+            datetime.combine(BASE_DAY, datetime.min.time())
+            + timedelta(days=rnd.randint(-1, 2), seconds=rnd.randint(0, 86399), microseconds=rnd.choice([0, 0, 500000]))
+        )
+        row["actual_start_time"] = started
+        if rnd.random() < 0.6:
+            row["actual_end_time"] = started + timedelta(seconds=rnd.randint(-600, 40000))
+    return row
+
+
+# ---------- Tests ----------
+@pytest.mark.parametrize("seed", range(40))
+def test_sql_aggregation_matches_python_reference(conn, seed):
+    rnd = random.Random(seed)
+    conn.execute(delete(surgeries))
+    rows = [_random_surgery(rnd) for _ in range(rnd.randint(0, 40))]
+    if rows:
+        conn.execute(insert(surgeries), rows)
+
+    for day in DAYS:
+        for day_start, day_end in WINDOWS:
+            assert dashboard_rollup.compute_room_busy(conn, day, day_start, day_end) == \
+                reference_room_busy(conn, day, day_start, day_end), (day, day_start, day_end)
+
+        wait_sum, wait_count = dashboard_rollup.compute_wait(conn, day)
+        expected_sum, expected_count = reference_wait(conn, day)
+        assert wait_count == expected_count, day
+        assert wait_sum == pytest.approx(expected_sum, abs=1e-6), day
@@ -0,0 +1,96 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.models.base import Base
+from app.models.dashboard_rollup import dashboard_daily, dashboard_room_daily
+from app.models.note import notes
+from app.models.surgery import surgeries, SurgeryStatus
+from app.services import dashboard_rollup
+
+DAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        connection.execute(insert(surgeries), [{
+            "patient_id": 1, "doctor_id": 1, "operating_room_id": 2, "status": SurgeryStatus.completed,
+            "scheduled_date": DAY, "scheduled_time": "08:00", "duration_minutes": 90,
+        }])
+        connection.execute(insert(notes), [
+            {"patient_id": 1, "doctor_id": 1, "title": "n", "content": "c", "created_at": datetime(2026, 3, 2, 10)}
+        ] * 3)
+        yield connection
+    engine.dispose()
+
+
+def _row(conn, day):
+    return conn.execute(select(dashboard_daily).where(dashboard_daily.day == day)).one()
+
+
+def test_fill_missing_days_creates_the_full_row(conn):
+    dashboard_rollup.fill_missing_days(conn, [DAY])
+    row = _row(conn, DAY)
+    assert row.notes_count == 3 and row.patients_count == 1
+    busy = conn.execute(select(dashboard_room_daily.room_id, dashboard_room_daily.busy_minutes)).all()
+    assert [tuple(b) for b in busy] == [(2, 90)]
+
+
+def test_fill_missing_days_never_overwrites_a_writers_row(conn):
+    # A note writer created the row first (its count includes a note this reader cannot see yet)
+    conn.execute(insert(dashboard_daily).values(day=DAY, notes_count=4, wait_sum_minutes=0, wait_count=0, patients_count=1))
+    dashboard_rollup.fill_missing_days(conn, [DAY])
+    assert _row(conn, DAY).notes_count == 4
+    assert conn.execute(select(dashboard_room_daily)).first() is None
+
+
+def _add_note(conn):
+    conn.execute(insert(notes).values(patient_id=1, doctor_id=1, title="n", content="c", created_at=datetime(2026, 3, 2, 11)))
+
+
+def test_first_note_write_creates_the_row_then_increments(conn):
+    _add_note(conn)
+    dashboard_rollup.apply_note_deltas(conn, {DAY: 1})
+    assert _row(conn, DAY).notes_count == 4
+    dashboard_rollup.apply_note_deltas(conn, {DAY: -1})
+    assert _row(conn, DAY).notes_count == 3
+
+
+def test_concurrent_first_note_writes_both_count(conn, monkeypatch):
+    # Writer B flushes its note and finds no row. Before its insert, writer A commits
+    # the row for its own note, which B's snapshot cannot see (as on Postgres, where
+    # B's insert waits for A's and then does nothing).
+    insert_if_absent = dashboard_rollup._insert_if_absent
+
+    def interleaved(conn, model, values, keys):
+        if model is dashboard_daily:
+            conn.execute(insert(dashboard_daily).values(day=DAY, notes_count=5, wait_sum_minutes=0, wait_count=0, patients_count=1))
+            monkeypatch.setattr(dashboard_rollup, "_insert_if_absent", insert_if_absent)
+        return insert_if_absent(conn, model, values, keys)
+
+    monkeypatch.setattr(dashboard_rollup, "_insert_if_absent", interleaved)
+    _add_note(conn)
+    dashboard_rollup.apply_note_deltas(conn, {DAY: 1})
+    # 3 earlier notes + A's + B's; an absolute upsert from B's snapshot would leave 4
+    assert _row(conn, DAY).notes_count == 6
+
+
+def test_surgery_refresh_keeps_a_concurrent_note_count(conn):
+    conn.execute(insert(dashboard_daily).values(day=DAY, notes_count=5, wait_sum_minutes=0, wait_count=0, patients_count=0))
+    dashboard_rollup.refresh_days(conn, [DAY])
+    row = _row(conn, DAY)
+    assert row.notes_count == 5 and row.patients_count == 1
+
+
+@pytest.mark.parametrize("path", ["/dashboard/or-utilization", "/dashboard/metrics", "/dashboard/or-utilization/range", "/dashboard/metrics/range"])
+@pytest.mark.parametrize("window", [{"day_start": "7am"}, {"day_end": "25:00"}, {"day_start": ""}])
+def test_malformed_day_window_is_a_client_error(path, window):
+    params = {"from": "2026-03-01", "to": "2026-03-07", **window} if path.endswith("/range") else window
+    assert TestClient(app).get(path, params=params).status_code == 400
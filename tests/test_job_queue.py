@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import SessionLocal, engine
+from app.models.base import Base
+from app.models.analysis_job import analysis_jobs, JobStatus
+from app.models.note_analysis import note_analysis, AnalysisStatus
+from app.services.job_queue import AnalysisJobQueue
+
+RESULT = {"success": True, "analysis": "ok", "summary": "s", "keywords": ["k"], "concerns_identified": [], "urgency_level": 2}
+
+
+@pytest.fixture
+def queue():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.query(analysis_jobs).delete()
+        db.commit()
+        q = AnalysisJobQueue(lease_seconds=3)
+        q.enqueue(db, None, {"transcription_text": "text"})
+    return q
+
+
+def _job():
+    with SessionLocal() as db:
+        return db.query(analysis_jobs).one()
+
+
+def _expire_lease():
+    with SessionLocal() as db:
+        job = db.query(analysis_jobs).one()
+        job.locked_at = datetime.utcnow() - timedelta(minutes=10)
+        db.commit()
+
+
+def test_claim_gives_each_claim_its_own_lease(queue):
+    job_id, token = queue._claim_next()
+    assert _job().locked_by == token
+    assert queue._claim_next() is None
+
+    _expire_lease()
+    reclaimed_id, new_token = queue._claim_next()
+    assert reclaimed_id == job_id and new_token != token
+
+
+def test_completion_requires_the_lease(queue):
+    job_id, token = queue._claim_next()
+    _expire_lease()
+    _, new_token = AnalysisJobQueue(lease_seconds=3)._claim_next()
+
+    # The first worker lost its lease: its result and failure are both ignored
+    assert queue._complete(job_id, token, RESULT) is False
+    assert queue._fail(job_id, token, "boom") is False
+    assert not queue._renew(job_id, token)
+    job = _job()
+    assert job.status == JobStatus.running and job.locked_by == new_token
+
+    assert queue._complete(job_id, new_token, RESULT) is True
+    job = _job()
+    assert job.status == JobStatus.completed and job.locked_by is None
+    with SessionLocal() as db:
+        assert db.get(note_analysis, job.note_analysis_id).analysis_status == AnalysisStatus.completed
+
+
+def test_heartbeat_renews_the_lease(queue):
+    job_id, token = queue._claim_next()
+    _expire_lease()
+
+    async def beat():
+        heartbeat = asyncio.create_task(queue._heartbeat(job_id, token))
+        await asyncio.sleep(1.2)
+        heartbeat.cancel()
+
+    asyncio.run(beat())
+    assert _job().locked_at > datetime.utcnow() - timedelta(seconds=5)
+    assert queue._claim_next() is None
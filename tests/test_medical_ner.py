@@ -0,0 +1,39 @@
+import re
+
+import pytest
+
+from app.services.medical_ner import LAB_UNITS, LAB_VALUE_PATTERN, _lab_value_pattern
+
+# The patterns _extract_lab_values ran one after another before they were merged
+SEPARATE_PATTERNS = [
+    r'\d+/\d+\s*mmHg',
+    r'\d+\.?\d*\s*°?[FC]',
+    r'\d+\.?\d*\s*(?:mg/dL|mmol/L|g/dL|%|bpm|kg|lbs)',
+]
+
+TEXT = "BP 120/80 mmHg, temp 98.6 F (37 °C), glucose 5.4 mmol/L, creatinine 1.1 mg/dL, Hb 13 g/dL, 72 bpm, 80 kg, 176 lbs, SpO2 95%"
+
+
+def _spans(pattern, text):
+    return [(m.start(), m.group()) for m in pattern.finditer(text)]
+
+
+def test_merged_pattern_finds_what_the_separate_patterns_found():
+    separate = sorted(
+        (m.start(), m.group())
+        for p in SEPARATE_PATTERNS
+        for m in re.finditer(p, TEXT, re.IGNORECASE)
+    )
+    assert _spans(LAB_VALUE_PATTERN, TEXT) == separate
+
+
+@pytest.mark.parametrize("units", [("mg", "mg/dL", "g/dL"), ("g/dL", "mg/dL", "mg"), ("g", "g/dL", "mg", "mg/dL")])
+def test_longer_unit_wins_over_its_prefix(units):
+    pattern = _lab_value_pattern(units)
+    assert _spans(pattern, "creatinine 1.1 mg/dL, Hb 13 g/dL, dose 5 mg") == [
+        (11, "1.1 mg/dL"), (25, "13 g/dL"), (39, "5 mg")
+    ]
+
+
+def test_blood_pressure_is_not_split_into_other_values():
+    assert _spans(_lab_value_pattern(LAB_UNITS + ("mm",)), "120/80 mmHg") == [(0, "120/80 mmHg")]
@@ -0,0 +1,59 @@
+import pytest
+
+from app.services.inference_pool import InferencePool
+from app.services.model_registry import ModelRegistry
+
+
+def _fail():
+    raise RuntimeError("GROQ_API_KEY is not set")
+
+
+def test_failed_optional_service_leaves_registry_ready_but_degraded():
+    registry = ModelRegistry()
+    registry.register("transcription", lambda: object())
+    registry.register("analysis", _fail, required=False)
+    registry.preload()
+
+    assert registry.is_ready()
+    assert registry.is_degraded()
+    assert registry.status()["analysis"]["state"] == "failed"
+    assert registry.status()["analysis"]["required"] is False
+
+
+def test_required_service_gates_readiness():
+    registry = ModelRegistry()
+    registry.register("transcription", _fail)
+    registry.register("analysis", lambda: object(), required=False)
+    registry.preload()
+
+    assert not registry.is_ready()
+    assert not registry.is_degraded()
+
+
+def test_optional_service_still_loading_is_not_degraded():
+    registry = ModelRegistry()
+    registry.register("transcription", lambda: object())
+    registry.register("analysis", lambda: object(), required=False)
+    registry.preload(["transcription"])
+
+    assert registry.is_ready() and not registry.is_degraded()
+
+
+@pytest.mark.parametrize("backend, device, expected", [
+    ("whisper", "cpu", 6),          # mmap-shared weights
+    ("whisper", "cuda", 2),
+    ("whisper-int8", "cpu", 2),
+    ("faster-whisper", "cpu", 2),
+])
+def test_workers_with_private_weights_are_capped(monkeypatch, backend, device, expected):
+    monkeypatch.delenv("ASR_MAX_PRIVATE_WEIGHT_WORKERS", raising=False)
+    assert InferencePool(backend_name=backend, device=device, num_workers=6).num_workers == expected
+
+
+def test_whisper_weights_stay_file_backed():
+    pytest.importorskip("whisper")
+    from app.services.asr_backends import WhisperBackend
+
+    model = WhisperBackend("tiny", "cpu").model
+    # load_model would have copied them into fresh fp32 tensors
+    assert model.encoder.conv1.weight.dtype.itemsize == 2
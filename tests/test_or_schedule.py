@@ -0,0 +1,156 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, update
+
+from app.main import app
+from app.database import SessionLocal
+from app.models.doctor import doctors
+from app.models.operating_room import operating_rooms
+from app.models.or_schedule_version import or_schedule_version
+from app.models.patient import patients
+from app.models.surgery import surgeries
+from app.services.or_schedule import ScheduleIndex, booking_interval, schedule_index
+
+DAY = date(2026, 10, 20)
+
+
+@pytest.fixture
+def client():
+    with SessionLocal() as db:
+        db.query(surgeries).delete()
+        db.query(operating_rooms).delete()
+        db.query(or_schedule_version).delete()
+        db.commit()
+    schedule_index.clear()
+    return TestClient(app)
+
+
+@pytest.fixture
+def room_id(client):
+    with SessionLocal() as db:
+        room = operating_rooms(room_number="OR-T1")
+        db.add(room)
+        db.commit()
+        return room.id
+
+
+@pytest.fixture
+def people():
+    with SessionLocal() as db:
+        patient = patients(first_name="Test", last_name="Patient")
+        doctor = db.query(doctors).filter(doctors.email == "or-test@example.org").first()
+        if doctor is None:
+            doctor = doctors(first_name="Test", last_name="Doctor", email="or-test@example.org", password_hash="x")
+        db.add_all([patient, doctor])
+        db.commit()
+        return patient.id, doctor.id
+
+
+def _book(client, room_id, people, scheduled_time, duration=60):
+    patient_id, doctor_id = people
+    return client.post("/surgeries/", json={
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "operating_room_id": room_id,
+        "scheduled_date": DAY.isoformat(),
+        "scheduled_time": scheduled_time,
+        "duration_minutes": duration,
+    })
+
+
+def test_free_slots_accepts_timezone_aware_not_before(client, room_id):
+    response = client.get("/operating-rooms/free-slots", params={
+        "duration_minutes": 60,
+        "date_from": DAY.isoformat(),
+        "room_ids": str(room_id),
+        "not_before": "2026-10-20T08:00:00Z",
+    })
+    assert response.status_code == 200
+    assert response.json(), "expected at least one free slot"
+
+
+def test_overlapping_booking_rejected(client, room_id, people):
+    assert _book(client, room_id, people, "09:00").status_code == 201
+    assert _book(client, room_id, people, "09:30").status_code == 400
+    assert _book(client, room_id, people, "10:00").status_code == 201
+
+
+def test_conflict_check_uses_cache_after_local_writes(client, room_id, people):
+    assert _book(client, room_id, people, "09:00").status_code == 201
+    cached = schedule_index._days[(room_id, DAY)]
+    assert _book(client, room_id, people, "11:00").status_code == 201
+
+    # Committed through this process: applied in place, not reloaded
+    with SessionLocal() as db:
+        conflict = schedule_index.find_conflict(db, room_id, *booking_interval(DAY, "11:30", 30))
+    assert conflict is not None
+    assert schedule_index._days[(room_id, DAY)] is cached
+
+
+def test_conflict_check_sees_writes_from_other_processes(client, room_id, people):
+    assert _book(client, room_id, people, "09:00").status_code == 201
+    patient_id, doctor_id = people
+
+    # Another process: a booking plus its version bump, invisible to this process's hooks
+    with SessionLocal() as db:
+        conn = db.connection()
+        conn.execute(insert(surgeries).values(
+            patient_id=patient_id, doctor_id=doctor_id, operating_room_id=room_id,
+            scheduled_date=DAY, scheduled_time="13:00", duration_minutes=60,
+        ))
+        conn.execute(
+            update(or_schedule_version)
+            .where(or_schedule_version.room_id == room_id)
+            .values(version=or_schedule_version.version + 1)
+        )
+        conn.commit()
+
+    assert _book(client, room_id, people, "13:30").status_code == 400
+
+
+def test_room_lock_serializes_check_and_commit_across_processes(client, room_id, people):
+    patient_id, doctor_id = people
+    other_process = ScheduleIndex()
+    interval = booking_interval(DAY, "09:30", 60)
+    with SessionLocal() as db:
+        assert other_process.find_conflict(db, room_id, *interval) is None  # warm cache
+
+    booked, release = threading.Event(), threading.Event()
+
+    def first_writer():
+        with SessionLocal() as db:
+            schedule_index.lock_room(db, room_id)
+            assert schedule_index.find_conflict(db, room_id, *interval) is None
+            db.add(surgeries(
+                patient_id=patient_id, doctor_id=doctor_id, operating_room_id=room_id,
+                scheduled_date=DAY, scheduled_time="09:00", duration_minutes=60,
+            ))
+            db.flush()
+            booked.set()
+            release.wait(5)
+            db.commit()
+
+    writer = threading.Thread(target=first_writer)
+    writer.start()
+    assert booked.wait(5)
+    threading.Timer(0.3, release.set).start()
+
+    # The second worker's check waits for the first one's commit, then sees its booking
+    with SessionLocal() as db:
+        start = time.monotonic()
+        other_process.lock_room(db, room_id)
+        waited = time.monotonic() - start
+        conflict = other_process.find_conflict(db, room_id, *interval)
+        db.rollback()
+    writer.join(5)
+    assert waited >= 0.2
+    assert conflict is not None
+
+
+@pytest.mark.parametrize("scheduled_time", ["9:30am", "noon", "25:00"])
+def test_unparseable_scheduled_time_rejected(client, room_id, people, scheduled_time):
+    assert _book(client, room_id, people, scheduled_time).status_code == 400
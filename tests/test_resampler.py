@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.services.audio_processor import AudioProcessor, ResampleStream
+from app.services.resampler import StreamResampler, resample
+
+
+def _tone(freq, rate, seconds=1.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return np.sin(2 * np.pi * freq * t)
+
+
+@pytest.mark.parametrize("rate", [8000, 22050, 44100, 48000])
+def test_in_band_tone_is_preserved(rate):
+    out = resample(_tone(1000, rate), rate)
+    assert out.size == 16000
+    expected = _tone(1000, 16000)
+    # Edges are where the filter sees the implicit silence around the signal
+    assert np.abs(out[400:-400] - expected[400:-400]).max() < 5e-3
+
+
+@pytest.mark.parametrize("rate", [44100, 48000])
+def test_content_above_new_nyquist_is_removed(rate):
+    out = resample(_tone(10000, rate), rate)
+    # Linear interpolation folds this tone to 6 kHz at ~0.6 RMS
+    assert np.sqrt(np.mean(out[400:-400] ** 2)) < 0.01
+
+
+def test_chunked_stream_matches_whole_signal():
+    rng = np.random.default_rng(0)
+    signal = rng.standard_normal(44100 * 2)
+    whole = resample(signal, 44100)
+
+    resampler = StreamResampler(44100)
+    parts, start = [], 0
+    while start < signal.size:
+        size = int(rng.integers(1, 5000))
+        parts.append(resampler.process(signal[start:start + size]))
+        start += size
+    parts.append(resampler.flush())
+    np.testing.assert_allclose(np.concatenate(parts), whole, atol=1e-6)
+
+
+def test_pcm_frames_share_resampling_state(tmp_path):
+    processor = AudioProcessor(storage_path=str(tmp_path))
+    pcm = (_tone(440, 48000, 0.5) * 12000).astype("<i2").tobytes()
+    whole = processor.decode_pcm16(pcm, 48000)
+
+    stream = ResampleStream()
+    frames = [pcm[i:i + 1920] for i in range(0, len(pcm), 1920)]
+    decoded = np.concatenate([
+        processor.decode_pcm16(frame, 48000, stream=stream, final=(i == len(frames) - 1))
+        for i, frame in enumerate(frames)
+    ])
+    np.testing.assert_allclose(decoded, whole, atol=1e-6)
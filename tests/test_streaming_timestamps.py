@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.streaming_transcriber import StreamingTranscriber
+from app.services.vad import VoiceActivityDetector
+
+RATE = 16000
+
+
+def _silence(seconds):
+    return np.zeros(int(RATE * seconds), dtype=np.float32)
+
+
+def _voiced(seconds):
+    # Harmonic-rich buzz: loud and spectrally peaky, so the VAD takes it for speech
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (0.3 * np.sign(np.sin(2 * np.pi * 150 * t))).astype(np.float32)
+
+
+class FakeTranscriptionService:
+    """Reports one word spanning the whole (speech-only) buffer."""
+
+    async def transcribe_audio_async(self, audio, language, **options):
+        duration = audio.size / RATE
+        return {
+            "success": True,
+            "segments": [{"words": [{"word": " hello", "start": 0.0, "end": duration}]}],
+            "confidence": 0.9,
+        }
+
+
+def test_vad_reports_where_trimmed_speech_starts():
+    vad = VoiceActivityDetector()
+    speech, start = vad.process_chunk(np.concatenate([_silence(1.0), _voiced(0.5)]))
+    assert speech is not None
+    # Hangover keeps up to 200 ms of lead-in before the onset at 1.0 s
+    assert 0.75 <= start <= 1.0
+
+    skipped, start = vad.process_chunk(_silence(1.0))
+    assert skipped is None and start == pytest.approx(1.5)
+
+    speech, start = vad.process_chunk(np.concatenate([_silence(0.6), _voiced(0.5)]))
+    assert 2.5 - 0.25 <= start <= 3.1
+
+
+def test_committed_times_are_recording_times():
+    vad = VoiceActivityDetector()
+    streamer = StreamingTranscriber(FakeTranscriptionService())
+
+    # Two seconds of silence that the VAD drops entirely, then speech after a pause
+    for chunk in (_silence(2.0), np.concatenate([_silence(1.0), _voiced(1.0)])):
+        speech, speech_start = vad.process_chunk(chunk)
+        if speech is not None:
+            streamer.insert_audio(speech, audio_start=speech_start)
+            asyncio.run(streamer.process())
+
+    result = streamer.finish()
+    # Speech time would put the word at ~0 s; in the recording it starts after ~3 s
+    assert result["committed_start"] == pytest.approx(3.0, abs=0.25)
+    assert result["committed_end"] == pytest.approx(4.0, abs=0.05)
+
+
+def test_piece_boundaries_map_to_the_right_piece():
+    streamer = StreamingTranscriber(FakeTranscriptionService())
+    streamer.insert_audio(_silence(1.0), audio_start=5.0)
+    streamer.insert_audio(_silence(1.0), audio_start=10.0)
+
+    assert streamer.to_audio_time(0.5) == pytest.approx(5.5)
+    assert streamer.to_audio_time(1.0) == pytest.approx(10.0)               # a start at the seam
+    assert streamer.to_audio_time(1.0, is_end=True) == pytest.approx(6.0)   # an end at the seam
+    assert streamer.to_audio_time(1.5) == pytest.approx(10.5)
@@ -0,0 +1,47 @@
+import asyncio
+
+import numpy as np
+
+from app.services.transcription_service import PROMPT_CONTEXT_CHARS, TranscriptionService
+
+CONTEXT = "word " * 100  # 500 chars
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.options = []
+
+    def transcribe(self, audio, **options):
+        self.options.append(options)
+        return {"text": "ok", "language": "en", "segments": []}
+
+
+class RecordingPool:
+    def __init__(self):
+        self.options = []
+
+    async def transcribe(self, audio, options):
+        self.options.append(options)
+        return {"text": "ok", "language": "en", "segments": []}
+
+
+def _service():
+    # __init__ needs torch; only the option handling is under test
+    service = TranscriptionService.__new__(TranscriptionService)
+    service._backend = RecordingBackend()
+    service.pool = RecordingPool()
+    service.vad_enabled = False
+    service.batching_enabled = False
+    return service
+
+
+def test_sync_and_async_paths_trim_the_prompt_the_same_way():
+    service = _service()
+    audio = np.zeros(16000, dtype=np.float32)
+
+    assert service.transcribe_audio(audio, initial_prompt=CONTEXT)["success"]
+    assert asyncio.run(service.transcribe_audio_async(audio, initial_prompt=CONTEXT))["success"]
+    assert asyncio.run(service.transcribe_realtime_chunk_async(audio, previous_context=CONTEXT))["success"]
+
+    prompts = [o["initial_prompt"] for o in service._backend.options + service.pool.options]
+    assert prompts == [CONTEXT[-PROMPT_CONTEXT_CHARS:]] * 3
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.services.vad import VoiceActivityDetector
+
+RATE = 16000
+
+
+def _vowel(seconds, level_db=-22.0):
+    # Harmonic series at 120 Hz scaled to `level_db` RMS, i.e. a sustained voiced sound
+    t = np.arange(int(RATE * seconds)) / RATE
+    signal = sum(np.sin(2 * np.pi * k * 120 * t) / k for k in range(1, 20))
+    return (signal / np.sqrt(np.mean(signal ** 2)) * 10 ** (level_db / 20)).astype(np.float32)
+
+
+def _noise(seconds, level, seed=0):
+    return (level * np.random.default_rng(seed).standard_normal(int(RATE * seconds))).astype(np.float32)
+
+
+@pytest.mark.parametrize("seconds", [0.4, 2.0])
+def test_continuous_speech_is_kept_whole(seconds):
+    speech, start = VoiceActivityDetector().trim(_vowel(seconds))
+    assert speech is not None and start == 0.0
+    assert speech.size >= int(RATE * seconds) - VoiceActivityDetector().frame_length
+
+
+def test_session_opening_mid_speech_keeps_the_first_chunk():
+    vad = VoiceActivityDetector()
+    for _ in range(5):
+        speech, _ = vad.process_chunk(_vowel(1.0))
+        assert speech is not None and speech.size >= RATE - vad.frame_length
+    assert vad.noise_floor_db == pytest.approx(vad.min_energy_db - vad.margin_db)
+
+
+def test_speech_onset_after_quiet_room():
+    vad = VoiceActivityDetector()
+    for seed in range(3):
+        assert vad.process_chunk(_noise(1.0, 0.001, seed))[0] is None
+
+    speech, start = vad.process_chunk(np.concatenate([_noise(0.5, 0.001, 3), _vowel(0.5)]))
+    # Onset at 3.5 s; hangover keeps up to 200 ms of lead-in
+    assert speech is not None
+    assert 3.25 <= start <= 3.5
+
+
+def test_speech_with_pauses_does_not_raise_the_floor():
+    vad = VoiceActivityDetector()
+    for seed in range(20):
+        speech, _ = vad.process_chunk(np.concatenate([_vowel(0.7), _noise(0.3, 0.0005, seed)]))
+        assert speech is not None
+    assert vad.noise_floor_db < vad.min_energy_db - vad.margin_db + 1
+
+
+def test_floor_rises_slowly_with_loud_noise():
+    vad = VoiceActivityDetector()
+    floors = []
+    for seed in range(6):
+        assert vad.process_chunk(_noise(1.0, 0.01, seed))[0] is None
+        floors.append(vad.noise_floor_db)
+    steps = np.diff([vad.min_energy_db - vad.margin_db] + floors)
+    assert steps.max() <= vad.max_rise_db_per_second + 1e-6
+    assert floors[-1] > floors[0]